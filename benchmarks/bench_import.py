@@ -0,0 +1,20 @@
+# Created by roy.gonzalez-aleman at 19/10/2026
+"""
+Import-time budget of the command line entry points
+"""
+
+
+class ImportTime:
+    """
+    Time to import the CLI modules in a fresh interpreter. It must stay well
+    under a second since courbes is launched thousands of times by array jobs
+    """
+
+    def timeraw_import_runner(self):
+        return 'import courbes.runner'
+
+    def timeraw_import_violins(self):
+        return 'import courbes.utils.violins'
+
+    def timeraw_import_courbes(self):
+        return 'import courbes'
@@ -0,0 +1,83 @@
+# Created by roy.gonzalez-aleman at 19/10/2026
+"""
+Benchmarks of the parsing of curves+ .lis files
+"""
+import os
+import shutil
+import tempfile
+
+from courbes import parsing
+from courbes.utils import synthetic
+
+from . import common
+
+
+class SingleLis:
+    """
+    Parsing of a single .lis file as a function of the DNA length
+    """
+    params = [common.n_bp_axis]
+    param_names = ['n_bp']
+
+    def setup(self, n_bp):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.lis_path = synthetic.write_lis_set(self.tmp_dir, 1, n_bp=n_bp,
+                                                rng=0)[0]
+
+    def teardown(self, n_bp):
+        shutil.rmtree(self.tmp_dir)
+
+    def time_parser_single(self, n_bp):
+        parsing.CourbesParserSingle(self.lis_path)
+
+
+class MultiLis:
+    """
+    Parsing of a set of .lis files as a function of frames and DNA length
+    """
+    params = [common.n_lis_axis, common.n_bp_axis]
+    param_names = ['n_frames', 'n_bp']
+    timeout = 3600
+
+    def setup_cache(self):
+        # .lis sets are written once and shared by all the benchmarks
+        cache_dir = os.path.abspath('lis_cache')
+        for n_lis in common.n_lis_axis:
+            for n_bp in common.n_bp_axis:
+                synthetic.write_lis_set(
+                    os.path.join(cache_dir, f'{n_lis}_{n_bp}'), n_lis,
+                    n_bp=n_bp, rng=0, p_missing=0.01)
+        return cache_dir
+
+    def setup(self, cache_dir, n_frames, n_bp):
+        lis_dir = os.path.join(cache_dir, f'{n_frames}_{n_bp}')
+        self.lis_paths = [os.path.join(lis_dir, f'tmp_{i + 1}.lis')
+                          for i in range(n_frames)]
+        self.parsed = parsing.CourbesParserMulti(self.lis_paths)
+
+    def time_concat_info(self, cache_dir, n_frames, n_bp):
+        self.parsed.concat_info()
+
+    def peakmem_concat_info(self, cache_dir, n_frames, n_bp):
+        self.parsed.concat_info()
+
+
+class MultiLisDescriptors:
+    """
+    Reshaping and identification of already concatenated .lis information
+    """
+    params = MultiLis.params
+    param_names = MultiLis.param_names
+    timeout = MultiLis.timeout
+
+    setup_cache = MultiLis.setup_cache
+
+    def setup(self, cache_dir, n_frames, n_bp):
+        MultiLis.setup(self, cache_dir, n_frames, n_bp)
+        self.parsed.concat_info()
+
+    def time_get_descriptors(self, cache_dir, n_frames, n_bp):
+        self.parsed.get_descriptors()
+
+    def time_get_identifiers(self, cache_dir, n_frames, n_bp):
+        self.parsed.get_identifiers()
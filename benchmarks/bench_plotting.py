@@ -0,0 +1,65 @@
+# Created by roy.gonzalez-aleman at 19/10/2026
+"""
+Benchmarks of the plotting of statistics and violins
+"""
+import os
+import shutil
+import sys
+import tempfile
+
+import matplotlib
+
+matplotlib.use('Agg')
+
+import courbes.commons as cmn  # noqa: E402
+from courbes import parsing, plots  # noqa: E402
+from courbes.utils import violins  # noqa: E402
+
+from . import common  # noqa: E402
+
+
+class PlotTable:
+    """
+    Plotting of a statistics table as a function of the DNA length
+    """
+    params = [common.n_bp_axis]
+    param_names = ['n_bp']
+
+    def setup(self, n_bp):
+        self.tmp_dir = tempfile.mkdtemp()
+        descriptors = common.make_descriptors(100, n_bp, names=['Roll'])
+        parsing.write_descriptors(self.tmp_dir, descriptors)
+        self.stat_file = os.path.join(self.tmp_dir, 'Roll_stats.txt')
+        self.table = cmn.load_raw_df(self.stat_file)
+        self.base_pairs = ['A|T', 'C|G', 'G|C', 'T|A'] * (n_bp // 4 + 1)
+        self.base_pairs = self.base_pairs[:n_bp]
+
+    def teardown(self, n_bp):
+        shutil.rmtree(self.tmp_dir)
+
+    def time_plot_table(self, n_bp):
+        plots.plot_table(self.table, self.stat_file, self.base_pairs, 'stats')
+
+
+class PlotViolins:
+    """
+    Violin plots of the raw descriptor tables of a courbes+ directory
+    """
+    params = [common.n_frames_axis, common.n_bp_axis]
+    param_names = ['n_frames', 'n_bp']
+    timeout = 1800
+
+    def setup(self, n_frames, n_bp):
+        self.tmp_dir = tempfile.mkdtemp()
+        descriptors = common.make_descriptors(n_frames, n_bp, names=['Twist'])
+        parsing.write_descriptors(os.path.join(self.tmp_dir, 'inter'),
+                                  descriptors)
+        self.argv = sys.argv
+
+    def teardown(self, n_frames, n_bp):
+        sys.argv = self.argv
+        shutil.rmtree(self.tmp_dir)
+
+    def time_plot_violins(self, n_frames, n_bp):
+        sys.argv = ['violins', self.tmp_dir]
+        violins.plot_violins()
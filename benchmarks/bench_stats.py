@@ -0,0 +1,78 @@
+# Created by roy.gonzalez-aleman at 19/10/2026
+"""
+Benchmarks of the statistics of descriptor time series
+"""
+from courbes import bootstrap, convergence, significance, stats
+
+from . import common
+
+
+class CorrelationStats:
+    """
+    Autocorrelation times and block-averaged SEM of all the base pairs
+    """
+    params = [common.n_frames_axis, common.n_bp_axis]
+    param_names = ['n_frames', 'n_bp']
+    timeout = 1800
+
+    def setup(self, n_frames, n_bp):
+        self.values = common.make_descriptors(
+            n_frames, n_bp, names=['Rise'])['Rise'].T.to_numpy()
+
+    def time_integrated_time(self, n_frames, n_bp):
+        stats.integrated_time(self.values)
+
+    def time_correlation_stats(self, n_frames, n_bp):
+        stats.correlation_stats(self.values)
+
+
+class BootstrapMeans:
+    """
+    Block-bootstrap means of all the base pairs
+    """
+    params = [common.n_frames_axis, common.n_bp_axis]
+    param_names = ['n_frames', 'n_bp']
+    timeout = 1800
+
+    def setup(self, n_frames, n_bp):
+        self.values = common.make_descriptors(
+            n_frames, n_bp, names=['Rise'])['Rise'].T.to_numpy()
+        self.sampler = bootstrap.Bootstrap(n_frames, block_size=10, seed=0)
+
+    def time_bootstrap_means(self, n_frames, n_bp):
+        self.sampler.means(self.values)
+
+
+class CompareSystems:
+    """
+    Significance tests of all the descriptors and base pairs of two systems
+    """
+    params = [common.n_frames_axis, common.n_bp_axis]
+    param_names = ['n_frames', 'n_bp']
+    timeout = 1800
+
+    def setup(self, n_frames, n_bp):
+        self.systems = {x: common.make_dataset(n_frames, n_bp, seed=i)
+                        for i, x in enumerate(['WT', 'SNO'])}
+
+    def time_welch(self, n_frames, n_bp):
+        significance.compare_systems(self.systems)
+
+
+class RunningConvergence:
+    """
+    Cumulative and windowed means and SEM of all the base pairs
+    """
+    params = [common.n_frames_axis, common.n_bp_axis]
+    param_names = ['n_frames', 'n_bp']
+    timeout = 1800
+
+    def setup(self, n_frames, n_bp):
+        self.values = common.make_descriptors(
+            n_frames, n_bp, names=['Rise'])['Rise'].T.to_numpy()
+
+    def time_running_stats(self, n_frames, n_bp):
+        convergence.running_stats(self.values, block_size=10)
+
+    def time_running_stats_autocorrelation(self, n_frames, n_bp):
+        convergence.running_stats(self.values)
@@ -0,0 +1,82 @@
+# Created by roy.gonzalez-aleman at 19/10/2026
+"""
+Benchmarks of the writing and re-loading of descriptor tables
+"""
+import os
+import shutil
+import tempfile
+
+import courbes.commons as cmn
+from courbes import parsing, sharing
+
+from . import common
+
+
+class WriteDescriptors:
+    """
+    Writing of descriptor tables and their statistics
+    """
+    params = [common.n_frames_axis, common.n_bp_axis]
+    param_names = ['n_frames', 'n_bp']
+    timeout = 1800
+
+    def setup(self, n_frames, n_bp):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.descriptors = common.make_descriptors(n_frames, n_bp)
+
+    def teardown(self, n_frames, n_bp):
+        shutil.rmtree(self.tmp_dir)
+
+    def time_write_descriptors(self, n_frames, n_bp):
+        parsing.write_descriptors(self.tmp_dir, self.descriptors)
+
+    def time_get_dataframe_stats(self, n_frames, n_bp):
+        parsing.get_dataframe_stats(self.descriptors['Shift'].T)
+
+
+class LoadRawDf:
+    """
+    Loading of the raw descriptor tables written by courbes+
+    """
+    params = [common.n_frames_axis, common.n_bp_axis]
+    param_names = ['n_frames', 'n_bp']
+    timeout = 1800
+
+    def setup(self, n_frames, n_bp):
+        self.tmp_dir = tempfile.mkdtemp()
+        descriptors = common.make_descriptors(n_frames, n_bp, names=['Rise'])
+        parsing.write_descriptors(self.tmp_dir, descriptors)
+        self.raw_path = os.path.join(self.tmp_dir, 'Rise.txt')
+        self.stats_path = os.path.join(self.tmp_dir, 'Rise_stats.txt')
+
+    def teardown(self, n_frames, n_bp):
+        shutil.rmtree(self.tmp_dir)
+
+    def time_load_raw_df(self, n_frames, n_bp):
+        cmn.load_raw_df(self.raw_path)
+
+    def time_load_stats_df(self, n_frames, n_bp):
+        cmn.load_raw_df(self.stats_path)
+
+
+class WritePdb:
+    """
+    Writing of a frame as PDB through mdtraj and through the shared template
+    """
+    params = [common.n_bp_axis]
+    param_names = ['n_bp']
+
+    def setup(self, n_bp):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.frame = common.make_duplex_frame(n_bp)
+        self.template = sharing.PdbTemplate(self.frame.topology)
+        self.pdb_path = os.path.join(self.tmp_dir, 'tmp_1.pdb')
+
+    def teardown(self, n_bp):
+        shutil.rmtree(self.tmp_dir)
+
+    def time_save_mdtraj(self, n_bp):
+        cmn.save_mdtraj(self.frame, self.pdb_path)
+
+    def time_pdb_template(self, n_bp):
+        self.template.write(self.frame.xyz[0], self.pdb_path)
@@ -0,0 +1,79 @@
+# Created by roy.gonzalez-aleman at 19/10/2026
+"""
+Shared fixtures of the courbes+ benchmark suite
+"""
+import numpy as np
+import pandas as pd
+
+# Scaling axes of the benchmarks
+n_frames_axis = [1000, 10000, 100000]
+n_bp_axis = [20, 100, 300]
+
+# Parsing thousands of .lis files is much slower than the in-memory paths
+n_lis_axis = [1000, 10000]
+
+
+def make_descriptors(n_frames, n_bp, names=('Shift', 'Slide', 'Rise'), seed=0):
+    """
+    Build a descriptors container as produced by CourbesParserMulti
+
+    Args:
+        n_frames: number of frames
+        n_bp: number of base pairs
+        names: names of the descriptors
+        seed: seed of the random generator
+
+    Returns:
+        a dict of descriptor: dataframe (bp x frames)
+    """
+    rng = np.random.default_rng(seed)
+    index = np.arange(1, n_bp + 1)
+    return {name: pd.DataFrame(rng.normal(0, 10, (n_bp, n_frames)),
+                               index=index)
+            for name in names}
+
+
+def make_dataset(n_frames, n_bp, seed=0):
+    """
+    Build a CourbesDataset with the descriptors of make_descriptors
+
+    Args:
+        n_frames: number of frames
+        n_bp: number of base pairs
+        seed: seed of the random generator
+
+    Returns:
+        a CourbesDataset with a single section
+    """
+    from courbes import analysis
+
+    descriptors = make_descriptors(n_frames, n_bp, seed=seed)
+    section = analysis.to_section('inter', descriptors, np.arange(n_frames),
+                                  [''] * n_bp)
+    return analysis.CourbesDataset({'inter': section}, np.arange(n_frames))
+
+
+def make_duplex_frame(n_bp, atoms_per_nucleotide=32, seed=0):
+    """
+    Build a single-frame trajectory with the size of a DNA duplex
+
+    Args:
+        n_bp: number of base pairs
+        atoms_per_nucleotide: atoms of each nucleotide (hydrogens included)
+        seed: seed of the random generator
+
+    Returns:
+        a mdtraj.Trajectory
+    """
+    import mdtraj as md
+
+    topology = md.Topology()
+    for strand in range(2):
+        chain = topology.add_chain()
+        for i in range(n_bp):
+            residue = topology.add_residue('DA', chain, resSeq=i + 1)
+            for j in range(atoms_per_nucleotide):
+                topology.add_atom(f'C{j}', md.element.carbon, residue)
+    rng = np.random.default_rng(seed)
+    xyz = rng.random((1, topology.n_atoms, 3)).astype(np.float32) * 10
+    return md.Trajectory(xyz, topology)
@@ -14,3 +14,12 @@ except PackageNotFoundError:  # pragma: no cover
     __version__ = "unknown"
 finally:
     del version, PackageNotFoundError
+
+
+def __getattr__(name):
+    # Lazy access to the library API so that `import courbes` (and the CLI)
+    # does not pay the import time of numpy, pandas & co.
+    if name == 'analyze':
+        from courbes.analysis import analyze
+        return analyze
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,435 @@
+# Created by roy.gonzalez-aleman at 19/10/2026
+"""
+Library-level access to courbes+ results as an in-memory labelled dataset
+"""
+import os
+import tempfile
+
+import numpy as np
+import pandas as pd
+
+import courbes.commons as cmn
+from courbes import parsing
+from courbes.config import default_sections
+
+# Output directory of each section: (descriptors attribute, ids attribute)
+section_attrs = {
+    'axis': ('descriptors_bp_axes', 'ids_bp_axes'),
+    'intra': ('descriptors_bp_intras', 'ids_bp_intras'),
+    'inter': ('descriptors_bp_inters', 'ids_bp_inters'),
+    'backbone': ('descriptors_backbones', 'ids_backbones'),
+    'groove': ('descriptors_grooves', 'ids_grooves'),
+    'curvature': ('descriptors_curvatures', 'ids_curvatures'),
+}
+
+
+class Section:
+    """
+    Values of a curves+ section as a (descriptor x frame x bp) array
+    """
+
+    def __init__(self, name, descriptors, values, frames, bp_index, bp_ids,
+                 categorical=None):
+        self.name = name
+        self.descriptors = list(descriptors)
+        self.values = np.asarray(values, dtype=float)
+        self.frames = np.asarray(frames)
+        self.bp_index = np.asarray(bp_index)
+        self.bp_ids = list(bp_ids)
+        self.categorical = categorical or {}
+
+        expected = (len(self.descriptors), self.frames.size, self.bp_index.size)
+        if self.values.shape != expected:
+            raise ValueError(
+                f'Section {name} has shape {self.values.shape} but labels'
+                f' imply {expected}')
+
+    def __repr__(self):
+        return (f'<Section {self.name}: {len(self.descriptors)} descriptors'
+                f' x {self.frames.size} frames x {self.bp_index.size} bp>')
+
+    def __getitem__(self, descriptor):
+        return self.values[self.descriptors.index(descriptor)]
+
+    def to_frame(self, descriptor):
+        """
+        Get a descriptor as a dataframe of frames (rows) x bp (columns)
+
+        Args:
+            descriptor: name of the descriptor
+
+        Returns:
+            a dataframe laid out as the .txt files written by courbes+
+        """
+        if descriptor in self.categorical:
+            values = self.categorical[descriptor]
+        else:
+            values = self[descriptor]
+        return pd.DataFrame(values, index=self.frames, columns=self.bp_index)
+
+    def select(self, positions):
+        """
+        Get the section restricted to some frames
+
+        Args:
+            positions: positions (or boolean mask) of the frames to keep
+
+        Returns:
+            a new Section
+        """
+        categorical = {x: y[positions] for x, y in self.categorical.items()}
+        return Section(self.name, self.descriptors, self.values[:, positions],
+                       self.frames[positions], self.bp_index, self.bp_ids,
+                       categorical)
+
+
+class CourbesDataset:
+    """
+    In-memory labelled container of all the sections parsed from curves+
+    """
+
+    def __init__(self, sections, frames, failed=None, replicas=None):
+        self.sections = sections
+        self.frames = np.asarray(frames)
+        self.failed = failed or []
+        # Name of the replica of each frame
+        if replicas is None:
+            replicas = [''] * self.frames.size
+        self.replicas = np.asarray(replicas, dtype=str)
+
+    def __repr__(self):
+        n_replicas = len(self.replica_names)
+        lines = [f'<CourbesDataset: {self.frames.size} frames'
+                 + (f' from {n_replicas} replicas>' if n_replicas > 1 else '>')]
+        lines.extend(f'  {x!r}' for x in self.sections.values())
+        return '\n'.join(lines)
+
+    def __getitem__(self, key):
+        """
+        Get a section by name, or a descriptor array by 'section/descriptor'
+        """
+        if key in self.sections:
+            return self.sections[key]
+        section, descriptor = key.rsplit('/', 1)
+        return self.sections[section][descriptor]
+
+    def __iter__(self):
+        return iter(self.sections)
+
+    @property
+    def replica_names(self):
+        """
+        Names of the replicas in the order of their frames
+        """
+        return list(dict.fromkeys(self.replicas.tolist()))
+
+    def replica(self, name):
+        """
+        Get the dataset restricted to the frames of a replica
+
+        Args:
+            name: name of the replica
+
+        Returns:
+            a CourbesDataset with the frames of the replica only
+        """
+        mask = self.replicas == name
+        if not mask.any():
+            raise KeyError(f'No replica named {name}. Available replicas are'
+                           f' {self.replica_names}')
+        sections = {x: y.select(mask) for x, y in self.sections.items()}
+        failed = [x for x in self.failed if x[0] == name]
+        return CourbesDataset(sections, self.frames[mask], failed,
+                              self.replicas[mask])
+
+    @classmethod
+    def from_parser(cls, lis_parsed, frames=None, replicas=None):
+        """
+        Build a dataset from an already processed CourbesParserMulti
+
+        Args:
+            lis_parsed: CourbesParserMulti after concat_info, get_descriptors
+                        and get_identifiers
+            frames: labels of the parsed frames (defaults to 0..n_frames-1)
+            replicas: name of the replica of each parsed frame
+
+        Returns:
+            a CourbesDataset
+        """
+        if frames is None:
+            frames = np.arange(lis_parsed.n_frames)
+        sections = {}
+        for section_dir, (desc_attr, ids_attr) in section_attrs.items():
+            descriptors = getattr(lis_parsed, desc_attr)
+            bp_ids = getattr(lis_parsed, ids_attr)
+            # Sections left out of the report
+            if descriptors is None:
+                continue
+
+            # Intra & backbone cases are nested by strands
+            first = next(iter(descriptors.values()))
+            if isinstance(first, dict):
+                for sub_case, sub_descriptors in descriptors.items():
+                    name = f'{section_dir}/{sub_case}'
+                    sections[name] = to_section(name, sub_descriptors,
+                                                frames, bp_ids)
+            else:
+                sections[section_dir] = to_section(section_dir, descriptors,
+                                                   frames, bp_ids)
+        return cls(sections, frames, replicas=replicas)
+
+
+def to_section(name, descriptors, frames, bp_ids):
+    """
+    Convert a dict of descriptor: dataframe (bp x frames) to a Section
+
+    Args:
+        name: name of the section
+        descriptors: dict of descriptor dataframes
+        frames: labels of the frames
+        bp_ids: identifiers of the base pairs
+
+    Returns:
+        a Section
+    """
+    names = []
+    arrays = []
+    categorical = {}
+    bp_index = None
+    for descriptor, df in descriptors.items():
+        bp_index = df.index.to_numpy()
+        # bp identifiers of the grooves are labels, not descriptors
+        if descriptor == 'bp_id':
+            continue
+        try:
+            arrays.append(df.T.to_numpy(dtype=float))
+            names.append(descriptor)
+        except (ValueError, TypeError):
+            categorical[descriptor] = df.T.to_numpy(dtype=str)
+
+    if len(bp_ids) != len(bp_index):
+        bp_ids = [''] * len(bp_index)
+    # Short duplexes may have no groove values at all
+    if arrays:
+        values = np.stack(arrays)
+    else:
+        values = np.empty((0, len(frames), len(bp_index)))
+    return Section(name, names, values, frames, bp_index, bp_ids, categorical)
+
+
+def write_sections(root_dir, lis_parsed, positions=None, starts=None):
+    """
+    Write the descriptors of every curves+ section
+
+    Args:
+        root_dir: directory receiving one sub-directory per section
+        lis_parsed: processed CourbesParserMulti
+        positions: positions of the frames to write (all if None)
+        starts: first frame of each replica pooled in the written frames (a
+                single replica if None)
+    """
+    for section_dir, (desc_attr, _) in section_attrs.items():
+        descriptors = getattr(lis_parsed, desc_attr)
+        # Sections left out of the report
+        if descriptors is None:
+            continue
+        if positions is not None:
+            descriptors = parsing.select_frames(descriptors, positions)
+        parsing.write_descriptors(os.path.join(root_dir, section_dir),
+                                  descriptors, starts)
+
+
+def replica_names(trajs):
+    """
+    Get a unique name for each replica from the name of its trajectory
+
+    Args:
+        trajs: list of paths to the trajectories
+
+    Returns:
+        list of names (file names without extension, numbered if repeated)
+    """
+    stems = [os.path.splitext(os.path.basename(x))[0] for x in trajs]
+    return [x if stems.count(x) == 1 else f'{x}_{i + 1}'
+            for i, x in enumerate(stems)]
+
+
+def group_replicas(labels, trajs):
+    """
+    Group the run-wide indices of the processed frames by replica
+
+    Args:
+        labels: dict of index: (trajectory, frame number)
+        trajs: list of paths to the trajectories
+
+    Returns:
+        a dict of replica name: list of indices sorted by frame number
+    """
+    names = dict(zip(trajs, replica_names(trajs)))
+    groups = {x: [] for x in names.values()}
+    for index in sorted(labels, key=lambda x: labels[x][1]):
+        groups[names[labels[index][0]]].append(index)
+    return {x: y for x, y in groups.items() if y}
+
+
+def parse_lis(lis_paths):
+    """
+    Parse a set of curves+ .lis files
+
+    Args:
+        lis_paths: paths to the .lis files sorted by frame
+
+    Returns:
+        a CourbesParserMulti with descriptors and identifiers computed
+    """
+    lis_parsed = parsing.CourbesParserMulti(lis_paths)
+    lis_parsed.concat_info()
+    lis_parsed.get_descriptors()
+    lis_parsed.get_identifiers()
+    return lis_parsed
+
+
+def collect_failed(curves_failed, lis_parsed, order):
+    """
+    Gather the frames failed in curves+ and those whose .lis was unparsable
+
+    Args:
+        curves_failed: dict of run-wide index: reason (CurvesScheduler.failed)
+        lis_parsed: parser returned by parse_sections
+        order: run-wide indices of the parsed frames, in order
+
+    Returns:
+        a dict of run-wide index: reason
+    """
+    failed = dict(curves_failed)
+    for position, reason in getattr(lis_parsed, 'failed', {}).items():
+        failed[order[position]] = f'unparsable .lis: {reason}'
+    return failed
+
+
+def parse_sections(lis_paths, order, sections=None, collector=None,
+                   axes=None):
+    """
+    Parse the curves+ results of some frames, completed with the sections
+    computed natively and with the curvature of the helical axis
+
+    Args:
+        lis_paths: paths to the .lis files sorted by frame (None if they are
+                   not needed)
+        order: run-wide indices of the frames, in order
+        sections: names of the sections to keep (all if None)
+        collector: NativeCollector of the native sections (if any)
+        axes: dict of run-wide index: helical axis read from curves+ (see
+              CurvesScheduler.axes), to get the curvature section
+
+    Returns:
+        a CourbesParserMulti (or a NativeParser) whose sections left out are
+        None
+    """
+    from courbes import native
+
+    if lis_paths is not None:
+        lis_parsed = parse_lis(lis_paths)
+    else:
+        lis_parsed = native.NativeParser(len(order))
+    if collector is not None:
+        collector.update(lis_parsed, order)
+    if axes is not None:
+        from courbes import curvature
+
+        curvature.update(lis_parsed, axes, order)
+    for section, (desc_attr, ids_attr) in section_attrs.items():
+        if sections is not None and section not in sections:
+            setattr(lis_parsed, desc_attr, None)
+            setattr(lis_parsed, ids_attr, None)
+    return lis_parsed
+
+
+def analyze(topology, trajectories, selection, strands, curves_exe, lib_path,
+            first=0, last=-1, stride=1, work_dir=None, n_workers=1,
+            timeout=None, retries=0, n_writers=0, chunk_size=100,
+            sections=None, native=None):
+    """
+    Run curves+ over trajectories and get the results without writing reports
+
+    Args:
+        topology: path to the topology
+        trajectories: path (or list of paths) to the trajectories
+        selection: mdtraj's atom selection of the nucleic acid
+        strands: lines of the curves+ strands block
+        curves_exe: path to the curves+ executable
+        lib_path: path to the curves+ standard library
+        first: first frame to consider
+        last: last frame to consider (-1 means until the end)
+        stride: stride
+        work_dir: scratch directory for curves+ files (a temporary one if None)
+        n_workers: number of concurrent curves+ processes
+        timeout: seconds after which a curves+ run is killed (None to wait)
+        retries: number of extra attempts for failed curves+ runs
+        n_writers: number of processes writing PDBs from shared memory (0 to
+                   write them in the main thread)
+        chunk_size: number of frames loaded at once from each trajectory
+        sections: names of the sections to get (all but curvature if None)
+        native: names of the sections computed natively instead of by
+                curves+ (curves+ is not run if all the sections are native)
+
+    Returns:
+        a CourbesDataset labelled by section/descriptor x frame x bp, pooling
+        all the trajectories (see CourbesDataset.replica for each one). Frames
+        that failed in curves+ are NaN and listed in its `failed` attribute as
+        (replica, frame number) tuples
+    """
+    from courbes import scheduler
+
+    if isinstance(trajectories, str):
+        trajectories = [trajectories]
+    topology = os.path.abspath(cmn.check_path(topology))
+    trajectories = [os.path.abspath(cmn.check_path(x)) for x in trajectories]
+    if not isinstance(strands, str):
+        strands = '\n'.join(strands)
+    sections = list(default_sections) if sections is None else list(sections)
+    curves_man = cmn.CurvesWrapper(curves_exe, lib_path)
+    curves_scheduler = scheduler.CurvesScheduler(
+        curves_man, strands, n_workers=n_workers, timeout=timeout,
+        retries=retries, n_writers=n_writers,
+        keep_axis='curvature' in sections)
+    labels = {}
+    chunks = cmn.iter_indexed_chunks(topology, trajectories, selection,
+                                     first=first, last=last, stride=stride,
+                                     labels=labels, interleave=True,
+                                     chunk_size=chunk_size)
+    native = [x for x in (native or []) if x in sections]
+    use_curves = any(x not in native for x in sections)
+    # The curvature only needs the helical axis, not the .lis
+    use_lis = any(x not in native + ['curvature'] for x in sections)
+    collector = None
+    if native:
+        from courbes.native import NativeCollector
+
+        collector = NativeCollector(strands, native)
+        chunks = collector.wrap(chunks, forward=use_curves)
+
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory(dir=work_dir) as scratch:
+        os.chdir(scratch)
+        try:
+            curves_scheduler.run(chunks)
+            # Pool the frames replica by replica
+            replicas = group_replicas(labels, trajectories)
+            order = [x for indices in replicas.values() for x in indices]
+            lis_paths = None
+            if use_lis:
+                lis_paths = [curves_scheduler.lis_paths[x] for x in order]
+            axes = curves_scheduler.axes if 'curvature' in sections else None
+            lis_parsed = parse_sections(lis_paths, order, sections,
+                                        collector, axes)
+        finally:
+            os.chdir(cwd)
+    frames = [labels[x][1] for x in order]
+    names = [x for x, indices in replicas.items() for _ in indices]
+    dataset = CourbesDataset.from_parser(lis_parsed, frames, names)
+    positions = {x: i for i, x in enumerate(order)}
+    failed = collect_failed(curves_scheduler.failed, lis_parsed, order)
+    dataset.failed = [(names[positions[x]], labels[x][1])
+                      for x in sorted(failed, key=positions.get)]
+    return dataset
@@ -0,0 +1,324 @@
+# Created by roy.gonzalez-aleman at 19/10/2026
+"""
+Bootstrap confidence intervals of the mean descriptors, and of their
+differences between two systems
+
+Frames are resampled as blocks of consecutive frames (moving-block bootstrap)
+so that their autocorrelation is kept. The resamples are drawn once per
+dataset and applied to every descriptor and base pair at once, as a product
+of the number of draws of each block by the sums of the blocks.
+"""
+import warnings
+
+import numpy as np
+import pandas as pd
+
+from courbes.stats import (circular_stats, integrated_time, is_angular,
+                           min_blocks, replica_bounds, replica_starts,
+                           wrapped_difference)
+
+# Default number of resamples and confidence level of the intervals
+n_resamples = 1000
+confidence = 0.95
+
+# Maximum number of block draws held in memory at once
+weights_batch_size = 2 ** 24
+
+
+def get_block_size(values, starts=None):
+    """
+    Get a block length keeping correlated frames together
+
+    Args:
+        values: (frames, ...) array of time series
+        starts: first frame of each pooled replica (a single replica if
+                None). Autocorrelation times are those within each replica
+
+    Returns:
+        twice the largest integrated autocorrelation time of the series, in
+        frames, leaving at least stats.min_blocks blocks and no longer than
+        the shortest replica
+    """
+    values = np.asarray(values, dtype=float)
+    n_frames = values.shape[0]
+    bounds = replica_bounds(n_frames, starts) or [(0, 0)]
+    with warnings.catch_warnings():
+        # Constant series have no autocorrelation time
+        warnings.simplefilter('ignore', RuntimeWarning)
+        tau = max(np.nanmax(integrated_time(values[x:y]), initial=1)
+                  for x, y in bounds)
+    if not np.isfinite(tau):
+        tau = 1
+    shortest = min(y - x for x, y in bounds)
+    return int(max(min(np.ceil(2 * tau), n_frames // min_blocks, shortest),
+                   1))
+
+
+class Bootstrap:
+    """
+    Moving-block bootstrap resamples of the frames of a time series
+
+    Each resample draws n_frames // block_size blocks of block_size
+    consecutive frames. Blocks of pooled replicas (given by the first frame
+    of each one) never straddle two replicas. The draws of each batch of
+    resamples come from its own seed, so every call resamples the same frames.
+    """
+
+    def __init__(self, n_frames, n_resamples=n_resamples, block_size=1,
+                 seed=None, starts=None):
+        if n_frames < 1:
+            raise ValueError('There are no frames to resample')
+        self.n_frames = n_frames
+        self.n_resamples = n_resamples
+        bounds = replica_bounds(n_frames, starts)
+        longest = max(y - x for x, y in bounds)
+        self.block_size = min(max(int(block_size), 1), longest)
+        # First frames of the blocks lying within a single replica
+        self.block_starts = np.concatenate(
+            [np.arange(x, y - self.block_size + 1) for x, y in bounds])
+        self.n_starts = self.block_starts.size
+        self.n_blocks = max(n_frames // self.block_size, 1)
+
+        batch = max(weights_batch_size // self.n_starts, 1)
+        self.batches = [(x, min(x + batch, n_resamples))
+                        for x in range(0, n_resamples, batch)]
+        if not isinstance(seed, np.random.SeedSequence):
+            seed = np.random.SeedSequence(seed)
+        self.seeds = seed.spawn(len(self.batches))
+
+    def __repr__(self):
+        return (f'<Bootstrap: {self.n_resamples} resamples of {self.n_blocks}'
+                f' blocks of {self.block_size} frames>')
+
+    def weights(self, batch):
+        """
+        Get the number of draws of each block by a batch of resamples
+
+        Args:
+            batch: position of the batch of resamples
+
+        Returns:
+            a (resamples, block starts) array
+        """
+        start, stop = self.batches[batch]
+        rng = np.random.default_rng(self.seeds[batch])
+        starts = rng.integers(0, self.n_starts, (stop - start, self.n_blocks))
+        # Draws are counted at once, offsetting the starts of each resample
+        starts += np.arange(stop - start)[:, None] * self.n_starts
+        counts = np.bincount(starts.ravel(),
+                             minlength=(stop - start) * self.n_starts)
+        return counts.reshape(stop - start, self.n_starts).astype(float)
+
+    def means(self, values):
+        """
+        Get the means of the resamples of time series
+
+        Args:
+            values: (frames, ...) array of time series (NaN values are left
+                    out of the means)
+
+        Returns:
+            a (resamples, ...) array
+        """
+        values = np.asarray(values, dtype=float)
+        if values.shape[0] != self.n_frames:
+            raise ValueError(f'Expected {self.n_frames} frames but got'
+                             f' {values.shape[0]}')
+        series = values.reshape(self.n_frames, -1)
+
+        # Sums and number of values of every block of consecutive frames
+        valid = ~np.isnan(series)
+        size = self.block_size
+        zeros = np.zeros((1, series.shape[1]))
+        sums = np.concatenate([zeros, np.cumsum(np.where(valid, series, 0),
+                                                axis=0)])
+        counts = np.concatenate([zeros, np.cumsum(valid, axis=0)])
+        block_sums = (sums[size:] - sums[:-size])[self.block_starts]
+        block_counts = (counts[size:] - counts[:-size])[self.block_starts]
+
+        means = np.empty((self.n_resamples, series.shape[1]))
+        with np.errstate(invalid='ignore', divide='ignore'):
+            for batch, (start, stop) in enumerate(self.batches):
+                weights = self.weights(batch)
+                # Without NaN, every resample has n_blocks full blocks
+                if valid.all():
+                    total = self.n_blocks * size
+                else:
+                    total = weights @ block_counts
+                means[start:stop] = (weights @ block_sums) / total
+        return means.reshape(self.n_resamples, *values.shape[1:])
+
+    def circular_means(self, values):
+        """
+        Get the circular means of the resamples of angles
+
+        Args:
+            values: (frames, ...) array of angles in degrees
+
+        Returns:
+            a (resamples, ...) array of angles in [-180, 180[
+        """
+        radians = np.radians(np.asarray(values, dtype=float))
+        means = self.means(np.stack([np.cos(radians), np.sin(radians)], -1))
+        return np.degrees(np.arctan2(means[..., 1], means[..., 0]))
+
+
+def get_interval(resampled, confidence=confidence):
+    """
+    Get the percentile interval of resampled statistics
+
+    Args:
+        resampled: (resamples, ...) array
+        confidence: confidence level
+
+    Returns:
+        a tuple of arrays (low, high)
+    """
+    tail = (1 - confidence) / 2
+    with warnings.catch_warnings():
+        # Base pairs without values are expected
+        warnings.simplefilter('ignore', RuntimeWarning)
+        low, high = np.nanquantile(resampled, [tail, 1 - tail], axis=0)
+    return low, high
+
+
+def stack_sections(dataset):
+    """
+    Stack the descriptors of every section of a dataset as columns
+
+    Args:
+        dataset: CourbesDataset
+
+    Returns:
+        a tuple ((frames, columns) array, dataframe of the section, descriptor,
+        bp and bp identifier of each column)
+    """
+    arrays = []
+    labels = []
+    for name, section in dataset.sections.items():
+        n_descriptors, n_frames, n_bp = section.values.shape
+        arrays.append(section.values.transpose(1, 0, 2).reshape(n_frames, -1))
+        labels.append(pd.DataFrame({
+            'section': name,
+            'descriptor': np.repeat([x.strip() for x in section.descriptors],
+                                    n_bp),
+            'bp': np.tile(section.bp_index, n_descriptors),
+            'bp_id': np.tile(np.asarray(section.bp_ids, dtype=str),
+                             n_descriptors)}))
+    if not arrays:
+        raise ValueError('The dataset has no descriptor')
+    return np.concatenate(arrays, axis=1), pd.concat(labels, ignore_index=True)
+
+
+def resample_dataset(dataset, n_resamples=n_resamples, block_size=None,
+                     seed=None):
+    """
+    Get the means of the resamples of every descriptor of a dataset
+
+    Args:
+        dataset: CourbesDataset
+        n_resamples: number of resamples
+        block_size: frames per block (from the autocorrelation if None)
+        seed: seed of the draws (int or numpy SeedSequence)
+
+    Returns:
+        a tuple ((columns,) means, (resamples, columns) resampled means,
+        dataframe labelling the columns)
+    """
+    values, labels = stack_sections(dataset)
+    angular = np.asarray([is_angular(x) for x in labels['descriptor']])
+    # Blocks are drawn within each replica
+    starts = replica_starts(dataset.replicas)
+    if block_size is None:
+        block_size = get_block_size(values, starts)
+    sampler = Bootstrap(values.shape[0], n_resamples, block_size, seed,
+                        starts)
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore', RuntimeWarning)
+        means = np.nanmean(values, axis=0)
+    resampled = np.empty((n_resamples, values.shape[1]))
+    resampled[:, ~angular] = sampler.means(values[:, ~angular])
+
+    # Angles get circular means, unwrapped around that of all the frames
+    if angular.any():
+        means[angular] = circular_stats(values[:, angular])['mean']
+        resampled[:, angular] = means[angular] + wrapped_difference(
+            sampler.circular_means(values[:, angular]), means[angular])
+    labels['block_size'] = sampler.block_size
+    return means, resampled, labels
+
+
+def mean_intervals(dataset, n_resamples=n_resamples, block_size=None,
+                   confidence=confidence, seed=None):
+    """
+    Get bootstrap confidence intervals of the mean of every descriptor of a
+    dataset
+
+    Args:
+        dataset: CourbesDataset
+        n_resamples: number of resamples
+        block_size: frames per block (from the autocorrelation if None)
+        confidence: confidence level
+        seed: seed of the draws (int or numpy SeedSequence)
+
+    Returns:
+        a dataframe with one row per section, descriptor and bp
+    """
+    means, resampled, table = resample_dataset(dataset, n_resamples,
+                                               block_size, seed)
+    table['mean'] = means
+    table['low'], table['high'] = get_interval(resampled, confidence)
+    return table
+
+
+def difference_intervals(target, reference, n_resamples=n_resamples,
+                         block_size=None, confidence=confidence, seed=None):
+    """
+    Get bootstrap confidence intervals of the differences between the mean
+    descriptors of two systems (target - reference)
+
+    The frames of both systems are resampled independently. Angles are
+    compared through their circular means, and their differences are wrapped
+    to [-180, 180[.
+
+    Args:
+        target: CourbesDataset of the target system
+        reference: CourbesDataset of the reference system
+        n_resamples: number of resamples
+        block_size: frames per block (from the autocorrelation of each
+                    system if None)
+        confidence: confidence level
+        seed: seed of the draws (int or numpy SeedSequence)
+
+    Returns:
+        a dataframe with one row per section, descriptor and bp found in both
+        systems. Differences whose interval excludes 0 are `significant`
+    """
+    seeds = np.random.SeedSequence(seed).spawn(2)
+    tar_means, tar_resampled, tar_labels = resample_dataset(
+        target, n_resamples, block_size, seeds[0])
+    ref_means, ref_resampled, ref_labels = resample_dataset(
+        reference, n_resamples, block_size, seeds[1])
+
+    keys = ['section', 'descriptor', 'bp']
+    table = tar_labels.reset_index().merge(
+        ref_labels.reset_index(), on=keys, suffixes=('_target', '_reference'))
+    if table.empty:
+        raise ValueError('The systems have no descriptor in common')
+    tar_cols = table.pop('index_target').to_numpy()
+    ref_cols = table.pop('index_reference').to_numpy()
+
+    difference = tar_means[tar_cols] - ref_means[ref_cols]
+    differences = tar_resampled[:, tar_cols] - ref_resampled[:, ref_cols]
+    # Resampled differences of angles are wrapped around the observed one
+    angular = np.asarray([is_angular(x) for x in table['descriptor']])
+    difference[angular] = wrapped_difference(difference[angular], 0)
+    differences[:, angular] = difference[angular] + wrapped_difference(
+        differences[:, angular], difference[angular])
+
+    table['target'] = tar_means[tar_cols]
+    table['reference'] = ref_means[ref_cols]
+    table['difference'] = difference
+    table['low'], table['high'] = get_interval(differences, confidence)
+    table['significant'] = (table['low'] > 0) | (table['high'] < 0)
+    return table
@@ -2,14 +2,27 @@
 import fnmatch
 import os
 import pickle
+import re
 import subprocess
-from collections import defaultdict
+from collections import defaultdict, deque
+from itertools import chain
 from os.path import basename
 
-import matplotlib as mpl
-import matplotlib.pyplot as plt
-import mdtraj as md
-import pandas as pd
+from courbes import timing
+
+# Heavy dependencies (matplotlib, mdtraj, pandas) are imported inside the
+# functions that need them to keep the startup of the CLI fast
+
+# Sugar puckers by pseudorotation phase sectors of 36 degrees
+puckers = ["C3'endo", "C4'exo", "O4'endo", "C1'exo", "C2'endo", "C3'exo",
+           "C4'endo", "O4'exo", "C1'endo", "C2'exo"]
+
+# One-letter code of the nucleotide residue names found in MD topologies
+residue_letters = {
+    'DA': 'A', 'DT': 'T', 'DG': 'G', 'DC': 'C', 'DU': 'U',
+    'A': 'A', 'T': 'T', 'G': 'G', 'C': 'C', 'U': 'U',
+    'RA': 'A', 'RU': 'U', 'RG': 'G', 'RC': 'C',
+}
 
 
 def sort_files_by_extension(extension):
@@ -93,10 +106,20 @@ def recursive_finder(pattern, root=os.curdir):
             yield os.path.join(path, filename)
 
 
-def clean():
+@timing.timed('clean')
+def clean(lis_root=None):
     """
     Clean curves+ output files not needed for analyses
+
+    Args:
+        lis_root: only clean the files of the curves+ run writing this .lis
+                  root (all the files found under the current dir if None)
     """
+    if lis_root is not None:
+        for suffix in ['.cda', '_B.pdb', '_X.pdb']:
+            if os.path.exists(lis_root + suffix):
+                os.remove(lis_root + suffix)
+        return
     extensions = ['*.cda', '*_B.pdb', '*_X.pdb']
     trash = [recursive_finder(x) for x in extensions]
     [os.remove(y) for x in trash for y in x]
@@ -114,6 +137,66 @@ def get_numbering_default(n_bases):
     return numbering
 
 
+def get_strand_residues(strands):
+    """
+    Get the residue numbers of the ranges of a curves+ strands block
+
+    Args:
+        strands: lines of the curves+ strands block
+
+    Returns:
+        the set of residue numbers of all the strands
+    """
+    residues = set()
+    for line in strands.splitlines()[1:]:
+        for init, end in re.findall(r'(-?\d+)\s*:\s*(-?\d+)', line):
+            init, end = sorted([int(init), int(end)])
+            residues.update(range(init, end + 1))
+    return residues
+
+
+class StrandSelection:
+    """
+    Atoms of an mdtraj selection that curves+ needs for a strands block: the
+    heavy atoms (optionally with hydrogens) of the residues of the strands,
+    leaving out proteins and waters that share their residue numbers
+    """
+
+    def __init__(self, selection, strands, keep_hydrogens=False):
+        self.selection = selection
+        self.residues = get_strand_residues(strands)
+        self.keep_hydrogens = keep_hydrogens
+        if not self.residues:
+            raise ValueError('No residue range found in the strands block')
+
+    def __str__(self):
+        return f'{self.selection} (trimmed to the strands)'
+
+    def __call__(self, topology):
+        """
+        Select the atoms of a topology
+
+        Args:
+            topology: mdtraj topology
+
+        Returns:
+            the list of selected atom indices
+        """
+        selected = set(topology.select(self.selection).tolist())
+        atoms = []
+        for atom in topology.atoms:
+            residue = atom.residue
+            if (atom.index not in selected
+                    or residue.resSeq not in self.residues
+                    or residue.is_protein or residue.is_water):
+                continue
+            if (not self.keep_hydrogens and atom.element is not None
+                    and atom.element.symbol == 'H'):
+                continue
+            atoms.append(atom.index)
+        return atoms
+
+
 class CurvesWrapper:
     """
     Wrapper for curves+ related operations
@@ -123,34 +206,54 @@ class CurvesWrapper:
         self.exe_path = exe_path
         self.lib_path = lib_path
 
-    def run(self, pdb_path, lis_path, strands_lines):
+    def get_input(self, pdb_path, lis_path, strands_lines):
         """
-        Run curves+ on a given pdb file
+        Get the namelist and strands block that curves+ reads from stdin
 
         Args:
             pdb_path: path to input pdb
-            lis_path: pah to output .lis
-            n_bases: number of bases
-        """
-        # todo: generalize
+            lis_path: path to output .lis (without extension)
+            strands_lines: lines of the curves+ strands block
 
-        command = f"""{self.exe_path} <<!
-        &inp file={pdb_path}, lis={lis_path},
+        Returns:
+            the text to send to curves+
+        """
+        return f"""        &inp file={pdb_path}, lis={lis_path},
         lib={self.lib_path}, &end
         {strands_lines}
-        !"""
-        subprocess.run(command, shell=True)
-        clean()
+        !
+"""
 
+    def run(self, pdb_path, lis_path, strands_lines, timeout=None):
+        """
+        Run curves+ on a given pdb file
+
+        Args:
+            pdb_path: path to input pdb
+            lis_path: pah to output .lis
+            strands_lines: lines of the curves+ strands block
+            timeout: seconds after which curves+ is killed (None to wait)
+
+        Returns:
+            the return code of curves+
+        """
+        curves_input = self.get_input(pdb_path, lis_path, strands_lines)
+        with timing.stage('curves_run'), timing.children('curves_run'):
+            process = subprocess.run([self.exe_path], input=curves_input,
+                                     text=True, timeout=timeout)
+        clean(lis_path)
+        return process.returncode
 
-def slice_traj(topo, traj, selection, init=0, stride=1):
+
+def slice_traj(topo, traj, selection, init=0, stride=1, chunk_size=100):
     """
     Slice a big trajectory into chunks to avoid RAM depletion
 
     Args:
         topo: path to the topology
         traj: path to the trajectory
-        selection: mdtraj's atom selection
+        selection: mdtraj's atom selection (or a callable returning the atom
+                   indices of a topology, e.g. a StrandSelection)
         chunk_size: number of frames included in each chunk
         init: first frame to consider
         stride: stride
@@ -158,15 +261,171 @@ def slice_traj(topo, traj, selection, init=0, stride=1):
     Returns:
         Yields a sliced trajectory
     """
+    import mdtraj as md
+
     ref_frame = next(md.iterload(traj, 1, top=topo))
-    sele = ref_frame.topology.select(selection)
+    if callable(selection):
+        sele = selection(ref_frame.topology)
+    else:
+        sele = ref_frame.topology.select(selection)
+    if len(sele) == 0:
+        raise ValueError(f'The selection "{selection}" matches no atom')
     iter_traj = md.iterload(traj, top=topo, skip=init,
-                            stride=stride)
+                            stride=stride, chunk=chunk_size)
 
     for chunk_traj in iter_traj:
         yield chunk_traj.restrict_atoms(sele)
 
 
+def iter_chunks(topo, traj, selection, first=0, last=-1, stride=1,
+                chunk_size=100):
+    """
+    Iterate over the chunks of a trajectory from first to last with stride
+
+    Args:
+        topo: path to the topology
+        traj: path to the trajectory
+        selection: mdtraj's atom selection
+        first: first frame to consider
+        last: last frame to consider (-1 means until the end)
+        stride: stride
+        chunk_size: number of frames loaded at once
+
+    Returns:
+        Yields tuples of (list of frame numbers, chunk trajectory)
+    """
+    current_frame = first
+    sliced_trajs = slice_traj(topo, traj, selection, init=first, stride=stride,
+                              chunk_size=chunk_size)
+    for sub_traj in timing.timed_iter(sliced_trajs, 'slice_traj'):
+        numbers = list(range(current_frame,
+                             current_frame + stride * sub_traj.n_frames,
+                             stride))
+        current_frame += stride * sub_traj.n_frames
+
+        # Stop iterating once frames go beyond last
+        if last != -1:
+            numbers = [x for x in numbers if x <= last]
+            if len(numbers) < sub_traj.n_frames:
+                sub_traj = sub_traj[:len(numbers)]
+        if numbers:
+            yield numbers, sub_traj
+        if last != -1 and current_frame > last:
+            return
+
+
+def iter_frames(topo, traj, selection, first=0, last=-1, stride=1):
+    """
+    Iterate over the frames of a trajectory from first to last with stride
+
+    Args:
+        topo: path to the topology
+        traj: path to the trajectory
+        selection: mdtraj's atom selection
+        first: first frame to consider
+        last: last frame to consider (-1 means until the end)
+        stride: stride
+
+    Returns:
+        Yields tuples of (frame number, single-frame trajectory)
+    """
+    for numbers, chunk in iter_chunks(topo, traj, selection, first=first,
+                                      last=last, stride=stride):
+        for frame_number, frame in zip(numbers, chunk):
+            yield frame_number, frame
+
+
+def round_robin(iterables):
+    """
+    Alternate the items of several iterables until all are exhausted
+
+    Args:
+        iterables: list of iterables
+
+    Returns:
+        Yields the items of the iterables taking one of each in turn
+    """
+    iterators = deque(iter(x) for x in iterables)
+    while iterators:
+        iterator = iterators.popleft()
+        try:
+            item = next(iterator)
+        except StopIteration:
+            continue
+        iterators.append(iterator)
+        yield item
+
+
+def iter_indexed_chunks(topo, trajs, selection, first=0, last=-1, stride=1,
+                        labels=None, interleave=False, ranges=None,
+                        chunk_size=100):
+    """
+    Iterate over the chunks of several trajectories with a run-wide index
+
+    Args:
+        topo: path to the topology
+        trajs: list of paths to the trajectories
+        selection: mdtraj's atom selection
+        first: first frame to consider
+        last: last frame to consider (-1 means until the end)
+        stride: stride
+        labels: dict filled with index: (trajectory, frame number)
+        interleave: alternate the chunks of the trajectories so that replicas
+                    are processed concurrently instead of one after another
+        ranges: dict of trajectory: (first, last) overriding first and last
+                for some trajectories (e.g. the frames of a shard)
+        chunk_size: number of frames loaded at once from each trajectory
+
+    Returns:
+        Yields tuples of (list of 1-based indices, chunk trajectory)
+    """
+    ranges = ranges or {}
+
+    def read(traj):
+        traj_first, traj_last = ranges.get(traj, (first, last))
+        for numbers, chunk in iter_chunks(topo, traj, selection,
+                                          first=traj_first, last=traj_last,
+                                          stride=stride,
+                                          chunk_size=chunk_size):
+            yield traj, numbers, chunk
+
+    readers = [read(traj) for traj in trajs]
+    tagged = round_robin(readers) if interleave else chain(*readers)
+
+    index = 0
+    for traj, numbers, chunk in tagged:
+        indices = list(range(index + 1, index + 1 + len(numbers)))
+        index += len(numbers)
+        if labels is not None:
+            labels.update({x: (traj, y) for x, y in zip(indices, numbers)})
+        yield indices, chunk
+
+
+def count_frames(traj, first=0, last=-1, stride=1):
+    """
+    Count the frames of a trajectory that will be processed
+
+    Args:
+        traj: path to the trajectory
+        first: first frame to consider
+        last: last frame to consider (-1 means until the end)
+        stride: stride
+
+    Returns:
+        the number of frames to process, or None if the format does not
+        expose its length without decoding
+    """
+    import mdtraj as md
+
+    try:
+        with md.open(traj) as traj_file:
+            n_frames = len(traj_file)
+    except (TypeError, NotImplementedError, OSError, ValueError):
+        return None
+    stop = n_frames if last == -1 else min(last + 1, n_frames)
+    return len(range(first, stop, stride))
+
+
 def generic_matplotlib(width):
     """
     Set generic values for matplotlib's globals
@@ -174,6 +433,8 @@ def generic_matplotlib(width):
     Args:
         width: tuple of fig size
     """
+    import matplotlib.pyplot as plt
+
     plt.rcParams['figure.dpi'] = 600
     plt.rcParams['figure.figsize'] = width
     plt.rcParams["font.family"] = "Monospace"
@@ -187,6 +448,8 @@ def reset_matplotlib():
     Returns:
 
     """
+    import matplotlib as mpl
+
     mpl.rcParams.update(mpl.rcParamsDefault)
 
 
@@ -200,6 +463,8 @@ def load_raw_df(df_path):
     Returns:
         parsed raw dataframe
     """
+    import pandas as pd
+
     df_raw = pd.read_table(df_path, header=0, sep='\s+')
     return df_raw
 
@@ -231,6 +496,7 @@ def unpickle_from_file(file_name):
     return data
 
 
+@timing.timed('save_mdtraj')
 def save_mdtraj(parsed, final_name):
     """
     Save a mdtraj object to a pdb file
@@ -249,7 +515,7 @@ def save_mdtraj(parsed, final_name):
         parsed.save(final_name)
 
 
-def process_frame(frame, index, curves_man, args):
+def process_frame(frame, index, curves_man, strands):
     """
     Process a frame using curves+
 
@@ -257,11 +523,11 @@ def process_frame(frame, index, curves_man, args):
         frame: mdtraj frame
         index: index of the frame
         curves_man: CurvesWrapper object
-        args: courbes+ arguments
+        strands: lines of the curves+ strands block
     """
     pdb_name = f'tmp_{index}.pdb'
     save_mdtraj(frame, pdb_name)
-    curves_man.run(pdb_name, f'tmp_{index}', args.strands)
+    curves_man.run(pdb_name, f'tmp_{index}', strands)
     os.remove(pdb_name)
 
 # =============================================================================
@@ -4,6 +4,12 @@ import os
 
 import courbes.commons as cmn
 
+# Sections of the curves+ report, as named by their output directories
+section_names = ['axis', 'intra', 'inter', 'backbone', 'groove', 'curvature']
+
+# Sections reported by default (the curvature of the helical axis is opt-in)
+default_sections = section_names[:5]
+
 
 class Config:
     """
@@ -20,12 +26,21 @@ class Config:
         self.output_dir = None
         self.trajs = None
         self.selection = None
-        # self.chunk_size = None
+        self.chunk_size = None
         self.stride = None
         self.topology = None
         self.first = None
         self.plot_stats = None
         self.plot_diff = None
+        self.profile = None
+        self.n_workers = None
+        self.timeout = None
+        self.retries = None
+        self.n_writers = None
+        self.trim_selection = None
+        self.keep_hydrogens = None
+        self.sections = None
+        self.native = None
         self.parse()
 
     def read_config_file(self):
@@ -42,6 +57,49 @@ class Config:
         config_obj.read(self.config_raw)
         return config_obj
 
+    def get_auto_int(self, section, option, fallback):
+        """
+        Get an integer option that can also be set to `auto`
+
+        Args:
+            section: section of the config file
+            option: name of the option
+            fallback: value if the option is missing
+
+        Returns:
+            the integer value, or None if it must be tuned automatically
+        """
+        raw = self.config.get(section, option, fallback=str(fallback))
+        if raw.strip().lower() == 'auto':
+            return None
+        return self.config.getint(section, option, fallback=fallback)
+
+    def get_sections(self, option, fallback):
+        """
+        Get a comma-separated list of curves+ sections
+
+        Args:
+            option: name of the option of the [general] section
+            fallback: value if the option is missing
+
+        Returns:
+            the list of section names
+        """
+        raw = self.config.get('general', option, fallback=fallback)
+        sections = [x.strip() for x in raw.split(',') if x.strip()]
+        unknown = [x for x in sections if x not in section_names]
+        if unknown:
+            raise ValueError(f'Unknown sections {unknown} in {option}.'
+                             f' Available ones are {section_names}')
+        return sections
+
+    @property
+    def curves_sections(self):
+        """
+        Sections of the report that need curves+ (i.e. not native)
+        """
+        return [x for x in self.sections if x not in self.native]
+
     def parse(self):
         """
         Parse the config file
@@ -53,13 +111,26 @@ class Config:
         plot_diff = self.config.get('general', 'plot_diff')
         if plot_diff != 'False':
             self.plot_diff = cmn.check_path(plot_diff)
+        self.profile = self.config.getboolean('general', 'profile',
+                                              fallback=False)
+        self.sections = self.get_sections('sections',
+                                          ', '.join(default_sections))
+        curvature = self.config.getboolean('general', 'curvature',
+                                           fallback=False)
+        if curvature and 'curvature' not in self.sections:
+            self.sections.append('curvature')
+        self.native = self.get_sections('native', '')
 
         # [trajectory]
         self.first = self.config.getint('trajectory', 'first')
         self.stride = self.config.getint('trajectory', 'stride')
-        # self.chunk_size = self.config.getint('trajectory', 'chunk_size')
+        self.chunk_size = self.get_auto_int('trajectory', 'chunk_size', 100)
         self.last = self.config.getint('trajectory', 'last')
         self.selection = self.config.get('trajectory', 'selection')
+        self.trim_selection = self.config.getboolean(
+            'trajectory', 'trim_selection', fallback=False)
+        self.keep_hydrogens = self.config.getboolean(
+            'trajectory', 'keep_hydrogens', fallback=False)
         topology = self.config.get('trajectory', 'topology')
         self.topology = cmn.check_path(topology)
         trajs_raw = self.config.get('trajectory', 'trajectory').split(',')
@@ -69,7 +140,14 @@ class Config:
         curves_path = self.config.get('curves', 'curves_exe')
         self.curves_exe = cmn.check_path(curves_path)
         self.lib_path = self.config.get('curves', 'lib_path')
+        self.n_workers = self.get_auto_int('curves', 'n_workers', 1)
+        self.timeout = self.config.getfloat('curves', 'timeout', fallback=0)
+        self.retries = self.config.getint('curves', 'retries', fallback=0)
+        self.n_writers = self.config.getint('curves', 'n_writers', fallback=0)
         self.strands = '\n'.join(self.config['strands'])
+        if self.trim_selection:
+            self.selection = cmn.StrandSelection(self.selection, self.strands,
+                                                 self.keep_hydrogens)
         # self.n_bases = self.config.getint('curves', 'n_bases')
 
 # =============================================================================
@@ -0,0 +1,337 @@
+# Created by roy.gonzalez-aleman at 19/10/2026
+"""
+Running convergence of the mean descriptors over the frames of a run
+
+The cumulative mean and SEM of every descriptor and base pair, and those of a
+moving window of the last frames, are reported at a set of frame counts. The
+sums of the frames between consecutive frame counts are accumulated in a
+single pass, and the SEM comes from the means of blocks of consecutive frames
+so that it accounts for their autocorrelation.
+"""
+import os
+import warnings
+
+import numpy as np
+import pandas as pd
+
+from courbes import commons as cmn
+from courbes.bootstrap import get_block_size
+from courbes.config import section_names
+from courbes.stats import (circular_stats, is_angular_name, replica_bounds,
+                           wrapped_difference)
+
+# Number of frame counts (geometrically spaced) at which the running
+# statistics are reported
+n_points = 100
+
+# Default number of windows spanning the run (sets the window length)
+n_windows = 10
+
+# Drift of the mean from half the frames to all of them, in final SEMs, above
+# which a base pair is drifting, and fraction of drifting base pairs above
+# which a descriptor is reported as not converged (about 5% of the base pairs
+# of converged descriptors drift by chance)
+drift_tolerance = 2.0
+drifting_fraction = 0.1
+
+# Running statistics of each descriptor, as (frame counts, bp) arrays
+running_fields = ['mean', 'sem', 'window_mean', 'window_sem']
+
+
+def get_points(n_frames, n_points=n_points):
+    """
+    Get the frame counts at which the running statistics are reported
+
+    Args:
+        n_frames: number of frames of the run
+        n_points: maximum number of frame counts
+
+    Returns:
+        sorted unique frame counts from 1 to n_frames, geometrically spaced
+    """
+    points = np.geomspace(1, n_frames, max(n_points, 1)).round().astype(int)
+    return np.unique(np.append(points, n_frames))
+
+
+def prefix_sums(values, ends):
+    """
+    Get the sums of the first frames of time series at several frame counts
+
+    Args:
+        values: (frames, columns) array
+        ends: sorted unique frame counts (greater than 0)
+
+    Returns:
+        a (ends, columns) array of the sums of the values[:end]
+    """
+    starts = np.concatenate([[0], ends[:-1]])
+    return np.cumsum(np.add.reduceat(values[:ends[-1]], starts, axis=0),
+                     axis=0)
+
+
+def running_stats(values, angular=False, n_points=n_points, window=None,
+                  block_size=None, starts=None):
+    """
+    Get the cumulative and windowed means and SEM of time series
+
+    Args:
+        values: (frames, columns) array (NaN values are left out)
+        angular: whether the values are angles in degrees
+        n_points: maximum number of frame counts reported
+        window: frames of the moving window (n_frames // n_windows if None)
+        block_size: frames per block of the SEM (from the autocorrelation if
+                    None)
+        starts: first frame of each pooled replica (a single replica if
+                None). Blocks do not straddle replicas
+
+    Returns:
+        a dict with the frame counts (`n_frames`), the (frame counts, columns)
+        arrays of running_fields, and the `window` and `block_size` used.
+        Windowed statistics are NaN until the window is full, and SEM until
+        two blocks are
+    """
+    values = np.asarray(values, dtype=float)
+    n_frames = values.shape[0]
+    if n_frames < 1:
+        raise ValueError('There are no frames to analyze')
+    window = min(max(int(window or n_frames // n_windows), 1), n_frames)
+    if block_size is None:
+        block_size = get_block_size(values, starts)
+    block_size = min(max(int(block_size), 1), n_frames)
+
+    with warnings.catch_warnings():
+        # Base pairs without values are expected
+        warnings.simplefilter('ignore', RuntimeWarning)
+        # Deviations from the overall mean keep the sums well conditioned
+        if angular:
+            center = circular_stats(values)['mean']
+            deviations = wrapped_difference(values, center)
+        else:
+            center = np.nanmean(values, axis=0)
+            deviations = values - center
+    valid = ~np.isnan(deviations)
+    deviations = np.where(valid, deviations, 0)
+
+    # Sums of the frames up to each frame count and each window start
+    points = get_points(n_frames, n_points)
+    window_starts = points - window
+    ends = np.union1d(points, window_starts[window_starts > 0])
+    sums = np.concatenate([np.zeros((1, values.shape[1])),
+                           prefix_sums(deviations, ends)])
+    counts = np.concatenate([np.zeros((1, values.shape[1])),
+                             prefix_sums(valid.astype(float), ends)])
+    ends = np.concatenate([[0], ends])
+    at_point = np.searchsorted(ends, points)
+    at_start = np.searchsorted(ends, np.maximum(window_starts, 0))
+
+    # Sums of the means of the blocks completed at each frame count. Blocks
+    # start at the first frame of each replica
+    block_starts = np.concatenate(
+        [np.arange(x, y - block_size + 1, block_size, dtype=int)
+         for x, y in replica_bounds(n_frames, starts)])
+    block_ends = block_starts + block_size
+    zeros = np.zeros((1, values.shape[1]))
+    frame_sums = np.concatenate([zeros, np.cumsum(deviations, axis=0)])
+    frame_counts = np.concatenate([zeros, np.cumsum(valid, axis=0)])
+    block_counts = frame_counts[block_ends] - frame_counts[block_starts]
+    with np.errstate(invalid='ignore', divide='ignore'):
+        block_means = ((frame_sums[block_ends] - frame_sums[block_starts])
+                       / block_counts)
+    block_valid = ~np.isnan(block_means)
+    block_means = np.where(block_valid, block_means, 0)
+    block_sums = [np.concatenate([zeros, np.cumsum(x, axis=0)])
+                  for x in (block_valid, block_means, block_means ** 2)]
+    last_block = np.searchsorted(block_ends, points, side='right')
+    first_block = np.minimum(
+        np.searchsorted(block_starts, np.maximum(window_starts, 0)),
+        last_block)
+
+    def sem_between(first, last):
+        n, s1, s2 = (x[last] - x[first] for x in block_sums)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            variance = np.maximum(s2 - s1 ** 2 / n, 0) / (n - 1)
+            return np.where(n >= 2, np.sqrt(variance / n), np.nan)
+
+    in_window = (window_starts >= 0)[:, None]
+    with np.errstate(invalid='ignore', divide='ignore'):
+        mean = center + sums[at_point] / counts[at_point]
+        window_mean = center + ((sums[at_point] - sums[at_start])
+                                / (counts[at_point] - counts[at_start]))
+    return {
+        'n_frames': points,
+        'mean': mean,
+        'sem': sem_between(np.zeros_like(last_block), last_block),
+        'window_mean': np.where(in_window, window_mean, np.nan),
+        'window_sem': np.where(in_window,
+                               sem_between(first_block, last_block), np.nan),
+        'window': window,
+        'block_size': block_size,
+    }
+
+
+def iter_report(root_dir):
+    """
+    Iterate over the descriptors written in a courbes+ report
+
+    Args:
+        root_dir: directory with one sub-directory per section
+
+    Yields:
+        tuples (name as section/file stem, dataframe of frames x bp). Labels
+        (e.g. sugar puckers) are left out
+    """
+    for section_dir in section_names:
+        out_dir = os.path.join(root_dir, section_dir)
+        if not os.path.isdir(out_dir):
+            continue
+        for file_name in sorted(os.listdir(out_dir)):
+            stem, extension = os.path.splitext(file_name)
+            if extension != '.txt' or stem.endswith('_stats'):
+                continue
+            df = cmn.load_raw_df(os.path.join(out_dir, file_name))
+            try:
+                df = df.astype(float)
+            except (ValueError, TypeError):
+                continue
+            yield f'{section_dir}/{stem}', df
+
+
+def get_replica_starts(replica_dirs):
+    """
+    Get the first frame of each replica in a pooled courbes+ report
+
+    Args:
+        replica_dirs: directories of the reports of the replicas, in the
+                      order in which they are pooled
+
+    Returns:
+        the array of positions where a replica starts
+    """
+    lengths = []
+    for replica_dir in replica_dirs:
+        _, df = next(iter_report(replica_dir), (None, []))
+        lengths.append(len(df))
+    return np.cumsum([0] + lengths[:-1])
+
+
+def report_convergence(root_dir, n_points=n_points, window=None,
+                       starts=None):
+    """
+    Get the running statistics of every descriptor of a courbes+ report
+
+    Args:
+        root_dir: directory with one sub-directory per section
+        n_points: maximum number of frame counts reported
+        window: frames of the moving window (n_frames // n_windows if None)
+        starts: first frame of each replica pooled in the report (a single
+                replica if None)
+
+    Returns:
+        a dict of section/file stem: dict returned by running_stats, with the
+        base pairs of the columns as `bp_index`
+    """
+    results = {}
+    for name, df in iter_report(root_dir):
+        if df.empty:
+            continue
+        # Names are prefixed by their section (e.g. backbone/Strand_1_Alpha)
+        angular = is_angular_name(name.split('/')[-1].strip())
+        running = running_stats(df.to_numpy(), angular, n_points, window,
+                                starts=starts)
+        running['bp_index'] = df.columns.to_numpy(dtype=float)
+        results[name] = running
+    if not results:
+        raise ValueError(f'No descriptors found in {root_dir}')
+    return results
+
+
+def write_convergence(out_path, results):
+    """
+    Write the running statistics of several descriptors as a .npz file
+
+    Args:
+        out_path: path to the output .npz
+        results: dict of name: dict returned by running_stats (with bp_index)
+
+    Returns:
+        out_path
+    """
+    names = list(results)
+    arrays = {'names': np.asarray(names, dtype=str)}
+    for i, name in enumerate(names):
+        running = results[name]
+        arrays[f'd{i}_n_frames'] = running['n_frames']
+        arrays[f'd{i}_bp_index'] = running['bp_index']
+        arrays[f'd{i}_window'] = running['window']
+        arrays[f'd{i}_block_size'] = running['block_size']
+        # Single precision is enough to follow the convergence
+        for field in running_fields:
+            arrays[f'd{i}_{field}'] = running[field].astype(np.float32)
+    np.savez_compressed(out_path, **arrays)
+    return out_path
+
+
+def read_convergence(in_path):
+    """
+    Read the running statistics written by write_convergence
+
+    Args:
+        in_path: path to the .npz file
+
+    Returns:
+        a dict of name: dict of the running statistics
+    """
+    with np.load(in_path) as arrays:
+        results = {}
+        for i, name in enumerate(arrays['names'].tolist()):
+            fields = ['n_frames', 'bp_index', 'window', 'block_size']
+            running = {x: arrays[f'd{i}_{x}'] for x in fields + running_fields}
+            running['window'] = int(running['window'])
+            running['block_size'] = int(running['block_size'])
+            results[name] = running
+    return results
+
+
+def summarize(results, tolerance=drift_tolerance,
+              fraction=drifting_fraction):
+    """
+    Summarize the convergence of every descriptor
+
+    Args:
+        results: dict of name: dict returned by running_stats
+        tolerance: drift (in final SEMs) above which a base pair is drifting
+        fraction: fraction of drifting base pairs above which a descriptor is
+                  not converged
+
+    Returns:
+        a dataframe with one row per descriptor: frames, window and block
+        lengths, median final SEM over the base pairs, median and largest
+        drift of their mean between half the frames and all of them (in
+        final SEMs), and fraction of drifting base pairs
+    """
+    rows = []
+    for name, running in results.items():
+        angular = is_angular_name(name.split('/')[-1].strip())
+        frames = running['n_frames']
+        half = max(np.searchsorted(frames, frames[-1] // 2, side='right') - 1,
+                   0)
+        shift = running['mean'][-1] - running['mean'][half]
+        if angular:
+            shift = wrapped_difference(shift, 0)
+        with warnings.catch_warnings():
+            # Base pairs without values (or SEM) are expected
+            warnings.simplefilter('ignore', RuntimeWarning)
+            sem = running['sem'][-1]
+            drift = np.abs(shift) / sem
+            measured = ~np.isnan(drift)
+            rows.append({
+                'descriptor': name.strip(), 'n_frames': int(frames[-1]),
+                'window': running['window'],
+                'block_size': running['block_size'],
+                'sem': np.nanmedian(sem), 'drift': np.nanmedian(drift),
+                'max_drift': np.nanmax(drift),
+                'drifting': np.mean(drift[measured] > tolerance)
+                if measured.any() else np.nan})
+    summary = pd.DataFrame(rows)
+    summary['converged'] = ~(summary['drifting'] > fraction)
+    return summary
@@ -0,0 +1,147 @@
+# Created by roy.gonzalez-aleman at 19/10/2026
+"""
+Curvature and bending profiles of the helical axis computed by curves+
+
+The helical axis written by curves+ (_X.pdb) is read right after each run,
+reduced to one point per base-pair level and kept as a small array, so the
+file itself can be cleaned as usual. The profiles of all the frames are then
+computed at once from the stacked points.
+"""
+import warnings
+
+import numpy as np
+import pandas as pd
+
+from courbes import timing
+
+# Descriptors of the curvature section, per base-pair level:
+#   Bend: local bending angle between the axis steps around the level (deg)
+#   Curv: local bending angle per Angstrom of axis (deg/A)
+#   TBend: bending angle between the axis at the first level and here (deg)
+#   Dist: distance between the axis points of the first level and here (A)
+#   Contour: length of the axis between the first level and here (A)
+# The values of the last level give the global bend, end-to-end distance and
+# contour length of the duplex
+curvature_descriptors = ['Bend', 'Curv', 'TBend', 'Dist', 'Contour']
+
+
+@timing.timed('read_axis')
+def read_axis(axis_path):
+    """
+    Read the helical axis of a frame from a curves+ _X.pdb file
+
+    Args:
+        axis_path: path to the _X.pdb file
+
+    Returns:
+        a tuple (level numbers, (n_levels, 3) float32 coordinates of the first
+        axis point of each level), or None if the file is missing or empty
+    """
+    try:
+        with open(axis_path, 'rt') as axis_file:
+            records = [x for x in axis_file if x.startswith(('ATOM', 'HETATM'))]
+    except OSError:
+        return None
+    if not records:
+        return None
+
+    # Curves+ numbers the axis points by level, with intermediate points
+    levels = np.asarray([int(x[22:26]) for x in records])
+    coords = np.asarray([(x[30:38], x[38:46], x[46:54]) for x in records],
+                        dtype=np.float32)
+    numbers, first = np.unique(levels, return_index=True)
+    return numbers, coords[first]
+
+
+def stack_axes(axes, order):
+    """
+    Stack the axis points of some frames
+
+    Args:
+        axes: dict of run-wide index: value returned by read_axis (or None)
+        order: run-wide indices of the frames, in order
+
+    Returns:
+        a tuple (level numbers, (frames, levels, 3) coordinates with NaN for
+        the frames without axis)
+    """
+    read = [axes.get(x) for x in order]
+    available = [x for x in read if x is not None]
+    if not available:
+        raise ValueError('No helical axis was read from curves+')
+    levels = available[0][0]
+    points = np.full((len(order), levels.size, 3), np.nan, dtype=np.float32)
+    for i, frame in enumerate(read):
+        if frame is not None and np.array_equal(frame[0], levels):
+            points[i] = frame[1]
+    return levels, points
+
+
+def angles_between(a, b):
+    """
+    Get the angles between two arrays of vectors along their last axis
+
+    Returns:
+        the angles in degrees
+    """
+    cosines = np.sum(a * b, axis=-1) / (np.linalg.norm(a, axis=-1)
+                                        * np.linalg.norm(b, axis=-1))
+    return np.degrees(np.arccos(np.clip(cosines, -1, 1)))
+
+
+def get_profiles(points):
+    """
+    Get the curvature profiles of the helical axis of several frames
+
+    Args:
+        points: (frames, levels, 3) axis points of each base-pair level
+
+    Returns:
+        a dict of descriptor: (frames, levels) array
+    """
+    points = np.asarray(points, dtype=float)
+    n_frames, n_levels, _ = points.shape
+    steps = np.diff(points, axis=1)
+    lengths = np.linalg.norm(steps, axis=-1)
+    profiles = {x: np.full((n_frames, n_levels), np.nan)
+                for x in curvature_descriptors}
+
+    with warnings.catch_warnings():
+        # Frames without axis (or degenerate steps) are NaN
+        warnings.simplefilter('ignore', RuntimeWarning)
+        if n_levels > 2:
+            bends = angles_between(steps[:, :-1], steps[:, 1:])
+            profiles['Bend'][:, 1:-1] = bends
+            arcs = (lengths[:, :-1] + lengths[:, 1:]) / 2
+            profiles['Curv'][:, 1:-1] = bends / arcs
+        if n_levels > 1:
+            # The direction of the axis at each level is that of the step
+            # ending there (the first step for the first level)
+            directions = np.concatenate([steps[:, :1], steps], axis=1)
+            profiles['TBend'] = angles_between(directions[:, :1], directions)
+        profiles['Dist'] = np.linalg.norm(points - points[:, :1], axis=-1)
+        profiles['Contour'] = np.concatenate(
+            [np.zeros((n_frames, 1)), np.cumsum(lengths, axis=1)], axis=1)
+        profiles['Contour'][np.isnan(points[:, :, 0])] = np.nan
+    return profiles
+
+
+def update(lis_parsed, axes, order):
+    """
+    Set the curvature section of a parser from the axes read for each frame
+
+    Args:
+        lis_parsed: CourbesParserMulti (or NativeParser)
+        axes: dict of run-wide index: value returned by read_axis (or None)
+        order: run-wide indices of the parsed frames, in order
+    """
+    levels, points = stack_axes(axes, order)
+    profiles = get_profiles(points)
+    lis_parsed.descriptors_curvatures = {
+        x: pd.DataFrame(y.T, index=levels) for x, y in profiles.items()}
+
+    # Levels are labelled as the base pairs of the axis section
+    ids = lis_parsed.ids_bp_axes
+    if ids is None or len(ids) != levels.size:
+        ids = [''] * levels.size
+    lis_parsed.ids_curvatures = list(ids)
@@ -0,0 +1,261 @@
+# Created by roy.gonzalez-aleman at 19/10/2026
+"""
+Cost estimation of a courbes+ run from a small sample of frames (dry-run)
+"""
+import json
+import os
+import tempfile
+import time
+import tracemalloc
+
+import courbes.commons as cmn
+from courbes import timing, tuning
+
+# Name of the estimation report written to the work dir
+estimate_name = 'estimate.json'
+
+# Files left by curves+ next to each .lis (removed after every run)
+side_suffixes = ['.cda', '_B.pdb', '_X.pdb']
+
+
+def get_size_mb(path):
+    """
+    Get the size of a file, or of all the files under a directory
+
+    Args:
+        path: path to a file or directory
+
+    Returns:
+        the size in MB (0 if the path does not exist)
+    """
+    if os.path.isfile(path):
+        return os.path.getsize(path) / 1024 ** 2
+    total = 0
+    for root, _, files in os.walk(path):
+        total += sum(os.path.getsize(os.path.join(root, x)) for x in files)
+    return total / 1024 ** 2
+
+
+def run_sample(chunk, curves_man, strands, scratch, timeout=None,
+               n_writers=0):
+    """
+    Run the frames of a chunk through the curves+ scheduler, as a run would
+    process them, measuring the time and the size of the files of each step
+
+    Args:
+        chunk: mdtraj chunk
+        curves_man: CurvesWrapper object
+        strands: lines of the curves+ strands block
+        scratch: directory where the frames are processed
+        timeout: seconds after which a curves+ run is killed (None to wait)
+        n_writers: number of processes writing PDBs (0 for the main thread)
+
+    Returns:
+        a tuple (list of .lis paths, list of dicts of per-frame measures of
+        the frames that succeeded, number of failed frames)
+    """
+    from courbes import scheduler
+
+    curves_scheduler, _ = scheduler.sample_frames(
+        chunk, curves_man, strands, scratch, timeout, n_writers,
+        keep_files=True)
+    lis_paths = []
+    records = []
+    for index, lis_path in sorted(curves_scheduler.lis_paths.items()):
+        lis_root = os.path.join(scratch, f'tmp_{index}')
+        pdb_path = f'{lis_root}.pdb'
+        if lis_path is not None:
+            lis_paths.append(lis_path)
+            records.append({
+                **curves_scheduler.durations[index],
+                'pdb_mb': get_size_mb(pdb_path),
+                'lis_mb': get_size_mb(lis_path),
+                'side_mb': sum(get_size_mb(lis_root + x)
+                               for x in side_suffixes),
+            })
+        cmn.clean(lis_root)
+        if os.path.exists(pdb_path):
+            os.remove(pdb_path)
+    return lis_paths, records, len(curves_scheduler.failed)
+
+
+def measure(args, ranges, work_dir, n_samples=5):
+    """
+    Measure the cost of a sample of frames of a configuration
+
+    Args:
+        args: parsed configuration (config.Config)
+        ranges: list of (trajectory, first frame, last frame) to process
+        work_dir: directory where the frames are processed
+        n_samples: number of frames to sample
+
+    Returns:
+        a dict of per-frame costs of every stage
+    """
+    from courbes import analysis
+
+    traj, first, _ = ranges[0]
+    chunk, frame_mb = tuning.measure_chunk(args.topology, traj,
+                                           args.selection, first=first,
+                                           stride=args.stride,
+                                           n_frames=n_samples)
+    curves_man = cmn.CurvesWrapper(args.curves_exe, args.lib_path)
+    with tempfile.TemporaryDirectory(dir=work_dir) as scratch:
+        lis_paths, records, n_failed = run_sample(
+            chunk, curves_man, args.strands, scratch, args.timeout,
+            args.n_writers)
+
+        # Parsing and writing of the report of the sample
+        tracing = tracemalloc.is_tracing()
+        if not tracing:
+            tracemalloc.start()
+        tracemalloc.reset_peak()
+        base = tracemalloc.get_traced_memory()[0]
+        start = time.perf_counter()
+        lis_parsed = analysis.parse_lis(lis_paths)
+        parsed = time.perf_counter()
+        parse_mb = tracemalloc.get_traced_memory()[1] - base
+        if not tracing:
+            tracemalloc.stop()
+        report_dir = os.path.join(scratch, 'report')
+        analysis.write_sections(report_dir, lis_parsed)
+        reported = time.perf_counter()
+        out_mb = get_size_mb(report_dir)
+        stats_mb = sum(get_size_mb(x) for x in
+                       cmn.recursive_finder('*_stats.txt', report_dir))
+
+    n_parsed = len(lis_paths)
+    measures = {key: sum(x[key] for x in records) / len(records)
+                for key in records[0]}
+    measures.update({
+        'sampled_frames': n_parsed + n_failed,
+        'failed_frames': n_failed,
+        'frame_mb': frame_mb,
+        'curves_rss_mb': timing.get_max_rss_mb()[1],
+        'base_rss_mb': timing.get_rss_mb(),
+        'parse_s': (parsed - start) / n_parsed,
+        'parse_mb': parse_mb / 1024 ** 2 / n_parsed,
+        'report_s': (reported - parsed) / n_parsed,
+        'report_frame_mb': (out_mb - stats_mb) / n_parsed,
+        'report_stats_mb': stats_mb,
+    })
+    return measures
+
+
+def project(measures, n_frames, n_replicas, n_workers, chunk_size,
+            n_writers=0, cores=None):
+    """
+    Project the cost of a run from the per-frame measures of a sample
+
+    Args:
+        measures: dict returned by measure
+        n_frames: number of frames to process
+        n_replicas: number of trajectories
+        n_workers: number of concurrent curves+ processes
+        chunk_size: number of frames loaded at once from each trajectory
+        n_writers: number of processes writing PDBs (0 for the main thread)
+        cores: number of usable cores (all the workers run at once if None)
+
+    Returns:
+        a dict with the projected wall time (s), scratch disk peak (MB),
+        output size (MB) and memory peak (MB)
+    """
+    # Frames go through curves+ n_workers at a time (as long as there are
+    # cores for them), unless writing their PDBs in the main thread is slower
+    per_frame = measures['curves_s'] / min(n_workers, cores or n_workers)
+    if not n_writers:
+        per_frame = max(per_frame, measures['write_s'])
+    curves_s = n_frames * per_frame
+    post_s = n_frames * (measures['parse_s'] + measures['report_s'])
+
+    # The .lis files are kept until the end of the run, while PDBs and side
+    # files only exist for the frames in flight
+    in_flight = n_workers * (measures['pdb_mb'] + measures['side_mb'])
+    scratch_mb = n_frames * measures['lis_mb'] + in_flight
+
+    # Multi-replica runs also write the report of each replica
+    copies = 2 if n_replicas > 1 else 1
+    output_mb = copies * (n_frames * measures['report_frame_mb']
+                          + measures['report_stats_mb'])
+
+    # Loaded chunks (copied when restricted to the selection) plus workers,
+    # or the parsed frames at the end of the run, on top of the interpreter
+    chunks_mb = 2 * n_replicas * chunk_size * measures['frame_mb']
+    workers_mb = n_workers * (measures['curves_rss_mb'] or 0)
+    memory_mb = (max(chunks_mb + workers_mb, n_frames * measures['parse_mb'])
+                 + (measures['base_rss_mb'] or 0))
+    return {
+        'wall_s': curves_s + post_s,
+        'curves_wall_s': curves_s,
+        'post_processing_wall_s': post_s,
+        'scratch_peak_mb': scratch_mb,
+        'output_mb': output_mb,
+        'memory_peak_mb': memory_mb,
+    }
+
+
+def format_seconds(seconds):
+    """
+    Format a duration as h:mm:ss
+    """
+    minutes, seconds = divmod(int(round(seconds)), 60)
+    hours, minutes = divmod(minutes, 60)
+    return f'{hours}:{minutes:02d}:{seconds:02d}'
+
+
+def estimate(args, ranges, work_dir, n_workers=None, n_samples=5):
+    """
+    Estimate the cost of running a configuration without running it
+
+    Args:
+        args: parsed configuration (config.Config)
+        ranges: list of (trajectory, first frame, last frame) to process
+        work_dir: directory where the frames would be processed
+        n_workers: number of curves+ processes (defaults to the config one)
+        n_samples: number of frames to sample
+
+    Returns:
+        a dict with the resolved frames, the measures and the projections
+    """
+    frames = {traj: cmn.count_frames(traj, first, last, args.stride)
+              for traj, first, last in ranges}
+    unknown = [x for x, y in frames.items() if y is None]
+    if unknown:
+        raise ValueError(f'The length of {unknown} cannot be known without'
+                         f' reading them. Please set last for a dry-run.')
+    n_frames = sum(frames.values())
+
+    measures = measure(args, ranges, work_dir, n_samples)
+    n_workers = n_workers or args.n_workers
+    chunk_size = args.chunk_size
+    cores = tuning.get_available_cores()
+    if n_workers is None or chunk_size is None:
+        auto = tuning.choose_settings(
+            cores, tuning.get_available_memory_mb(),
+            measures['write_s'], measures['curves_s'],
+            measures['curves_rss_mb'], measures['frame_mb'],
+            n_replicas=len(ranges), n_writers=args.n_writers)
+        n_workers = n_workers or auto[0]
+        chunk_size = chunk_size or auto[1]
+    projection = project(measures, n_frames, len(ranges), n_workers,
+                         chunk_size, args.n_writers, cores)
+
+    report = {'frames': frames, 'n_frames': n_frames, 'n_workers': n_workers,
+              'chunk_size': chunk_size, 'measures': measures,
+              'projection': projection}
+    with open(os.path.join(work_dir, estimate_name), 'wt') as out_file:
+        json.dump(report, out_file, indent=2)
+
+    print(f'Dry-run of {args.config_raw}:')
+    for traj, count in frames.items():
+        print(f'  {traj}: {count} frames')
+    print(f'  {n_frames} frames with {n_workers} curves+ workers'
+          f' (chunks of {chunk_size} frames)\n'
+          f'  curves+: {measures["curves_s"]:.3f} s per frame,'
+          f' pdb writing: {measures["write_s"]:.4f} s per frame'
+          f' ({measures["sampled_frames"]} frames sampled)\n'
+          f'  projected wall time: {format_seconds(projection["wall_s"])}\n'
+          f'  scratch disk peak: {projection["scratch_peak_mb"]:.1f} MB\n'
+          f'  final output size: {projection["output_mb"]:.1f} MB\n'
+          f'  memory peak: {projection["memory_peak_mb"]:.1f} MB')
+    return report
@@ -0,0 +1,872 @@
+# Created by roy.gonzalez-aleman at 19/10/2026
+"""
+Native computation of curves+ descriptors from the coordinates of a chunk
+
+The descriptors of a section are computed for all the frames of a chunk at
+once with numpy, without running curves+, and laid out as the descriptors of
+parsing.CourbesParserMulti so that they are written and analyzed the same way.
+"""
+import re
+
+import numpy as np
+import pandas as pd
+
+from courbes import timing
+from courbes.commons import puckers, residue_letters
+
+
+def get_strands(strands):
+    """
+    Get the residue numbers of each strand of a curves+ strands block
+
+    Args:
+        strands: lines of the curves+ strands block
+
+    Returns:
+        a list (one item per strand) of residue numbers in the listed order
+    """
+    residues = []
+    for line in strands.splitlines()[1:]:
+        ranges = re.findall(r'(-?\d+)\s*:\s*(-?\d+)', line)
+        if not ranges:
+            continue
+        strand = []
+        for init, end in ranges:
+            init, end = int(init), int(end)
+            step = 1 if end >= init else -1
+            strand.extend(range(init, end + step, step))
+        residues.append(strand)
+    if not residues:
+        raise ValueError('No residue range found in the strands block')
+    return residues
+
+
+def get_residues(topology, numbers):
+    """
+    Get the nucleotides of a topology by residue number
+
+    Args:
+        topology: mdtraj topology
+        numbers: residue numbers (resSeq)
+
+    Returns:
+        the list of mdtraj residues (None for the numbers not found)
+    """
+    by_number = {}
+    for residue in topology.residues:
+        if residue.is_protein or residue.is_water:
+            continue
+        by_number.setdefault(residue.resSeq, residue)
+    return [by_number.get(x) for x in numbers]
+
+
+def get_atom(residue, name):
+    """
+    Get the index of an atom of a residue accepting the old * notation
+
+    Args:
+        residue: mdtraj residue (or None)
+        name: name of the atom (e.g. C1')
+
+    Returns:
+        the atom index, or -1 if the atom is missing
+    """
+    if residue is None:
+        return -1
+    names = {name, name.replace("'", '*')}
+    for atom in residue.atoms:
+        if atom.name in names:
+            return atom.index
+    return -1
+
+
+def get_neighbours(residues):
+    """
+    Get the 5' and 3' neighbours of nucleotides along their chain
+
+    Args:
+        residues: list of mdtraj residues (or None)
+
+    Returns:
+        a tuple (list of 5' neighbours, list of 3' neighbours), None at ends
+    """
+    previous = []
+    following = []
+    for residue in residues:
+        if residue is None:
+            previous.append(None)
+            following.append(None)
+            continue
+        chain = list(residue.chain.residues)
+        position = chain.index(residue)
+        previous.append(chain[position - 1] if position > 0 else None)
+        following.append(chain[position + 1]
+                         if position + 1 < len(chain) else None)
+    return previous, following
+
+
+def with_missing(xyz):
+    """
+    Append a NaN atom to coordinates so that index -1 reads missing atoms
+
+    Args:
+        xyz: (frames, atoms, 3) coordinates
+
+    Returns:
+        the (frames, atoms + 1, 3) coordinates in Angstroms
+    """
+    n_frames = xyz.shape[0]
+    missing = np.full((n_frames, 1, 3), np.nan)
+    return np.concatenate([np.asarray(xyz, dtype=float) * 10, missing],
+                          axis=1)
+
+
+def dihedrals(p0, p1, p2, p3):
+    """
+    Compute the dihedral angles of arrays of points
+
+    Args:
+        p0, p1, p2, p3: arrays of shape (..., 3)
+
+    Returns:
+        the dihedral angles in degrees in the ]-180, 180] interval (NaN if a
+        point is missing)
+    """
+    b0 = p0 - p1
+    b1 = p2 - p1
+    b2 = p3 - p2
+    with np.errstate(invalid='ignore', divide='ignore'):
+        b1 = b1 / np.linalg.norm(b1, axis=-1, keepdims=True)
+    v = b0 - np.sum(b0 * b1, axis=-1, keepdims=True) * b1
+    w = b2 - np.sum(b2 * b1, axis=-1, keepdims=True) * b1
+    x = np.sum(v * w, axis=-1)
+    y = np.sum(np.cross(b1, v) * w, axis=-1)
+    return np.degrees(np.arctan2(y, x))
+
+
+def get_puckers(phase):
+    """
+    Get the sugar pucker names of pseudorotation phases
+
+    Args:
+        phase: array of phase angles in degrees
+
+    Returns:
+        an array of pucker names ('----' where the phase is undefined)
+    """
+    names = np.asarray(puckers + ['----'])
+    sectors = np.full(phase.shape, len(puckers))
+    defined = ~np.isnan(phase)
+    sectors[defined] = (np.mod(phase[defined], 360) // 36).astype(int)
+    return names[sectors]
+
+
+class BackboneEngine:
+    """
+    Backbone torsions, sugar pseudorotation and pucker of each strand, as in
+    section (D) of curves+
+
+    Torsions involving a missing atom or neighbour (e.g. alpha of a 5' end)
+    are NaN, as curves+ reports them as '----'.
+    """
+
+    # Atoms of each torsion as (residue offset, atom name), where offsets
+    # -1/+1 are the 5'/3' neighbours along the chain
+    torsions = {
+        'Alpha': [(-1, "O3'"), (0, 'P'), (0, "O5'"), (0, "C5'")],
+        'Beta': [(0, 'P'), (0, "O5'"), (0, "C5'"), (0, "C4'")],
+        'Gamma': [(0, "O5'"), (0, "C5'"), (0, "C4'"), (0, "C3'")],
+        'Delta': [(0, "C5'"), (0, "C4'"), (0, "C3'"), (0, "O3'")],
+        'Epsil': [(0, "C4'"), (0, "C3'"), (0, "O3'"), (1, 'P')],
+        'Zeta': [(0, "C3'"), (0, "O3'"), (1, 'P'), (1, "O5'")],
+    }
+
+    # Endocyclic torsions nu0..nu4 of the sugar
+    sugar = [["C4'", "O4'", "C1'", "C2'"], ["O4'", "C1'", "C2'", "C3'"],
+             ["C1'", "C2'", "C3'", "C4'"], ["C2'", "C3'", "C4'", "O4'"],
+             ["C3'", "C4'", "O4'", "C1'"]]
+
+    # Glycosidic torsion of purines and pyrimidines
+    chi_purine = ["O4'", "C1'", 'N9', 'C4']
+    chi_pyrimidine = ["O4'", "C1'", 'N1', 'C2']
+
+    def __init__(self, topology, strands, shared=None):
+        self.sub_cases = []
+        self.index = {}
+        self.atoms = []
+        self.ids = None
+        for number, strand in enumerate(get_strands(strands), start=1):
+            residues = get_residues(topology, strand)
+            missing = [x for x, y in zip(strand, residues) if y is None]
+            if missing:
+                raise ValueError(f'Residues {missing} of strand {number} are'
+                                 f' not in the selection')
+            sub_case = f'Strand_{number}'
+            self.sub_cases.append(sub_case)
+            self.index[sub_case] = np.arange(1, len(residues) + 1)
+            self.atoms.append(self.get_strand_atoms(residues))
+            if self.ids is None:
+                self.ids = [residue_letters.get(x.name, x.name[-1:])
+                            for x in residues]
+
+    def get_strand_atoms(self, residues):
+        """
+        Get the atom indices of every torsion of the residues of a strand
+
+        Args:
+            residues: mdtraj residues of the strand
+
+        Returns:
+            a dict of torsion name: (residues, 4) array of atom indices
+        """
+        previous, following = get_neighbours(residues)
+        neighbours = {-1: previous, 0: residues, 1: following}
+        atoms = {}
+        for name, points in self.torsions.items():
+            atoms[name] = np.asarray(
+                [[get_atom(neighbours[offset][i], atom_name)
+                  for offset, atom_name in points]
+                 for i in range(len(residues))], dtype=int).reshape(-1, 4)
+
+        chi = []
+        for residue in residues:
+            purine = get_atom(residue, 'N9') != -1
+            names = self.chi_purine if purine else self.chi_pyrimidine
+            chi.append([get_atom(residue, x) for x in names])
+        atoms['Chi'] = np.asarray(chi, dtype=int).reshape(-1, 4)
+        for i, names in enumerate(self.sugar):
+            atoms[f'nu{i}'] = np.asarray(
+                [[get_atom(x, y) for y in names] for x in residues],
+                dtype=int).reshape(-1, 4)
+        return atoms
+
+    @staticmethod
+    def get_pseudorotation(nu):
+        """
+        Get the pseudorotation phase and amplitude of the sugars (Altona &
+        Sundaralingam)
+
+        Args:
+            nu: (5, ...) array of endocyclic torsions nu0..nu4 in degrees
+
+        Returns:
+            a tuple (phase in [0, 360[, amplitude) in degrees
+        """
+        radians = np.radians(nu)
+        numerator = (radians[4] + radians[1]) - (radians[3] + radians[0])
+        denominator = 2 * radians[2] * (np.sin(np.radians(36))
+                                        + np.sin(np.radians(72)))
+        phase = np.mod(np.degrees(np.arctan2(numerator, denominator)), 360)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            amplitude = nu[2] / np.cos(np.radians(phase))
+        return phase, amplitude
+
+    @timing.timed('native_backbone')
+    def compute(self, xyz):
+        """
+        Compute the descriptors of the frames of a chunk
+
+        Args:
+            xyz: (frames, atoms, 3) coordinates in nm (mdtraj units)
+
+        Returns:
+            a dict of strand: dict of descriptor: (frames, residues) array
+            (Puckr holds the pucker names)
+        """
+        coords = with_missing(xyz)
+        computed = {}
+        for sub_case, atoms in zip(self.sub_cases, self.atoms):
+
+            def torsion(name):
+                points = coords[:, atoms[name]]
+                return dihedrals(*np.moveaxis(points, 2, 0))
+
+            values = {x: torsion(x) for x in self.torsions}
+            values['Chi'] = torsion('Chi')
+            nu = np.stack([torsion(f'nu{i}') for i in range(5)])
+            values['Phase'], values['Ampli'] = self.get_pseudorotation(nu)
+            values['Puckr'] = get_puckers(values['Phase'])
+            computed[sub_case] = values
+        return computed
+
+
+# Ring atoms of the standard reference bases in their base frame (Olson et
+# al., J. Mol. Biol. 2001), in Angstroms
+standard_bases = {
+    'A': {'N9': (-1.291, 4.498, 0.000), 'C8': (0.024, 4.897, 0.000),
+          'N7': (0.877, 3.902, 0.000), 'C5': (0.071, 2.771, 0.000),
+          'C6': (0.369, 1.398, 0.000), 'N1': (-0.668, 0.532, 0.000),
+          'C2': (-1.912, 1.023, 0.000), 'N3': (-2.320, 2.290, 0.000),
+          'C4': (-1.267, 3.124, 0.000)},
+    'G': {'N9': (-1.289, 4.551, 0.000), 'C8': (0.023, 4.962, 0.000),
+          'N7': (0.870, 3.969, 0.000), 'C5': (0.071, 2.833, 0.000),
+          'C6': (0.424, 1.460, 0.000), 'N1': (-0.700, 0.641, 0.000),
+          'C2': (-1.999, 1.087, 0.000), 'N3': (-2.342, 2.364, 0.001),
+          'C4': (-1.265, 3.177, 0.000)},
+    'C': {'N1': (-1.285, 4.542, 0.000), 'C2': (-1.472, 3.158, 0.000),
+          'N3': (-0.391, 2.344, 0.000), 'C4': (0.837, 2.868, 0.000),
+          'C5': (1.056, 4.275, 0.000), 'C6': (-0.023, 5.068, 0.000)},
+    'T': {'N1': (-1.284, 4.500, 0.000), 'C2': (-1.462, 3.135, 0.000),
+          'N3': (-0.298, 2.407, 0.000), 'C4': (0.994, 2.897, 0.000),
+          'C5': (1.106, 4.338, 0.000), 'C6': (-0.024, 5.057, 0.000)},
+}
+standard_bases['U'] = standard_bases['T']
+
+
+def get_base_letter(residue):
+    """
+    Get the standard base of a nucleotide, guessing it from its atoms for
+    residue names that are not recognized (e.g. modified nucleotides)
+
+    Args:
+        residue: mdtraj residue
+
+    Returns:
+        one of A, G, C, T or U
+    """
+    letter = residue_letters.get(residue.name)
+    if letter is not None:
+        return letter
+    names = {x.name for x in residue.atoms}
+    if 'N9' in names:
+        return 'G' if 'O6' in names else 'A'
+    return 'T' if 'O4' in names else 'C'
+
+
+def normalize(vectors):
+    """
+    Normalize an array of vectors along its last axis
+    """
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return vectors / np.linalg.norm(vectors, axis=-1, keepdims=True)
+
+
+def rotations(axis, angle):
+    """
+    Get the matrices of right-handed rotations about axes (Rodrigues)
+
+    Args:
+        axis: (..., 3) unit vectors
+        angle: (...) angles in degrees
+
+    Returns:
+        the (..., 3, 3) rotation matrices
+    """
+    theta = np.radians(angle)[..., None, None]
+    x, y, z = np.moveaxis(axis, -1, 0)
+    zero = np.zeros_like(x)
+    cross = np.stack([np.stack([zero, -z, y], -1),
+                      np.stack([z, zero, -x], -1),
+                      np.stack([-y, x, zero], -1)], -2)
+    outer = axis[..., :, None] * axis[..., None, :]
+    identity = np.broadcast_to(np.eye(3), outer.shape)
+    return (np.cos(theta) * identity + np.sin(theta) * cross
+            + (1 - np.cos(theta)) * outer)
+
+
+def signed_angles(a, b, reference):
+    """
+    Get the angles between vectors projected on the plane normal to a
+    reference, signed by the direction of the reference
+
+    Args:
+        a, b: (..., 3) vectors
+        reference: (..., 3) unit vectors
+
+    Returns:
+        the angles in degrees
+    """
+    a = normalize(a - np.sum(a * reference, -1, keepdims=True) * reference)
+    b = normalize(b - np.sum(b * reference, -1, keepdims=True) * reference)
+    angle = np.degrees(np.arccos(np.clip(np.sum(a * b, -1), -1, 1)))
+    sign = np.sign(np.sum(np.cross(a, b) * reference, -1))
+    return np.where(sign < 0, -angle, angle)
+
+
+def step_parameters(r1, o1, r2, o2):
+    """
+    Get the rigid-body parameters relating two reference frames, with the
+    mid-step frame of Lu & Olson (3DNA)
+
+    Args:
+        r1, r2: (..., 3, 3) frames whose columns are the x, y and z axes
+        o1, o2: (..., 3) origins of the frames
+
+    Returns:
+        a tuple ((..., 6) array of the three translations along and three
+        rotations about the mid-step axes, mid-step frames, mid-step origins)
+    """
+    z1, z2 = r1[..., 2], r2[..., 2]
+    hinge = normalize(np.cross(z1, z2))
+    # Parallel z axes define no hinge, any axis of the xy plane fits
+    parallel = ~np.isfinite(hinge).all(-1)
+    hinge[parallel] = r1[..., 0][parallel]
+    bend = np.degrees(np.arccos(np.clip(np.sum(z1 * z2, -1), -1, 1)))
+
+    half_1 = rotations(hinge, 0.5 * bend) @ r1
+    half_2 = rotations(hinge, -0.5 * bend) @ r2
+    mid_z = half_1[..., 2]
+    mid_y = normalize(half_1[..., 1] + half_2[..., 1])
+    mid_x = np.cross(mid_y, mid_z)
+    mid = np.stack([mid_x, mid_y, mid_z], -1)
+    origin = 0.5 * (o1 + o2)
+
+    twist = signed_angles(half_1[..., 1], half_2[..., 1], mid_z)
+    phi = np.radians(signed_angles(hinge, mid_y, mid_z))
+    shifts = np.einsum('...i,...ij->...j', o2 - o1, mid)
+    parameters = np.concatenate(
+        [shifts, np.stack([bend * np.sin(phi), bend * np.cos(phi), twist],
+                          -1)], -1)
+    return parameters, mid, origin
+
+
+def helical_parameters(r1, o1, r2, o2):
+    """
+    Get the helical rise and twist relating two reference frames (3DNA)
+
+    Args:
+        r1, r2: (..., 3, 3) frames whose columns are the x, y and z axes
+        o1, o2: (..., 3) origins of the frames
+
+    Returns:
+        a tuple (helical rise, helical twist)
+    """
+    axis = normalize(np.cross(r2[..., 0] - r1[..., 0],
+                              r2[..., 1] - r1[..., 1]))
+    axis = np.where(np.sum(axis * r1[..., 2], -1, keepdims=True) < 0, -axis,
+                    axis)
+
+    def align(r):
+        # Rotate a frame so that its z axis lies on the helical axis
+        z = r[..., 2]
+        tip = np.degrees(np.arccos(np.clip(np.sum(axis * z, -1), -1, 1)))
+        hinge = normalize(np.cross(axis, z))
+        hinge = np.where(np.isfinite(hinge), hinge, r[..., 0])
+        return rotations(hinge, -tip) @ r
+
+    twist = signed_angles(align(r1)[..., 1], align(r2)[..., 1], axis)
+    rise = np.sum((o2 - o1) * axis, -1)
+    return rise, twist
+
+
+class BaseFrames:
+    """
+    Standard reference frames of the paired bases of a duplex, fitted to all
+    the frames of a chunk at once (least-squares superposition of the ring
+    atoms of the standard bases)
+    """
+
+    def __init__(self, topology, strands):
+        residues = [get_residues(topology, x) for x in get_strands(strands)]
+        if len(residues) != 2 or len(residues[0]) != len(residues[1]):
+            raise ValueError('Base-pair parameters need two strands of the'
+                             ' same length')
+        for number, strand in enumerate(residues, start=1):
+            missing = [x for x, y in enumerate(strand) if y is None]
+            if missing:
+                raise ValueError(f'Residues at positions {missing} of strand'
+                                 f' {number} are not in the selection')
+        self.letters = [[get_base_letter(x) for x in y] for y in residues]
+        self.fits = [[self.get_fit(x, y) for x, y in zip(strand, letters)]
+                     for strand, letters in zip(residues, self.letters)]
+        self.xyz = None
+        self.fitted = None
+
+    @staticmethod
+    def get_fit(residue, letter):
+        """
+        Get the ring atoms of a base and their standard coordinates
+
+        Args:
+            residue: mdtraj residue
+            letter: standard base of the residue
+
+        Returns:
+            a tuple (atom indices, (atoms, 3) standard coordinates)
+        """
+        indices = []
+        standard = []
+        for name, coords in standard_bases[letter].items():
+            index = get_atom(residue, name)
+            if index != -1:
+                indices.append(index)
+                standard.append(coords)
+        if len(indices) < 3:
+            raise ValueError(f'Base {residue} has less than three ring atoms')
+        return np.asarray(indices), np.asarray(standard)
+
+    @staticmethod
+    def superpose(standard, coords):
+        """
+        Fit standard coordinates onto the coordinates of several frames
+
+        Args:
+            standard: (atoms, 3) standard coordinates
+            coords: (frames, atoms, 3) coordinates
+
+        Returns:
+            a tuple ((frames, 3, 3) frames whose columns are the base axes,
+            (frames, 3) origins)
+        """
+        std_center = standard.mean(0)
+        centers = coords.mean(1)
+        cov = np.einsum('ai,faj->fij', standard - std_center,
+                        coords - centers[:, None])
+        u, _, vt = np.linalg.svd(cov)
+        v = np.swapaxes(vt, -1, -2)
+        ut = np.swapaxes(u, -1, -2)
+        d = np.sign(np.linalg.det(v @ ut))
+        correction = np.ones((d.size, 3))
+        correction[:, 2] = d
+        rotation = (v * correction[:, None, :]) @ ut
+        origin = centers - rotation @ std_center
+        return rotation, origin
+
+    def fit(self, xyz):
+        """
+        Fit the base frames of the frames of a chunk (the result of the last
+        chunk is reused by the engines sharing this object)
+
+        Args:
+            xyz: (frames, atoms, 3) coordinates in nm (mdtraj units)
+
+        Returns:
+            a list (one item per strand) of tuples ((frames, bases, 3, 3)
+            axes, (frames, bases, 3) origins)
+        """
+        if xyz is self.xyz:
+            return self.fitted
+        coords = np.asarray(xyz, dtype=float) * 10
+        fitted = []
+        for fits in self.fits:
+            axes, origins = zip(*[self.superpose(standard, coords[:, indices])
+                                  for indices, standard in fits])
+            fitted.append((np.stack(axes, 1), np.stack(origins, 1)))
+        self.xyz = xyz
+        self.fitted = fitted
+        return fitted
+
+    def get_pairs(self, xyz):
+        """
+        Get the base-pair parameters and frames of the frames of a chunk
+
+        Args:
+            xyz: (frames, atoms, 3) coordinates in nm (mdtraj units)
+
+        Returns:
+            a tuple ((frames, bp, 6) intra-bp parameters, (frames, bp, 3, 3)
+            base-pair frames, (frames, bp, 3) base-pair origins)
+        """
+        (r1, o1), (r2, o2) = self.fit(xyz)
+        # Bases of the complementary strand point the other way
+        flip = np.sum(r1[..., 2] * r2[..., 2], -1) < 0
+        r2 = r2.copy()
+        r2[flip, :, 1:] *= -1
+        return step_parameters(r2, o2, r1, o1)
+
+
+class IntraEngine:
+    """
+    Intra-base pair parameters (section (B) of curves+) from the standard
+    reference frames of the bases
+    """
+
+    descriptors = ['Shear', 'Stretch', 'Stagger', 'Buckle', 'Propel',
+                   'Opening']
+
+    def __init__(self, topology, strands, shared=None):
+        shared = {} if shared is None else shared
+        if 'base_frames' not in shared:
+            shared['base_frames'] = BaseFrames(topology, strands)
+        self.frames = shared['base_frames']
+        self.sub_cases = ['Strands_1-2']
+        self.index = {'Strands_1-2': np.arange(1, len(self.frames.letters[0])
+                                               + 1)}
+        self.ids = [f'{x}|{y}' for x, y in zip(*self.frames.letters)]
+
+    @timing.timed('native_intra')
+    def compute(self, xyz):
+        """
+        Compute the descriptors of the frames of a chunk
+
+        Args:
+            xyz: (frames, atoms, 3) coordinates in nm (mdtraj units)
+
+        Returns:
+            a dict of strands: dict of descriptor: (frames, bp) array
+        """
+        parameters = self.frames.get_pairs(xyz)[0]
+        return {'Strands_1-2': {x: parameters[..., i]
+                                for i, x in enumerate(self.descriptors)}}
+
+
+class InterEngine:
+    """
+    Inter-base pair and helical parameters (section (C) of curves+) between
+    successive base-pair frames
+    """
+
+    descriptors = ['Shift', 'Slide', 'Rise', 'Tilt', 'Roll', 'Twist']
+
+    def __init__(self, topology, strands, shared=None):
+        shared = {} if shared is None else shared
+        if 'base_frames' not in shared:
+            shared['base_frames'] = BaseFrames(topology, strands)
+        self.frames = shared['base_frames']
+        self.sub_cases = [None]
+        self.index = {None: np.arange(2, len(self.frames.letters[0]) + 1)}
+        self.ids = [f'{x}|{y}' for x, y in zip(*self.frames.letters)][1:]
+
+    @timing.timed('native_inter')
+    def compute(self, xyz):
+        """
+        Compute the descriptors of the frames of a chunk
+
+        Args:
+            xyz: (frames, atoms, 3) coordinates in nm (mdtraj units)
+
+        Returns:
+            a dict of None: dict of descriptor: (frames, steps) array
+        """
+        _, mid, origin = self.frames.get_pairs(xyz)
+        r1, o1, r2, o2 = mid[:, :-1], origin[:, :-1], mid[:, 1:], origin[:, 1:]
+        parameters = step_parameters(r1, o1, r2, o2)[0]
+        values = {x: parameters[..., i] for i, x in enumerate(self.descriptors)}
+        # Named as parsed from the curves+ header
+        values['H-Ris'], values[' H-Twi'] = helical_parameters(r1, o1, r2, o2)
+        return {None: values}
+
+
+def interpolation_matrix(positions, grid):
+    """
+    Get the weights of the linear interpolation of points along a trace
+
+    Args:
+        positions: (points,) increasing positions of the points
+        grid: (samples,) positions to interpolate (NaN outside the points)
+
+    Returns:
+        the (samples, points) matrix of weights
+    """
+    weights = np.zeros((grid.size, positions.size))
+    for i, x in enumerate(grid):
+        if x < positions[0] or x > positions[-1]:
+            weights[i] = np.nan
+            continue
+        right = min(np.searchsorted(positions, x, side='right'),
+                    positions.size - 1)
+        left = right - 1
+        fraction = (x - positions[left]) / (positions[right] - positions[left])
+        weights[i, left] = 1 - fraction
+        weights[i, right] = fraction
+    return weights
+
+
+class GrooveEngine:
+    """
+    Minor and major groove widths (W12 and W21 of section (E) of curves+),
+    approximated by the shortest distances between the phosphate traces of
+    the two strands across each groove, minus the 5.8 A of the phosphate
+    groups
+
+    The phosphate of a nucleotide sits half a level on its 5' side, and the
+    traces are linearly interpolated between phosphates. A distance is
+    assigned to the level midway between its two points. Levels whose search
+    leaves the duplex (or meets a missing phosphate) are NaN, as curves+
+    leaves the ends blank. Groove depths are not computed.
+    """
+
+    # Level offsets between the points of the two strands searched across
+    # each groove (the minor groove faces the 5' side of the first strand)
+    windows = {'W12': (-4, -1), 'W21': (2, 7)}
+
+    # Spacing (in levels) of the searched offsets
+    spacing = 0.25
+
+    # Radii of the two phosphate groups subtracted from the distances
+    phosphate_size = 5.8
+
+    def __init__(self, topology, strands, shared=None):
+        residues = [get_residues(topology, x) for x in get_strands(strands)]
+        if len(residues) != 2 or len(residues[0]) != len(residues[1]):
+            raise ValueError('Groove widths need two strands of the same'
+                             ' length')
+        n_bp = len(residues[0])
+        self.phosphates = [np.asarray([get_atom(x, 'P') for x in y])
+                           for y in residues]
+        self.sub_cases = [None]
+        self.levels = np.arange(1, n_bp + 0.5, 0.5)
+        self.index = {None: self.levels}
+        letters = [residue_letters.get(x.name, x.name[-1:]) if x else ''
+                   for x in residues[0]]
+        self.ids = [letters[int(x) - 1] if x.is_integer() else ''
+                    for x in self.levels]
+
+        # Phosphates of the first strand precede their nucleotide, those of
+        # the antiparallel partner follow it
+        numbers = np.arange(1, n_bp + 1)
+        self.weights = {}
+        for name, (low, high) in self.windows.items():
+            offsets = np.arange(low, high + self.spacing / 2, self.spacing)
+            samples_1 = (self.levels[:, None] - offsets / 2).ravel()
+            samples_2 = (self.levels[:, None] + offsets / 2).ravel()
+            self.weights[name] = (
+                interpolation_matrix(numbers - 0.5, samples_1),
+                interpolation_matrix(numbers + 0.5, samples_2), offsets.size)
+
+    @timing.timed('native_groove')
+    def compute(self, xyz):
+        """
+        Compute the descriptors of the frames of a chunk
+
+        Args:
+            xyz: (frames, atoms, 3) coordinates in nm (mdtraj units)
+
+        Returns:
+            a dict of None: dict of descriptor: (frames, levels) array
+        """
+        coords = with_missing(xyz)
+        phosphates_1 = coords[:, self.phosphates[0]]
+        phosphates_2 = coords[:, self.phosphates[1]]
+        values = {}
+        for name, (weights_1, weights_2, n_offsets) in self.weights.items():
+            trace_1 = np.einsum('sp,fpi->fsi', weights_1, phosphates_1)
+            trace_2 = np.einsum('sp,fpi->fsi', weights_2, phosphates_2)
+            distances = np.linalg.norm(trace_1 - trace_2, axis=-1)
+            distances = distances.reshape(len(xyz), self.levels.size,
+                                          n_offsets)
+            # Any sample out of the duplex leaves the level undefined
+            values[name] = distances.min(-1) - self.phosphate_size
+        return {None: values}
+
+
+# Sections that can be computed natively
+engines = {
+    'intra': IntraEngine,
+    'inter': InterEngine,
+    'backbone': BackboneEngine,
+    'groove': GrooveEngine,
+}
+
+
+class NativeParser:
+    """
+    Stand-in for a CourbesParserMulti when curves+ is not run at all, holding
+    the natively computed sections only
+    """
+
+    def __init__(self, n_frames):
+        self.n_frames = n_frames
+        self.descriptors_bp_axes = None
+        self.descriptors_bp_intras = None
+        self.descriptors_bp_inters = None
+        self.descriptors_backbones = None
+        self.descriptors_grooves = None
+        self.descriptors_curvatures = None
+        self.ids_bp_axes = None
+        self.ids_bp_intras = None
+        self.ids_bp_inters = None
+        self.ids_backbones = None
+        self.ids_grooves = None
+        self.ids_curvatures = None
+
+
+class NativeCollector:
+    """
+    Compute the native sections of the chunks of a run as they are read
+    """
+
+    def __init__(self, strands, sections):
+        unknown = [x for x in sections if x not in engines]
+        if unknown:
+            raise ValueError(f'Sections {unknown} cannot be computed natively.'
+                             f' Available ones are {list(engines)}')
+        self.strands = strands
+        self.sections = list(sections)
+        self.engines = None
+        self.indices = []
+        self.chunks = []
+
+    def process(self, indices, chunk):
+        """
+        Compute the native sections of a chunk
+
+        Args:
+            indices: run-wide indices of the frames of the chunk
+            chunk: mdtraj chunk
+        """
+        if self.engines is None:
+            # Engines may share intermediate results (e.g. base frames)
+            shared = {}
+            self.engines = {x: engines[x](chunk.topology, self.strands, shared)
+                            for x in self.sections}
+        self.indices.extend(indices)
+        self.chunks.append({x: y.compute(chunk.xyz)
+                            for x, y in self.engines.items()})
+
+    def wrap(self, chunks, forward=True, on_frame_done=None):
+        """
+        Compute the native sections of chunks while they are consumed
+
+        Args:
+            chunks: iterable of (list of frame indices, mdtraj chunk)
+            forward: yield the chunks (e.g. to curves+) after computing them
+            on_frame_done: callback receiving the index of each frame that is
+                           done (i.e. not forwarded)
+
+        Returns:
+            Yields the chunks if forward is True
+        """
+        for indices, chunk in chunks:
+            self.process(indices, chunk)
+            if forward:
+                yield indices, chunk
+            elif on_frame_done is not None:
+                for index in indices:
+                    on_frame_done(index)
+
+    def get_descriptors(self, section, order):
+        """
+        Get the descriptors of a native section for some frames
+
+        Args:
+            section: name of the section
+            order: run-wide indices of the frames in the output order
+
+        Returns:
+            a descriptors container laid out as those of CourbesParserMulti
+            (dataframes of bp x frames, nested by strands if needed)
+        """
+        engine = self.engines[section]
+        rows = {x: i for i, x in enumerate(self.indices)}
+        take = [rows[x] for x in order]
+        container = {}
+        for sub_case in engine.sub_cases:
+            descriptors = {}
+            for descriptor in self.chunks[0][section][sub_case]:
+                values = np.concatenate([x[section][sub_case][descriptor]
+                                         for x in self.chunks])[take]
+                descriptors[descriptor] = pd.DataFrame(
+                    values.T, index=engine.index[sub_case])
+            container[sub_case] = descriptors
+        # Sections without strands are not nested
+        if engine.sub_cases == [None]:
+            return container[None]
+        return container
+
+    def update(self, lis_parsed, order):
+        """
+        Set the native sections of a parser, replacing those of curves+
+
+        Args:
+            lis_parsed: CourbesParserMulti (or NativeParser)
+            order: run-wide indices of the parsed frames, in order
+        """
+        from courbes import analysis
+
+        if self.engines is None:
+            raise ValueError('No chunk was processed natively')
+        for section, engine in self.engines.items():
+            desc_attr, ids_attr = analysis.section_attrs[section]
+            setattr(lis_parsed, desc_attr, self.get_descriptors(section, order))
+            setattr(lis_parsed, ids_attr, engine.ids)
@@ -2,6 +2,7 @@
 """
 Parser for single and multiple *.lis files yielded by the curves+ software
 """
+import copy
 import os
 from collections import defaultdict
 from os.path import join
@@ -12,9 +13,8 @@ import pandas as pd
 from tqdm import tqdm
 
 import courbes.commons as cmn
-import prody as prd
-
-prd.LOGGER.verbosity = 'none'
+from courbes import timing
+from courbes.stats import describe_series, is_angular
 
 sections = {
     '(A)': 'BP-Axis',
@@ -35,6 +35,10 @@ def parse_pdb_files(pdb_paths):
     Returns:
         a tuple with the parsed pdb and dcd file
     """
+    # prody is slow to import and only needed here
+    import prody as prd
+    prd.LOGGER.verbosity = 'none'
+
     # export as dcd file
     ensemble = prd.Ensemble()
     for pdb in tqdm(pdb_paths, desc='Parsing pdb files'):
@@ -68,11 +72,13 @@ def get_start_line(string_char, n):
     return string_char.strip()[:n]
 
 
-def get_dataframe_stats(df):
+def get_dataframe_stats(df, angular=False, starts=None):
     """
     Get statistical report from a dataframe
     Args:
         df: input dataframe
+        angular: whether the descriptor is an angle (circular statistics)
+        starts: first frame of each pooled replica (a single replica if None)
 
     Returns:
         a dataframe with statistics
@@ -81,8 +87,12 @@ def get_dataframe_stats(df):
     try:
         df_stats = df.astype(float).describe().loc[data].round(2)
         df_stats.loc['sem'] = df.sem()
+        # Frames of MD trajectories are not independent, and angles wrap
+        for row, values in describe_series(df.to_numpy(float), angular,
+                                           starts).items():
+            df_stats.loc[row] = values
         return df_stats
-    except (KeyError, ValueError):
+    except (KeyError, ValueError, TypeError):
         return pd.DataFrame()
 
 
@@ -97,13 +107,15 @@ def write_dataframe(out_path, df):
         df.round(4).to_string(dec_file)
 
 
-def write_descriptors(out_dir, descriptors):
+@timing.timed('write_descriptors')
+def write_descriptors(out_dir, descriptors, starts=None):
     """
     Write a dataframe corresponding to a curves+ descriptor as a txt file
 
     Args:
         out_dir: path to output directory
         descriptors: descriptors container
+        starts: first frame of each pooled replica (a single replica if None)
     """
     os.makedirs(out_dir, exist_ok=True)
 
@@ -113,7 +125,7 @@ def write_descriptors(out_dir, descriptors):
         # Treat other cases
         try:
             df = descriptors[descriptor].T
-            stats = get_dataframe_stats(df)
+            stats = get_dataframe_stats(df, is_angular(descriptor), starts)
             df_out = join(out_dir, f'{descriptor}.txt')
             stats_out = join(out_dir, f'{descriptor}_stats.txt')
             write_dataframe(df_out, df)
@@ -122,13 +134,37 @@ def write_descriptors(out_dir, descriptors):
         except AttributeError:
             for sub_case in descriptors[descriptor]:
                 df = descriptors[descriptor][sub_case].T
-                stats = get_dataframe_stats(df)
+                stats = get_dataframe_stats(df, is_angular(sub_case),
+                                            starts)
                 df_out = join(out_dir, f'{descriptor}_{sub_case}.txt')
                 stats_out = join(out_dir, f'{descriptor}_{sub_case}_stats.txt')
                 write_dataframe(df_out, df)
                 write_dataframe(stats_out, stats)
 
 
+def select_frames(descriptors, positions):
+    """
+    Restrict a descriptors container to some frames
+
+    Args:
+        descriptors: descriptors container (dataframes of bp x frames, nested
+                     by strands for the intra & backbone cases)
+        positions: positions of the frames to keep
+
+    Returns:
+        a new descriptors container with frames renumbered from 0
+    """
+    selected = {}
+    for descriptor, values in descriptors.items():
+        if isinstance(values, dict):
+            selected[descriptor] = select_frames(values, positions)
+        else:
+            df = values.iloc[:, positions]
+            df.columns = range(len(positions))
+            selected[descriptor] = df
+    return selected
+
+
 class CourbesParserSingle:
     """
     Parser for a curves+ *.lis single output file
@@ -367,18 +403,89 @@ class CourbesParserSingle:
         return df
 
 
+def mask_frame(reference):
+    """
+    Get a copy of a parsed frame with all its descriptor values set to NaN
+
+    Args:
+        reference: a CourbesParserSingle used as template
+
+    Returns:
+        the masked copy of the reference
+    """
+    labels = ['n_bp', 'id_bp', 'level', 'bp_id']
+
+    def mask(df):
+        masked = df.copy()
+        masked[[x for x in df.columns if x not in labels]] = np.nan
+        return masked
+
+    masked = copy.copy(reference)
+    masked.bp_axis = mask(reference.bp_axis)
+    masked.bp_inter = mask(reference.bp_inter)
+    masked.groove = mask(reference.groove)
+    masked.bp_intra = {x: mask(reference.bp_intra[x])
+                       for x in reference.bp_intra}
+    masked.backbone = {x: mask(reference.backbone[x])
+                       for x in reference.backbone}
+    return masked
+
+
+def same_layout(frame, reference):
+    """
+    Check whether a parsed frame has the sections and base pairs of another
+
+    Args:
+        frame: a CourbesParserSingle
+        reference: a CourbesParserSingle
+
+    Returns:
+        True if every section of both frames has the same shape
+    """
+    nested = ('bp_intra', 'backbone')
+    for name in ('bp_axis', 'bp_inter', 'groove') + nested:
+        sections, ref_sections = getattr(frame, name), getattr(reference, name)
+        if name not in nested:
+            sections, ref_sections = {'': sections}, {'': ref_sections}
+        if sections.keys() != ref_sections.keys():
+            return False
+        if any(sections[x].shape != ref_sections[x].shape for x in sections):
+            return False
+    return True
+
+
 class CourbesParserMulti:
     """
     Parser for multiple curves+ *.lis output files
+
+    Frames whose path is None (failed curves+ runs) are kept as NaN values,
+    and so are frames whose .lis cannot be parsed (e.g. curves+ exited
+    normally but left a section out). The latter are listed in `failed`
     """
 
     def __init__(self, lis_paths):
         # Parsing class arguments
-        self.lis_paths = [cmn.check_path(x) for x in lis_paths]
+        self.lis_paths = [cmn.check_path(x) if x is not None else None
+                          for x in lis_paths]
+        # Position of the frames whose .lis could not be parsed: reason
+        self.failed = {}
 
         # Set reference frame for getting descriptor names
         self.n_frames = len(lis_paths)
-        self.reference = CourbesParserSingle(self.lis_paths[0])
+        self.reference = None
+        self.reference_position = None
+        for position, lis_path in enumerate(self.lis_paths):
+            if lis_path is None:
+                continue
+            try:
+                self.reference = CourbesParserSingle(lis_path)
+            except (ValueError, IndexError) as error:
+                self.failed[position] = str(error)
+                continue
+            self.reference_position = position
+            break
+        if self.reference is None:
+            raise ValueError('No .lis file to parse')
 
         # Concatenated information
         self.concat_backbones = None
@@ -393,6 +500,7 @@ class CourbesParserMulti:
         self.descriptors_grooves = None
         self.descriptors_bp_inters = None
         self.descriptors_bp_axes = None
+        self.descriptors_curvatures = None
 
         # Identifiers
         self.ids_backbones = None
@@ -400,7 +508,9 @@ class CourbesParserMulti:
         self.ids_grooves = None
         self.ids_bp_inters = None
         self.ids_bp_axes = None
+        self.ids_curvatures = None
 
+    @timing.timed('concat_info')
     def concat_info(self):
         """
         Concatenates information from all frames
@@ -412,8 +522,11 @@ class CourbesParserMulti:
         grooves = []
         bp_intras = defaultdict(list)
         backbones = defaultdict(list)
-        traj_lis = [CourbesParserSingle(x) for x in self.lis_paths]
-        for frame in traj_lis:
+        masked = mask_frame(self.reference)
+        for position, lis_path in enumerate(self.lis_paths):
+            frame = self.parse_frame(position, lis_path)
+            if frame is None:
+                frame = masked
             bp_axes.append(frame.bp_axis)
             bp_inters.append(frame.bp_inter)
             grooves.append(frame.groove)
@@ -427,6 +540,33 @@ class CourbesParserMulti:
         self.concat_bp_intras = {x: pd.concat(bp_intras[x]) for x in bp_intras}
         self.concat_backbones = {x: pd.concat(backbones[x]) for x in backbones}
 
+    def parse_frame(self, position, lis_path):
+        """
+        Parse the .lis of a frame, isolating the frames that cannot be parsed
+
+        Args:
+            position: position of the frame
+            lis_path: path to the .lis (None for failed curves+ runs)
+
+        Returns:
+            a CourbesParserSingle, or None if the frame has to be masked
+        """
+        if lis_path is None or position in self.failed:
+            return None
+        if position == self.reference_position:
+            return self.reference
+        try:
+            frame = CourbesParserSingle(lis_path)
+        except (ValueError, IndexError) as error:
+            self.failed[position] = str(error)
+            return None
+        if not same_layout(frame, self.reference):
+            self.failed[position] = 'sections differ from those of the' \
+                                    ' first frame'
+            return None
+        return frame
+
+    @timing.timed('get_descriptors')
     def get_descriptors(self):
         """
         Get individual descriptor values for all concatenated frames
@@ -488,6 +628,7 @@ class CourbesParserMulti:
             descriptors.update({descriptor: df})
         return descriptors
 
+    @timing.timed('get_identifiers')
     def get_identifiers(self):
         """ Get identifiers of the descriptors"""
         # Section A: BP-Axis
@@ -8,7 +8,8 @@ import numpy as np
 import tqdm
 from matplotlib.markers import MarkerStyle
 
-from courbes import commons as cmn
+from courbes import commons as cmn, timing
+from courbes.stats import is_angular_name, wrapped_difference
 
 # mpl.use('Qt5Agg')
 
@@ -31,7 +32,7 @@ def is_courbes_dir(path):
         return path
 
 
-def plot_table(table, stat_file, base_pairs, suffix):
+def plot_table(table, stat_file, base_pairs, suffix, band=None):
     """
     Plot the statistics of the descriptors in the given table.
 
@@ -40,6 +41,8 @@ def plot_table(table, stat_file, base_pairs, suffix):
         stat_file: path to the statistics file.
         base_pairs: list of base pairs.
         suffix: suffix to add to the plot file name.
+        band: optional pandas DataFrame with the low and high bounds of a
+              confidence interval of the mean, indexed by base pair.
     """
     markers = {
         'A|T': MarkerStyle('^', fillstyle='none'),  # Unfilled triangle up
@@ -65,7 +68,9 @@ def plot_table(table, stat_file, base_pairs, suffix):
 
     y_axis = np.asarray(list(map(float, table.loc['mean'].tolist())))
     errors1 = np.asarray(list(map(float, table.loc['std'].tolist())))
-    errors2 = np.asarray(list(map(float, table.loc['sem'].tolist())))
+    # The block-averaged SEM accounts for the autocorrelation of the frames
+    sem_row = 'sem_block' if 'sem_block' in table.index else 'sem'
+    errors2 = np.asarray(list(map(float, table.loc[sem_row].tolist())))
 
     title = os.path.basename(stat_file).replace('_stats.txt', '')
     plt.title(title, fontsize='x-large')
@@ -95,6 +100,11 @@ def plot_table(table, stat_file, base_pairs, suffix):
                      color='k', label='std')
     plt.fill_between(x_axis, y_axis - errors2, y_axis + errors2, alpha=0.3,
                      color='k', label='sem')
+    if band is not None:
+        band = band.reindex(x_axis)
+        plt.fill_between(x_axis, band['low'].to_numpy(float),
+                         band['high'].to_numpy(float), alpha=0.3,
+                         color='tab:red', label='bootstrap CI')
 
     plt.legend(loc='upper left', bbox_to_anchor=(1, 1), ncol=1)
     plt.grid(axis='both', linestyle='--', linewidth=0.5, color='k', alpha=0.5)
@@ -103,6 +113,7 @@ def plot_table(table, stat_file, base_pairs, suffix):
     plt.close()
 
 
+@timing.timed('plot_stats')
 def plot_stats(root_dir, identifiers):
     """
     Plot the statistics of the descriptors in the given directory.
@@ -118,7 +129,30 @@ def plot_stats(root_dir, identifiers):
         plot_table(table, stat_file, base_pairs, suffix='stats')
 
 
-def plot_diff(tar_dir, ref_dir, identifiers):
+def get_bands(intervals):
+    """
+    Get the confidence intervals of each descriptor by statistics file.
+
+    Args:
+        intervals: pandas DataFrame returned by bootstrap.difference_intervals.
+
+    Returns:
+        a dictionary of path of the statistics file relative to the report
+        (without _stats.txt): DataFrame of low and high indexed by base pair.
+    """
+    bands = {}
+    for (section, descriptor), rows in intervals.groupby(
+            ['section', 'descriptor'], sort=False):
+        section_dir, _, sub_case = section.partition('/')
+        stem = f'{sub_case}_{descriptor}' if sub_case else descriptor
+        bp_index = rows['bp'].astype(float)
+        bands[f'{section_dir}/{stem}'] = rows.set_index(bp_index)[
+            ['low', 'high']]
+    return bands
+
+
+@timing.timed('plot_diff')
+def plot_diff(tar_dir, ref_dir, identifiers, intervals=None):
     """
     Plot the difference between the statistics of the descriptors in the given
     directories.
@@ -127,12 +161,18 @@ def plot_diff(tar_dir, ref_dir, identifiers):
         tar_dir: path to the directory containing the statistics files.
         ref_dir: path to the reference directory containing the statistics files.
         identifiers: dictionary containing the identifiers of the descriptors.
+        intervals: optional pandas DataFrame returned by
+                   bootstrap.difference_intervals for the pooled frames of
+                   both directories, shaded around the differences.
     """
+    bands = get_bands(intervals) if intervals is not None else {}
     tar_stats_files = list(cmn.recursive_finder('*_stats.txt', tar_dir))
     ref_stats_files = list(cmn.recursive_finder('*_stats.txt', ref_dir))
 
-    tar_dict = {os.path.basename(x): x for x in tar_stats_files}
-    ref_dict = {os.path.basename(x): x for x in ref_stats_files}
+    # Files are matched by their path relative to each root, so that the
+    # per-replica results of multi-replica runs are compared separately
+    tar_dict = {os.path.relpath(x, tar_dir): x for x in tar_stats_files}
+    ref_dict = {os.path.relpath(x, ref_dir): x for x in ref_stats_files}
 
     for tar_file in tqdm.tqdm(tar_dict, desc='Plotting Diff', unit='file'):
         ref_file = ref_dict.get(tar_file)
@@ -150,10 +190,85 @@ def plot_diff(tar_dir, ref_dir, identifiers):
             diff_table = tar_table - ref_table
         except TypeError:
             continue
+        # Differences of mean angles wrap around
+        name = os.path.basename(tar_file).replace('_stats.txt', '')
+        if is_angular_name(name) and 'mean' in diff_table.index:
+            diff_table.loc['mean'] = wrapped_difference(
+                tar_table.loc['mean'].astype(float),
+                ref_table.loc['mean'].astype(float))
 
         dir_name = split(os.path.dirname(tar_dict[tar_file]))[1]
         base_pairs = identifiers.get(dir_name)
-        plot_table(diff_table, tar_dict[tar_file], base_pairs, suffix='diff')
+        # Intervals are those of the pooled report (not of each replica)
+        stem = tar_file.replace('_stats.txt', '')
+        band = bands.get(f'{os.path.dirname(stem)}/'
+                         f'{os.path.basename(stem).strip()}')
+        plot_table(diff_table, tar_dict[tar_file], base_pairs, suffix='diff',
+                   band=band)
+
+
+def plot_running(running, title, out_path):
+    """
+    Plot the running mean and SEM of a descriptor over the frames.
+
+    Args:
+        running: dict returned by convergence.running_stats.
+        title: title of the plot.
+        out_path: path to the output image.
+    """
+    frames = running['n_frames']
+    # Running means are shown as their shift from the final one
+    shift = running['mean'] - running['mean'][-1]
+    window_shift = running['window_mean'] - running['mean'][-1]
+    if is_angular_name(title.split('/')[-1].strip()):
+        shift = wrapped_difference(shift, 0)
+        window_shift = wrapped_difference(window_shift, 0)
+
+    fig, (top, bottom) = plt.subplots(2, 1, sharex=True, figsize=(8, 7))
+    top.set_title(title, fontsize='x-large')
+    top.plot(frames, shift, color='k', lw=0.5, alpha=0.2)
+    top.plot(frames, window_shift, color='tab:red', lw=0.5, alpha=0.2)
+    top.plot([], [], color='k', label='cumulative')
+    top.plot([], [], color='tab:red',
+             label=f"last {running['window']} frames")
+    top.axhline(0, color='k', linestyle='--', linewidth=0.5)
+    top.set_ylabel('Mean - final mean', fontweight='bold', fontsize='medium')
+    top.legend(loc='upper right')
+
+    bottom.loglog(frames, running['sem'], color='k', lw=0.5, alpha=0.2)
+    # A converged SEM decays as 1 / sqrt(frames)
+    with np.errstate(invalid='ignore'):
+        final = np.nanmedian(running['sem'][-1])
+    if np.isfinite(final):
+        bottom.loglog(frames, final * np.sqrt(frames[-1] / frames),
+                      color='tab:blue', linestyle='--',
+                      label=r'$1/\sqrt{N}$')
+        bottom.legend(loc='upper right')
+    bottom.set_xscale('log')
+    bottom.set_xlabel('Frames', fontweight='bold', fontsize='medium')
+    bottom.set_ylabel('Block-averaged SEM', fontweight='bold',
+                      fontsize='medium')
+    for axes in (top, bottom):
+        axes.grid(axis='both', linestyle='--', linewidth=0.5, color='k',
+                  alpha=0.5)
+    fig.savefig(out_path, bbox_inches='tight')
+    plt.close(fig)
+
+
+@timing.timed('plot_convergence')
+def plot_convergence(root_dir, results):
+    """
+    Plot the convergence of the descriptors of a report.
+
+    Args:
+        root_dir: path to the directory containing the descriptor files.
+        results: dict of section/file stem: dict returned by
+                 convergence.running_stats.
+    """
+    for name, running in tqdm.tqdm(results.items(), desc='Plotting Convergence',
+                                   unit='file'):
+        out_path = os.path.join(root_dir, f'{name}_convergence.png')
+        plot_running(running, name.strip(), out_path)
 
 # =============================================================================
 #
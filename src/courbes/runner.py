@@ -1,74 +1,329 @@
 # Created by roy.gonzalez-aleman at 04/04/2024
+import argparse
 import os
 import sys
 
 import courbes.commons as cmn
-from courbes import config, parsing, plots as plts
+from courbes import config, timing
 
+# Name of the timing report written to the output directory
+timings_name = 'timings.json'
 
+# Directory receiving the per-stage profiles when profiling is enabled
+profiles_dir = 'profiles'
 
+# Report of the frames whose curves+ run failed
+failed_name = 'failed_frames.json'
 
-def run():
+# Directory receiving the results of each replica of multi-replica runs
+replicas_dir = 'replicas'
+
+# Ranked changes of the descriptors of the systems of a batch, and their
+# bootstrap confidence intervals
+significance_name = 'significance.csv'
+intervals_name = 'intervals.csv'
+
+# Reports of the validation of the native sections against curves+
+validation_name = 'validation.csv'
+validation_summary_name = 'validation_summary.csv'
+
+# Running statistics of the descriptors of a report, and their summary
+convergence_name = 'convergence.npz'
+convergence_summary_name = 'convergence.csv'
+
+
+def parse_shard(text):
     """
-    Run the Courbes+ analysis for a set of trajectories.
+    Parse a shard given as i/N on the command line
+
+    Args:
+        text: shard index (starting at 1) and number of shards as 'i/N'
+
+    Returns:
+        a tuple (i, N)
     """
-    print('Running Courbes+ analysis')
-    # Prelude
-    # raise if more than two arguments are passed
-    if len(sys.argv) != 2:
-        raise ValueError(
-            'Incorrect number of arguments. Usage: courbes path-to-config.conf')
-    args = config.Config(sys.argv[1])
-    # args = config.Config("/home/gonzalezroy/Manue-Roy/config.cfg")
-    os.chdir(args.output_dir)
+    try:
+        index, n_shards = map(int, text.split('/'))
+    except ValueError:
+        raise argparse.ArgumentTypeError(f'Shards are given as i/N, not {text}')
+    if not 1 <= index <= n_shards:
+        raise argparse.ArgumentTypeError(f'Shard {text} must be in 1..N')
+    return index, n_shards
+
+
+def parse_arguments(argv=None):
+    """
+    Parse the command line arguments of courbes
+
+    Args:
+        argv: list of arguments (defaults to sys.argv[1:])
+
+    Returns:
+        the parsed arguments namespace
+    """
+    parser = argparse.ArgumentParser(
+        prog='courbes',
+        description='Automated statistics extraction from (multi-replica) MD'
+                    ' simulations with Curves+. Run `courbes merge` to merge'
+                    ' the results of sharded runs, `courbes validate` to'
+                    ' compare the native sections with Curves+, and `courbes'
+                    ' convergence` to follow the convergence of the'
+                    ' descriptors over the frames of a run.')
+    parser.add_argument('config', nargs='+',
+                        help='path to the configuration file. Several files'
+                             ' are processed as a batch sharing the curves+'
+                             ' processes, and each system is then compared'
+                             ' to the first one')
+    parser.add_argument('--profile', action='store_true',
+                        help='profile each pipeline stage (cProfile) and track'
+                             ' its peak memory')
+    parser.add_argument('--n-workers', type=int, default=None,
+                        help='concurrent curves+ processes of the whole batch'
+                             ' (defaults to the largest n_workers of the'
+                             ' configuration files)')
+    parser.add_argument('--shard', type=parse_shard, default=None,
+                        metavar='i/N',
+                        help='only process the i-th of N contiguous frame'
+                             ' ranges, to be merged with `courbes merge`')
+    parser.add_argument('--dry-run', action='store_true',
+                        help='estimate the wall time, disk and memory needed'
+                             ' from a few frames, without running the'
+                             ' analysis')
+    return parser.parse_args(argv)
+
+
+def parse_merge_arguments(argv=None):
+    """
+    Parse the command line arguments of courbes merge
+
+    Args:
+        argv: list of arguments following `merge`
+
+    Returns:
+        the parsed arguments namespace
+    """
+    parser = argparse.ArgumentParser(
+        prog='courbes merge',
+        description='Merge the shards of sharded courbes+ runs into a'
+                    ' regular report')
+    parser.add_argument('config', nargs='+',
+                        help='path to the configuration file used by the'
+                             ' shards (several for batches)')
+    return parser.parse_args(argv)
+
+
+def parse_validate_arguments(argv=None):
+    """
+    Parse the command line arguments of courbes validate
+
+    Args:
+        argv: list of arguments following `validate`
+
+    Returns:
+        the parsed arguments namespace
+    """
+    parser = argparse.ArgumentParser(
+        prog='courbes validate',
+        description='Compare the native sections with curves+ on the frames'
+                    ' of a configuration')
+    parser.add_argument('config', help='path to the configuration file')
+    parser.add_argument('--sections', nargs='+', default=None,
+                        help='sections to validate (defaults to the native'
+                             ' sections of the configuration, or to all the'
+                             ' sections that can be computed natively)')
+    parser.add_argument('--tolerance', nargs='+', default=[],
+                        metavar='DESCRIPTOR=VALUE',
+                        help='maximum absolute deviation of descriptors'
+                             ' (defaults to 5 degrees for angles, 0.5 A'
+                             ' otherwise, and 5%% of disagreeing frames for'
+                             ' labels)')
+    return parser.parse_args(argv)
+
+
+def parse_convergence_arguments(argv=None):
+    """
+    Parse the command line arguments of courbes convergence
+
+    Args:
+        argv: list of arguments following `convergence`
+
+    Returns:
+        the parsed arguments namespace
+    """
+    parser = argparse.ArgumentParser(
+        prog='courbes convergence',
+        description='Compute the cumulative and windowed means and SEM of'
+                    ' the descriptors of finished runs over their frames')
+    parser.add_argument('config', nargs='+',
+                        help='path to the configuration file of the run'
+                             ' (several for batches)')
+    parser.add_argument('--points', type=int, default=None,
+                        help='number of frame counts at which the statistics'
+                             ' are reported (defaults to 100)')
+    parser.add_argument('--window', type=int, default=None,
+                        help='frames of the moving window (defaults to a'
+                             ' tenth of the frames)')
+    parser.add_argument('--plot', action='store_true',
+                        help='plot the convergence of each descriptor')
+    return parser.parse_args(argv)
+
+
+def get_frame_ranges(args, shard=None):
+    """
+    Get the frames to process in each trajectory of a configuration
+
+    Args:
+        args: parsed configuration (config.Config)
+        shard: tuple (shard index starting at 1, number of shards)
+
+    Returns:
+        a list of (trajectory, first frame, last frame)
+    """
+    if shard is None:
+        return [(x, args.first, args.last) for x in args.trajs]
+    from courbes import sharding
+
+    return sharding.get_shard_ranges(args.trajs, args.first, args.last,
+                                     args.stride, shard)
+
+
+def get_work_dir(args, shard=None):
+    """
+    Get the directory where the frames of a configuration are processed
+
+    Args:
+        args: parsed configuration (config.Config)
+        shard: tuple (shard index starting at 1, number of shards)
+
+    Returns:
+        the absolute path to the output dir, or to the shard dir
+    """
+    output_dir = os.path.abspath(args.output_dir)
+    if shard is None:
+        return output_dir
+    from courbes import sharding
+
+    shard_dir = sharding.get_shard_dir(output_dir, shard)
+    os.makedirs(shard_dir, exist_ok=True)
+    return shard_dir
+
+
+def prepare_curves(args, on_frame_done=None, shard=None):
+    """
+    Prepare the curves+ processing of the frames of a configuration
+
+    Args:
+        args: parsed configuration (config.Config)
+        on_frame_done: callback receiving the index of each processed frame
+        shard: tuple (shard index starting at 1, number of shards)
+
+    Returns:
+        a tuple (CurvesScheduler, iterator of chunks, dict of frame labels
+        filled while the chunks are consumed, NativeCollector of the native
+        sections or None)
+    """
+    from courbes import scheduler
+
     curves_man = cmn.CurvesWrapper(args.curves_exe, args.lib_path)
+    ranges = get_frame_ranges(args, shard)
 
-    # Run curves+ for every frame in mono-proc
-    index = 0
-    for traj in args.trajs:
-        sliced_trajs = cmn.slice_traj(args.topology, traj, args.selection,
-                                      init=args.first, stride=args.stride)
+    # Alternate the chunks of the replicas so that they progress together
+    frame_labels = {}
+    chunks = cmn.iter_indexed_chunks(
+        args.topology, [x[0] for x in ranges], args.selection,
+        stride=args.stride, labels=frame_labels, interleave=True,
+        ranges={x[0]: x[1:] for x in ranges}, chunk_size=args.chunk_size)
 
-        # If last is -1, process all frames
-        if args.last == -1:
-            for sub_traj in sliced_trajs:
-                for frame in sub_traj:
-                    index += 1
-                    cmn.process_frame(frame, index, curves_man, args)
+    # Native sections are computed as the chunks are read, and curves+ only
+    # receives them if some section still needs it
+    collector = None
+    native = [x for x in args.native if x in args.sections]
+    if native:
+        from courbes import native as nat
 
-        # Else, process frames from first to last with stride
-        else:
-            current_frame = args.first
-            for sub_traj in sliced_trajs:
-                for frame in sub_traj:
-
-                    # Stop the subtraj (chunk) loop if current_frame > last
-                    if current_frame > args.last:
-                        break
-
-                    index += 1
-                    cmn.process_frame(frame, index, curves_man, args)
-                    current_frame += args.stride
-
-                # Stop the traj loop if current_frame > last
-                if current_frame > args.last:
-                    break
-
-    # Launch parsing of lis files
-    lis_paths = cmn.sort_files_by_extension('lis')
-    lis_parsed = parsing.CourbesParserMulti(lis_paths)
-    lis_parsed.concat_info()
-    lis_parsed.get_descriptors()
-    lis_parsed.get_identifiers()
+        collector = nat.NativeCollector(args.strands, native)
+        chunks = collector.wrap(chunks, forward=bool(args.curves_sections),
+                                on_frame_done=on_frame_done)
+    curves_scheduler = scheduler.CurvesScheduler(
+        curves_man, args.strands, n_workers=args.n_workers,
+        timeout=args.timeout, retries=args.retries,
+        on_frame_done=on_frame_done, n_writers=args.n_writers,
+        work_dir=get_work_dir(args, shard),
+        keep_axis='curvature' in args.sections)
+    return curves_scheduler, chunks, frame_labels, collector
+
+
+def write_report(args, curves_scheduler, frame_labels, shard=None,
+                 collector=None, datasets=None):
+    """
+    Parse the curves+ results of a configuration and write its report
+
+    Args:
+        args: parsed configuration (config.Config)
+        curves_scheduler: CurvesScheduler that processed the frames
+        frame_labels: dict of index: (trajectory, frame number)
+        shard: tuple (shard index starting at 1, number of shards). Shards
+               only write their results as a binary shard file
+        collector: NativeCollector of the native sections (if any)
+        datasets: dict receiving the CourbesDataset of the configuration (by
+                  config path), to compare the systems of a batch
+
+    Returns:
+        the identifiers of the base pairs of each section (None for shards)
+    """
+    from courbes import analysis, scheduler
+
+    output_dir = get_work_dir(args, shard)
+
+    # Launch parsing of lis files (pooled replica by replica)
+    replicas = analysis.group_replicas(frame_labels, args.trajs)
+    order = [x for indices in replicas.values() for x in indices]
+    lis_paths = None
+    # The curvature only needs the helical axis, not the .lis
+    if any(x != 'curvature' for x in args.curves_sections):
+        lis_paths = [curves_scheduler.lis_paths[x] for x in order]
+    axes = curves_scheduler.axes if 'curvature' in args.sections else None
+    lis_parsed = analysis.parse_sections(lis_paths, order, args.sections,
+                                         collector, axes)
     # Clean lis files
-    [os.remove(lis) for lis in cmn.recursive_finder('*.lis')]
+    [os.remove(lis) for lis in curves_scheduler.lis_paths.values()
+     if lis is not None]
 
-    # Write descriptors
-    parsing.write_descriptors('axis', lis_parsed.descriptors_bp_axes)
-    parsing.write_descriptors('inter', lis_parsed.descriptors_bp_inters)
-    parsing.write_descriptors('groove', lis_parsed.descriptors_grooves)
-    parsing.write_descriptors('backbone', lis_parsed.descriptors_backbones)
-    parsing.write_descriptors('intra', lis_parsed.descriptors_bp_intras)
+    # Frames failed in curves+, or whose .lis could not be parsed
+    failed = analysis.collect_failed(curves_scheduler.failed, lis_parsed,
+                                     order)
+    failed_path = os.path.join(output_dir, failed_name)
+    if failed:
+        scheduler.write_failed(failed_path, failed, frame_labels)
+        print(f'{len(failed)} frames failed in curves+ (or left an'
+              f' unparsable .lis) and are reported as NaN (see {failed_path})')
+
+    frames = [frame_labels[x][1] for x in order]
+    names = [x for x, indices in replicas.items() for _ in indices]
+    if shard is not None:
+        from courbes import sharding
+
+        dataset = analysis.CourbesDataset.from_parser(lis_parsed, frames,
+                                                      names)
+        sharding.write_shard(os.path.join(output_dir, sharding.shard_name),
+                             dataset)
+        return None
+    if datasets is not None:
+        datasets[args.config_raw] = analysis.CourbesDataset.from_parser(
+            lis_parsed, frames, names)
+
+    # Write pooled descriptors, then those of each replica
+    starts = [0]
+    for indices in list(replicas.values())[:-1]:
+        starts.append(starts[-1] + len(indices))
+    analysis.write_sections(output_dir, lis_parsed, starts=starts)
+    if len(replicas) > 1:
+        start = 0
+        for name, indices in replicas.items():
+            positions = list(range(start, start + len(indices)))
+            start += len(indices)
+            replica_dir = os.path.join(output_dir, replicas_dir, name)
+            analysis.write_sections(replica_dir, lis_parsed, positions)
 
     # Plot stats and diff
     identifiers = {
@@ -76,16 +331,295 @@ def run():
         'inter': lis_parsed.ids_bp_inters,
         'backbone': lis_parsed.ids_backbones,
         'groove': lis_parsed.ids_grooves,
-        'axis': lis_parsed.ids_bp_axes
+        'axis': lis_parsed.ids_bp_axes,
+        'curvature': lis_parsed.ids_curvatures
     }
+    plot_report(args, identifiers)
+    return identifiers
+
+
+def plot_report(args, identifiers):
+    """
+    Plot the stats of a configuration, and their diff with a reference
+
+    Args:
+        args: parsed configuration (config.Config)
+        identifiers: identifiers of the base pairs of each section
+    """
+    from courbes import plots as plts
+
+    output_dir = os.path.abspath(args.output_dir)
     if args.plot_stats:
-        plts.plot_stats(args.output_dir, identifiers)
+        plts.plot_stats(output_dir, identifiers)
     if args.plot_diff:
-        tar_dir = args.output_dir
         ref_dir = plts.is_courbes_dir(args.plot_diff)
         if ref_dir:
-            plts.plot_diff(tar_dir, ref_dir, identifiers)
+            plts.plot_diff(output_dir, ref_dir, identifiers)
         else:
             raise ValueError(f'No stats files found in {args.plot_diff}')
 
-    print(f"Normal termination for {sys.argv[1]}")
+
+def check_systems(systems):
+    """
+    Check that the systems of a batch do not write to the same output dir
+
+    Args:
+        systems: list of parsed configurations (config.Config)
+
+    Raises:
+        ValueError: if two systems share their output dir
+    """
+    seen = {}
+    for args in systems:
+        output_dir = os.path.abspath(args.output_dir)
+        if output_dir in seen:
+            raise ValueError(f'{seen[output_dir]} and {args.config_raw} both'
+                             f' write to {output_dir}. Please give each'
+                             f' system its own output_dir')
+        seen[output_dir] = args.config_raw
+
+
+def compare_systems(systems, identifiers, datasets=None):
+    """
+    Compare every system of a batch to the first one (unless its config sets
+    another reference). Systems are named by the path of their config, and
+    the tables of the comparisons are written to the output dir of the first
+    one
+
+    Args:
+        systems: list of parsed configurations (config.Config)
+        identifiers: list of the identifiers of the base pairs of each system
+        datasets: dict of config path: CourbesDataset of each system, to test
+                  the significance of the changes and get their confidence
+                  intervals
+    """
+    from courbes import plots as plts
+
+    ref_dir = os.path.abspath(systems[0].output_dir)
+    compared = [systems[0]] + [x for x in systems[1:] if not x.plot_diff]
+    for args in systems[1:]:
+        if args.plot_diff:
+            print(f'{args.config_raw} sets plot_diff: it is compared to'
+                  f' {args.plot_diff} only, and left out of the batch'
+                  f' comparisons')
+
+    # Bootstrap intervals of the changes of every descriptor and bp
+    intervals = {}
+    if datasets and len(compared) > 1:
+        import pandas as pd
+
+        from courbes import bootstrap
+
+        reference = systems[0].config_raw
+        for args in compared[1:]:
+            table = bootstrap.difference_intervals(datasets[args.config_raw],
+                                                   datasets[reference])
+            table.insert(0, 'system', args.config_raw)
+            table.insert(1, 'reference_system', reference)
+            intervals[args.config_raw] = table
+        intervals_path = os.path.join(ref_dir, intervals_name)
+        pd.concat(intervals.values(), ignore_index=True).to_csv(
+            intervals_path, index=False)
+        print(f'Bootstrap intervals of the changes written to'
+              f' {intervals_path}')
+
+    for args, ids in zip(systems[1:], identifiers[1:]):
+        if not args.plot_diff:
+            plts.plot_diff(os.path.abspath(args.output_dir), ref_dir, ids,
+                           intervals.get(args.config_raw))
+
+    # Ranked changes of every descriptor and bp with respect to the first
+    if datasets and len(compared) > 1:
+        from courbes import significance
+
+        named = {x.config_raw: datasets[x.config_raw] for x in compared}
+        table = significance.compare_systems(named)
+        significance_path = os.path.join(ref_dir, significance_name)
+        table.to_csv(significance_path, index=False)
+        print(f"{int(table['significant'].sum())} significant changes of"
+              f" {len(table)} tested (see {significance_path})")
+
+
+def validate(argv=None):
+    """
+    Validate the native sections of a configuration against curves+
+    """
+    cli = parse_validate_arguments(argv)
+    print('Validating Courbes+ native sections')
+    from courbes import native, validation
+
+    tolerances = {}
+    for item in cli.tolerance:
+        name, _, value = item.partition('=')
+        tolerances[name.strip()] = float(value)
+
+    args = config.Config(cli.config)
+    sections = cli.sections or args.native or list(native.engines)
+    unknown = [x for x in sections if x not in native.engines]
+    if unknown:
+        raise ValueError(f'Sections {unknown} cannot be computed natively.'
+                         f' Choose among {list(native.engines)}')
+    report, summary, walls = validation.validate(
+        args.topology, args.trajs, args.selection, args.strands,
+        args.curves_exe, args.lib_path, sections=sections,
+        tolerances=tolerances, first=args.first, last=args.last,
+        stride=args.stride, n_workers=args.n_workers or 1,
+        timeout=args.timeout, retries=args.retries, n_writers=args.n_writers,
+        chunk_size=args.chunk_size or 100)
+
+    output_dir = os.path.abspath(args.output_dir)
+    report.to_csv(os.path.join(output_dir, validation_name), index=False)
+    summary.to_csv(os.path.join(output_dir, validation_summary_name),
+                   index=False)
+    print(summary.round(3).to_string(index=False))
+    print(f"{walls['n_frames']} frames: {walls['curves_s']:.2f} s with"
+          f" curves+, {walls['native_s']:.2f} s natively")
+    failed = summary[~summary['passed']]
+    if len(failed):
+        print(f'{len(failed)} descriptors are out of tolerance (see'
+              f' {validation_name})')
+    print(f'Normal termination for {cli.config}')
+
+
+def check_convergence(argv=None):
+    """
+    Report the convergence of the descriptors of finished runs
+    """
+    cli = parse_convergence_arguments(argv)
+    print('Checking the convergence of Courbes+ descriptors')
+    from courbes import analysis, convergence
+
+    kwargs = {'window': cli.window}
+    if cli.points is not None:
+        kwargs['n_points'] = cli.points
+    for config_path in cli.config:
+        args = config.Config(config_path)
+        output_dir = os.path.abspath(args.output_dir)
+        # Pooled report, then the report of each replica (in pooled order)
+        replicas_path = os.path.join(output_dir, replicas_dir)
+        replica_dirs = [os.path.join(replicas_path, x)
+                        for x in analysis.replica_names(args.trajs)]
+        replica_dirs = [x for x in replica_dirs if os.path.isdir(x)]
+        starts = convergence.get_replica_starts(replica_dirs)
+        root_dirs = [output_dir] + replica_dirs
+
+        for root_dir in root_dirs:
+            results = convergence.report_convergence(
+                root_dir, starts=starts if root_dir == output_dir else None,
+                **kwargs)
+            convergence.write_convergence(
+                os.path.join(root_dir, convergence_name), results)
+            summary = convergence.summarize(results)
+            summary.to_csv(os.path.join(root_dir, convergence_summary_name),
+                           index=False)
+            if cli.plot:
+                from courbes import plots as plts
+
+                plts.plot_convergence(root_dir, results)
+
+            drifting = summary[~summary['converged']]
+            print(f'{len(summary) - len(drifting)} of {len(summary)}'
+                  f' descriptors converged in {root_dir}')
+            if len(drifting):
+                print(drifting.round(3).to_string(index=False))
+    print(f"Normal termination for {', '.join(cli.config)}")
+
+
+def merge(argv=None):
+    """
+    Merge the shards of sharded runs into regular reports
+    """
+    cli = parse_merge_arguments(argv)
+    print('Merging Courbes+ shards')
+    from courbes import sharding
+
+    systems = [config.Config(x) for x in cli.config]
+    check_systems(systems)
+    identifiers = []
+    datasets = {}
+    for args in systems:
+        dataset = sharding.merge_shards(os.path.abspath(args.output_dir),
+                                        replicas_dir, failed_name)
+        datasets[args.config_raw] = dataset
+        ids = {}
+        for name, section in dataset.sections.items():
+            ids.setdefault(name.split('/')[0], section.bp_ids)
+        plot_report(args, ids)
+        identifiers.append(ids)
+    if len(systems) > 1:
+        compare_systems(systems, identifiers, datasets)
+    print(f"Normal termination for {', '.join(cli.config)}")
+
+
+def run():
+    """
+    Run the Courbes+ analysis for a set of trajectories.
+    """
+    argv = sys.argv[1:]
+    if argv[:1] == ['merge']:
+        return merge(argv[1:])
+    if argv[:1] == ['validate']:
+        return validate(argv[1:])
+    if argv[:1] == ['convergence']:
+        return check_convergence(argv[1:])
+    cli = parse_arguments(argv)
+    print('Running Courbes+ analysis')
+
+    # Heavy modules are imported once the command line is known to be valid
+    from courbes import scheduler
+
+    systems = [config.Config(x) for x in cli.config]
+    check_systems(systems)
+    # args = config.Config("/home/gonzalezroy/Manue-Roy/config.cfg")
+    # Run-wide reports go to the output (or shard) dir of the first system,
+    # as the comparisons of a batch
+    report_dir = get_work_dir(systems[0], cli.shard)
+    timings_path = os.path.join(report_dir, timings_name)
+
+    if cli.dry_run:
+        from courbes import estimate
+
+        for args in systems:
+            estimate.estimate(args, get_frame_ranges(args, cli.shard),
+                              get_work_dir(args, cli.shard), cli.n_workers)
+        return None
+
+    # Calibrate the systems whose n_workers or chunk_size are set to auto
+    for args in systems:
+        if args.n_workers is None or args.chunk_size is None:
+            from courbes import tuning
+
+            tuning.tune(args, get_frame_ranges(args, cli.shard),
+                        get_work_dir(args, cli.shard))
+
+    # Instrument the run (the report is refreshed while frames are processed)
+    totals = [cmn.count_frames(traj, first, last, args.stride)
+              for args in systems
+              for traj, first, last in get_frame_ranges(args, cli.shard)]
+    profile = cli.profile or any(x.profile for x in systems)
+    recorder = timing.reset(None if None in totals else sum(totals),
+                            profile=profile)
+
+    def on_frame_done(index):
+        recorder.tick()
+        if recorder.n_frames % 100 == 0:
+            recorder.write(timings_path)
+
+    # Run curves+ for every frame of every system, sharing n_workers slots
+    jobs = [prepare_curves(args, on_frame_done, cli.shard) for args in systems]
+    n_workers = cli.n_workers or max(x.n_workers for x in systems)
+    scheduler.run_schedulers([(x[0], x[1]) for x in jobs], n_workers)
+    # Systems of a batch keep their dataset to test their changes
+    datasets = {} if len(systems) > 1 and cli.shard is None else None
+    identifiers = [write_report(args, curves_scheduler, frame_labels,
+                                cli.shard, collector, datasets)
+                   for args, (curves_scheduler, _, frame_labels, collector)
+                   in zip(systems, jobs)]
+    if datasets is not None:
+        compare_systems(systems, identifiers, datasets)
+
+    recorder.write(timings_path)
+    if isinstance(recorder, timing.ProfilingRecorder):
+        recorder.write_profiles(os.path.join(report_dir, profiles_dir))
+    recorder.close()
+    print(f"Normal termination for {', '.join(cli.config)}")
@@ -0,0 +1,313 @@
+# Created by roy.gonzalez-aleman at 19/10/2026
+"""
+Asynchronous execution of curves+ over the frames of a trajectory
+"""
+import asyncio
+import json
+import os
+import time
+
+import courbes.commons as cmn
+from courbes import curvature, sharing, timing
+
+
+class CurvesScheduler:
+    """
+    Run curves+ processes with bounded concurrency, timeouts and retries
+
+    Up to n_workers curves+ processes run in the background while PDB files
+    are written, either in the main thread or, if n_writers > 0, by a pool of
+    processes reading the coordinates of each chunk from shared memory. A
+    frame whose curves+ run keeps failing (non-zero exit, timeout, missing
+    .lis or error writing its PDB) is recorded in `failed` and its .lis path
+    is returned as None, so parsing masks it as NaN. If keep_axis is True,
+    the helical axis of each frame is read into `axes` before the curves+
+    side files are cleaned. The seconds spent writing the PDB of each frame
+    and running curves+ on it are kept in `durations`. If keep_files is True,
+    the PDB and side files of each frame are left in the work dir (e.g. to
+    measure them).
+    """
+
+    def __init__(self, curves_man, strands, n_workers=1, timeout=None,
+                 retries=0, on_frame_done=None, n_writers=0, work_dir=None,
+                 keep_axis=False, keep_files=False):
+        self.curves_man = curves_man
+        self.strands = strands
+        self.n_workers = max(int(n_workers), 1)
+        self.timeout = timeout if timeout else None
+        self.retries = max(int(retries), 0)
+        self.on_frame_done = on_frame_done
+        self.n_writers = max(int(n_writers), 0)
+        self.work_dir = work_dir or os.curdir
+        self.keep_axis = keep_axis
+        self.keep_files = keep_files
+        self.lis_paths = {}
+        self.axes = {}
+        self.failed = {}
+        self.durations = {}
+        self.tasks = []
+        self.pool = None
+
+    def run(self, chunks):
+        """
+        Process the frames of trajectory chunks with curves+
+
+        Args:
+            chunks: iterable of (list of frame indices, mdtraj chunk)
+
+        Returns:
+            the .lis paths sorted by index (None for failed frames)
+        """
+        run_schedulers([(self, chunks)], self.n_workers)
+        return [self.lis_paths[x] for x in sorted(self.lis_paths)]
+
+    async def submit(self, indices, chunk, slots):
+        """
+        Write the PDBs of a chunk and start their curves+ runs
+
+        Args:
+            indices: indices of the frames of the chunk
+            chunk: mdtraj chunk
+            slots: semaphore bounding the concurrent curves+ runs
+        """
+        shared = None
+        if self.n_writers:
+            if self.pool is None:
+                self.pool = self._start_pool(chunk.topology)
+            shared = sharing.SharedChunk(chunk.xyz)
+        writes = []
+        for offset, index in enumerate(indices):
+            # Do not write PDBs far ahead of the running processes
+            await slots.acquire()
+            pdb_name = f'tmp_{index}.pdb'
+            pdb_path = os.path.join(self.work_dir, pdb_name)
+            if shared is None:
+                write = None
+                start = time.perf_counter()
+                try:
+                    cmn.save_mdtraj(chunk[offset], pdb_path)
+                    self.durations[index] = {
+                        'write_s': time.perf_counter() - start}
+                except Exception as error:
+                    # The frame fails on its own when its write is awaited
+                    write = asyncio.get_running_loop().create_future()
+                    write.set_exception(error)
+            else:
+                write = asyncio.get_running_loop().run_in_executor(
+                    self.pool, sharing.write_pdb, shared.name, shared.shape,
+                    offset, pdb_path)
+                writes.append(write)
+            task = asyncio.create_task(self._run_frame(index, pdb_name, write))
+            task.add_done_callback(lambda _: slots.release())
+            self.tasks.append(task)
+        if shared is not None:
+            self.tasks.append(asyncio.create_task(
+                self._release(shared, writes)))
+
+    def close(self):
+        """
+        Stop the pool of PDB writers (if any)
+        """
+        if self.pool is not None:
+            self.pool.shutdown()
+            self.pool = None
+
+    def _start_pool(self, topology):
+        """
+        Start the pool of PDB writers sharing the template of the topology
+        """
+        from concurrent.futures import ProcessPoolExecutor
+
+        template = sharing.PdbTemplate(topology)
+        return ProcessPoolExecutor(max_workers=self.n_writers,
+                                   initializer=sharing.init_worker,
+                                   initargs=(template,))
+
+    @staticmethod
+    async def _release(shared, writes):
+        """
+        Free a shared chunk once all its PDBs are written
+        """
+        await asyncio.gather(*writes, return_exceptions=True)
+        shared.release()
+
+    async def _run_frame(self, index, pdb_name, write=None):
+        """
+        Run curves+ on a frame, retrying on failures and timeouts. Any error
+        (e.g. of the PDB writer) only fails this frame
+        """
+        lis_path = os.path.join(self.work_dir, f'tmp_{index}.lis')
+        try:
+            reason = await self._process_frame(index, pdb_name, write)
+        except Exception as error:
+            reason = f'{type(error).__name__}: {error}'
+            if os.path.exists(lis_path):
+                os.remove(lis_path)
+
+        pdb_path = os.path.join(self.work_dir, pdb_name)
+        if not self.keep_files and os.path.exists(pdb_path):
+            os.remove(pdb_path)
+        if reason is None:
+            self.lis_paths[index] = lis_path
+        else:
+            self.lis_paths[index] = None
+            self.axes.pop(index, None)
+            self.failed[index] = reason
+        if self.on_frame_done is not None:
+            self.on_frame_done(index)
+
+    async def _process_frame(self, index, pdb_name, write=None):
+        """
+        Wait for the PDB of a frame and run curves+ on it
+
+        Returns:
+            None if curves+ succeeded, else the reason of the failure
+        """
+        if write is not None:
+            write_s = await write
+            timing.recorder.add('save_mdtraj', write_s)
+            self.durations[index] = {'write_s': write_s}
+        # Curves+ runs in the working directory and only sees short names
+        lis_name = f'tmp_{index}'
+        curves_input = self.curves_man.get_input(pdb_name, lis_name,
+                                                 self.strands)
+        lis_root = os.path.join(self.work_dir, lis_name)
+        lis_path = f'{lis_root}.lis'
+        reason = None
+        for _ in range(self.retries + 1):
+            start = time.perf_counter()
+            reason = await self._run_curves(curves_input)
+            curves_s = time.perf_counter() - start
+            timing.recorder.add('curves_run', curves_s)
+            self.durations.setdefault(index, {})['curves_s'] = curves_s
+            if self.keep_axis and reason is None:
+                self.axes[index] = curvature.read_axis(f'{lis_root}_X.pdb')
+            if not self.keep_files:
+                cmn.clean(lis_root)
+            if reason is None and not os.path.exists(lis_path):
+                reason = 'no .lis written'
+            if reason is None:
+                break
+            if os.path.exists(lis_path):
+                os.remove(lis_path)
+        return reason
+
+    async def _run_curves(self, curves_input):
+        """
+        Run a curves+ process
+
+        Returns:
+            None if curves+ succeeded, else the reason of the failure
+        """
+        # Only the CPU time of the children reaped while curves+ runs is
+        # charged to it (not that of, e.g., the PDB writers)
+        with timing.children('curves_run'):
+            process = await asyncio.create_subprocess_exec(
+                self.curves_man.exe_path, stdin=asyncio.subprocess.PIPE,
+                stdout=asyncio.subprocess.DEVNULL,
+                stderr=asyncio.subprocess.PIPE, cwd=self.work_dir)
+            try:
+                _, stderr = await asyncio.wait_for(
+                    process.communicate(curves_input.encode()), self.timeout)
+            except asyncio.TimeoutError:
+                process.kill()
+                await process.wait()
+                return f'timeout after {self.timeout} s'
+        if process.returncode != 0:
+            message = stderr.decode(errors='replace').strip().splitlines()
+            return (f'exit code {process.returncode}'
+                    + (f': {message[-1].strip()}' if message else ''))
+        return None
+
+
+def run_schedulers(jobs, n_workers):
+    """
+    Run several schedulers sharing the same curves+ slots
+
+    The chunks of the schedulers are submitted in turn, so that all of them
+    progress together whatever the length of their trajectories.
+
+    Args:
+        jobs: list of (CurvesScheduler, iterable of chunks)
+        n_workers: number of concurrent curves+ processes of all schedulers
+    """
+    asyncio.run(_run_schedulers(jobs, n_workers))
+
+
+async def _run_schedulers(jobs, n_workers):
+    """
+    Feed the chunks of several schedulers to max n_workers curves+ runs
+    """
+
+    def tag(scheduler, chunks):
+        for indices, chunk in chunks:
+            yield scheduler, indices, chunk
+
+    slots = asyncio.Semaphore(max(int(n_workers), 1))
+    try:
+        for scheduler, indices, chunk in cmn.round_robin(
+                [tag(*job) for job in jobs]):
+            await scheduler.submit(indices, chunk, slots)
+        await asyncio.gather(*[x for scheduler, _ in jobs
+                               for x in scheduler.tasks])
+    finally:
+        for scheduler, _ in jobs:
+            scheduler.close()
+
+
+def sample_frames(chunk, curves_man, strands, work_dir, timeout=None,
+                  n_writers=0, keep_files=False):
+    """
+    Time the frames of a chunk through a single curves+ worker, as a run
+    would process them, without recording them in the timings of the run
+
+    Args:
+        chunk: mdtraj chunk
+        curves_man: CurvesWrapper object
+        strands: lines of the curves+ strands block
+        work_dir: directory where the frames are processed
+        timeout: seconds after which a curves+ run is killed (None to wait)
+        n_writers: number of processes writing PDBs (0 for the main thread)
+        keep_files: keep the PDB and curves+ side files of each frame
+
+    Returns:
+        a tuple (CurvesScheduler that processed the frames, list of the
+        durations of the frames that succeeded, as dicts with write_s and
+        curves_s)
+    """
+    curves_scheduler = CurvesScheduler(
+        curves_man, strands, timeout=timeout, n_writers=n_writers,
+        work_dir=work_dir, keep_files=keep_files)
+    with timing.recording(timing.StageRecorder()):
+        curves_scheduler.run([(list(range(1, chunk.n_frames + 1)), chunk)])
+    durations = [curves_scheduler.durations[x]
+                 for x in sorted(curves_scheduler.lis_paths)
+                 if curves_scheduler.lis_paths[x] is not None]
+    if not durations:
+        reasons = sorted(set(curves_scheduler.failed.values()))
+        raise ValueError(f'Curves+ failed on all the sampled frames:'
+                         f' {"; ".join(reasons)}')
+    return curves_scheduler, durations
+
+
+def write_failed(out_path, failed, frame_labels=None):
+    """
+    Write the frames whose curves+ run failed as a JSON file
+
+    Args:
+        out_path: path to the output .json
+        failed: dict of index: reason
+        frame_labels: dict of index: (trajectory, frame number)
+
+    Returns:
+        out_path
+    """
+    frame_labels = frame_labels or {}
+    records = []
+    for index in sorted(failed):
+        traj, frame_number = frame_labels.get(index, (None, None))
+        records.append({'index': index, 'trajectory': traj,
+                        'frame': frame_number, 'reason': failed[index]})
+    with open(out_path, 'wt') as out_file:
+        json.dump(records, out_file, indent=2)
+    return out_path
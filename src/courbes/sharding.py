@@ -0,0 +1,337 @@
+# Created by roy.gonzalez-aleman at 19/10/2026
+"""
+Sharded execution of courbes+ over contiguous frame ranges, and merging
+
+Each shard stores its parsed descriptors and their streaming statistics as a
+binary shard.npz, so that merging only concatenates arrays and combines
+statistics instead of re-parsing text reports.
+"""
+import glob
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+import courbes.commons as cmn
+from courbes import analysis, parsing
+from courbes.stats import StreamingStats, is_angular, replica_starts
+
+# Directory of the output dir receiving one sub-directory per shard
+shards_dir = 'shards'
+
+# Name of the binary results of a shard
+shard_name = 'shard.npz'
+
+
+def get_shard_dir(output_dir, shard):
+    """
+    Get the directory of a shard
+
+    Args:
+        output_dir: output directory of the configuration
+        shard: tuple (shard index starting at 1, number of shards)
+
+    Returns:
+        the path to the shard directory
+    """
+    index, n_shards = shard
+    return os.path.join(output_dir, shards_dir, f'{index}-of-{n_shards}')
+
+
+def get_shard_ranges(trajs, first, last, stride, shard):
+    """
+    Get the frames of a shard as contiguous ranges of the trajectories
+
+    The frames selected by first/last/stride in all the trajectories (taken
+    one after another) are split into contiguous shards of equal size.
+
+    Args:
+        trajs: list of paths to the trajectories
+        first: first frame to consider
+        last: last frame to consider (-1 means until the end)
+        stride: stride
+        shard: tuple (shard index starting at 1, number of shards)
+
+    Returns:
+        a list of (trajectory, first frame, last frame) of the shard
+    """
+    index, n_shards = shard
+    counts = []
+    for traj in trajs:
+        n_frames = cmn.count_frames(traj, first, last, stride)
+        if n_frames is None:
+            raise ValueError(f'The length of {traj} cannot be known without'
+                             f' reading it. Please set last to shard it.')
+        counts.append(n_frames)
+
+    total = sum(counts)
+    start = (index - 1) * total // n_shards
+    stop = index * total // n_shards
+    ranges = []
+    offset = 0
+    for traj, n_frames in zip(trajs, counts):
+        low, high = max(start - offset, 0), min(stop - offset, n_frames)
+        if low < high:
+            ranges.append((traj, first + low * stride,
+                           first + (high - 1) * stride))
+        offset += n_frames
+    if not ranges:
+        raise ValueError(f'Shard {index}/{n_shards} has no frames: there are'
+                         f' only {total} frames to process')
+    return ranges
+
+
+def replica_stats(dataset):
+    """
+    Get the streaming statistics of every section of each replica
+
+    Args:
+        dataset: CourbesDataset
+
+    Returns:
+        a dict of replica name: dict of section name: StreamingStats
+    """
+    stats = {}
+    for name in dataset.replica_names:
+        mask = dataset.replicas == name
+        stats[name] = {x: StreamingStats.from_values(y.values[:, mask])
+                       for x, y in dataset.sections.items()}
+    return stats
+
+
+def write_shard(out_path, dataset):
+    """
+    Write the descriptors of a shard and their statistics as a .npz file
+
+    Args:
+        out_path: path to the output .npz
+        dataset: CourbesDataset of the frames of the shard
+
+    Returns:
+        out_path
+    """
+    names = list(dataset.sections)
+    replicas = dataset.replica_names
+    stats = replica_stats(dataset)
+    arrays = {'sections': np.asarray(names, dtype=str),
+              'frames': dataset.frames,
+              'replicas': dataset.replicas,
+              'replica_names': np.asarray(replicas, dtype=str)}
+    for i, name in enumerate(names):
+        section = dataset.sections[name]
+        arrays[f's{i}_descriptors'] = np.asarray(section.descriptors,
+                                                 dtype=str)
+        arrays[f's{i}_values'] = section.values
+        arrays[f's{i}_bp_index'] = section.bp_index
+        arrays[f's{i}_bp_ids'] = np.asarray(section.bp_ids, dtype=str)
+        arrays[f's{i}_categorical'] = np.asarray(list(section.categorical),
+                                                 dtype=str)
+        for j, values in enumerate(section.categorical.values()):
+            arrays[f's{i}_categorical_{j}'] = np.asarray(values, dtype=str)
+        for field in ('count', 'mean', 'm2', 'min', 'max'):
+            arrays[f's{i}_{field}'] = np.stack(
+                [getattr(stats[x][name], field) for x in replicas])
+    np.savez(out_path, **arrays)
+    return out_path
+
+
+def read_shard(shard_path):
+    """
+    Read the results of a shard written by write_shard
+
+    Args:
+        shard_path: path to the shard .npz
+
+    Returns:
+        a tuple (CourbesDataset, dict of replica: section: StreamingStats)
+    """
+    with np.load(shard_path, allow_pickle=False) as arrays:
+        names = arrays['sections'].tolist()
+        frames = arrays['frames']
+        replicas = arrays['replica_names'].tolist()
+        sections = {}
+        stats = {x: {} for x in replicas}
+        for i, name in enumerate(names):
+            categorical = {x: arrays[f's{i}_categorical_{j}'] for j, x in
+                           enumerate(arrays[f's{i}_categorical'].tolist())}
+            sections[name] = analysis.Section(
+                name, arrays[f's{i}_descriptors'].tolist(),
+                arrays[f's{i}_values'], frames, arrays[f's{i}_bp_index'],
+                arrays[f's{i}_bp_ids'].tolist(), categorical)
+            fields = [arrays[f's{i}_{x}'] for x in
+                      ('count', 'mean', 'm2', 'min', 'max')]
+            for k, replica in enumerate(replicas):
+                stats[replica][name] = StreamingStats(*[x[k] for x in fields])
+        dataset = analysis.CourbesDataset(sections, frames,
+                                          replicas=arrays['replicas'])
+    return dataset, stats
+
+
+def find_shards(output_dir):
+    """
+    Find the shards of a configuration, checking that none is missing
+
+    Args:
+        output_dir: output directory of the configuration
+
+    Returns:
+        the paths to the shard .npz files sorted by shard index
+    """
+    found = {}
+    pattern = os.path.join(output_dir, shards_dir, '*-of-*', shard_name)
+    for shard_path in glob.glob(pattern):
+        label = os.path.basename(os.path.dirname(shard_path))
+        index, n_shards = map(int, label.split('-of-'))
+        found.setdefault(n_shards, {})[index] = shard_path
+    if not found:
+        raise ValueError(f'No shard found in {output_dir}')
+    if len(found) > 1:
+        raise ValueError(f'Shards of different splits found in {output_dir}:'
+                         f' {sorted(found)} shards')
+
+    n_shards, shards = found.popitem()
+    missing = [x for x in range(1, n_shards + 1) if x not in shards]
+    if missing:
+        raise ValueError(f'Missing shards {missing} of {n_shards} in'
+                         f' {output_dir}')
+    return [shards[x] for x in range(1, n_shards + 1)]
+
+
+def concat_datasets(datasets):
+    """
+    Concatenate the frames of several datasets with the same sections
+
+    Args:
+        datasets: list of CourbesDataset
+
+    Returns:
+        a CourbesDataset
+    """
+    first = datasets[0]
+    frames = np.concatenate([x.frames for x in datasets])
+    sections = {}
+    for name, section in first.sections.items():
+        parts = [x.sections[name] for x in datasets]
+        categorical = {x: np.concatenate([y.categorical[x] for y in parts])
+                       for x in section.categorical}
+        sections[name] = analysis.Section(
+            name, section.descriptors,
+            np.concatenate([x.values for x in parts], axis=1), frames,
+            section.bp_index, section.bp_ids, categorical)
+    replicas = np.concatenate([x.replicas for x in datasets])
+    return analysis.CourbesDataset(sections, frames, replicas=replicas)
+
+
+def merge_stats(stats):
+    """
+    Merge the statistics of the replicas of several shards
+
+    Args:
+        stats: list of dict of replica: section: StreamingStats
+
+    Returns:
+        a tuple (dict of replica: section: merged StreamingStats, dict of
+        section: StreamingStats pooling all the replicas)
+    """
+    merged = {}
+    for shard_stats in stats:
+        for replica, sections in shard_stats.items():
+            current = merged.setdefault(replica, {})
+            for name, section_stats in sections.items():
+                if name in current:
+                    section_stats = current[name].merge(section_stats)
+                current[name] = section_stats
+
+    pooled = {}
+    for sections in merged.values():
+        for name, section_stats in sections.items():
+            if name in pooled:
+                section_stats = pooled[name].merge(section_stats)
+            pooled[name] = section_stats
+    return merged, pooled
+
+
+def write_section_report(root_dir, section, stats, positions=None,
+                         starts=None):
+    """
+    Write the descriptors of a section as written by parsing.write_descriptors
+
+    Args:
+        root_dir: directory receiving one sub-directory per section
+        section: analysis.Section
+        stats: StreamingStats of the section
+        positions: positions of the frames to write (all if None)
+        starts: first frame of each replica pooled in the written frames (a
+                single replica if None)
+    """
+    section_dir, _, sub_case = section.name.partition('/')
+    out_dir = os.path.join(root_dir, section_dir)
+    os.makedirs(out_dir, exist_ok=True)
+    prefix = f'{sub_case}_' if sub_case else ''
+    if positions is None:
+        positions = np.arange(section.frames.size)
+
+    for i, descriptor in enumerate(section.descriptors):
+        df = pd.DataFrame(section.values[i][positions],
+                          columns=section.bp_index)
+        parsing.write_dataframe(
+            os.path.join(out_dir, f'{prefix}{descriptor}.txt'), df)
+        parsing.write_dataframe(
+            os.path.join(out_dir, f'{prefix}{descriptor}_stats.txt'),
+            stats.to_frame(i, section.bp_index,
+                           section.values[i][positions],
+                           is_angular(descriptor), starts))
+
+    # Labels (e.g. sugar puckers) have no statistics
+    for descriptor, values in section.categorical.items():
+        df = pd.DataFrame(values[positions],
+                          columns=section.bp_index).replace('nan', np.nan)
+        parsing.write_dataframe(
+            os.path.join(out_dir, f'{prefix}{descriptor}.txt'), df)
+        parsing.write_dataframe(
+            os.path.join(out_dir, f'{prefix}{descriptor}_stats.txt'),
+            pd.DataFrame())
+
+
+def merge_shards(output_dir, replicas_dir, failed_name):
+    """
+    Merge the shards of a configuration into a courbes+ report
+
+    Args:
+        output_dir: output directory of the configuration
+        replicas_dir: sub-directory receiving the report of each replica
+        failed_name: name of the report of the frames that failed in curves+
+
+    Returns:
+        the merged CourbesDataset
+    """
+    shard_paths = find_shards(output_dir)
+    read = [read_shard(x) for x in shard_paths]
+    dataset = concat_datasets([x[0] for x in read])
+    merged, pooled = merge_stats([x[1] for x in read])
+
+    # Pooled report, then the report of each replica
+    starts = replica_starts(dataset.replicas)
+    for name, section in dataset.sections.items():
+        write_section_report(output_dir, section, pooled[name],
+                             starts=starts)
+    if len(merged) > 1:
+        for replica, sections in merged.items():
+            positions = np.flatnonzero(dataset.replicas == replica)
+            replica_dir = os.path.join(output_dir, replicas_dir, replica)
+            for name, section in dataset.sections.items():
+                write_section_report(replica_dir, section, sections[name],
+                                     positions)
+
+    # Frames that failed in any shard
+    failed = []
+    for shard_path in shard_paths:
+        failed_path = os.path.join(os.path.dirname(shard_path), failed_name)
+        if os.path.exists(failed_path):
+            with open(failed_path, 'rt') as failed_file:
+                failed.extend(json.load(failed_file))
+    if failed:
+        with open(os.path.join(output_dir, failed_name), 'wt') as failed_file:
+            json.dump(failed, failed_file, indent=2)
+    return dataset
@@ -0,0 +1,195 @@
+# Created by roy.gonzalez-aleman at 19/10/2026
+"""
+Shared-memory hand-off of trajectory frames to PDB-writing workers
+
+Coordinates of each trajectory chunk are copied once into shared memory.
+Workers receive only the name of the shared block and a frame offset, and
+format the PDB themselves from a topology template sent once per worker.
+"""
+import sys
+import time
+from collections import OrderedDict
+from multiprocessing import shared_memory
+
+import numpy as np
+
+# Chain names used by mdtraj when the topology defines none
+chain_names = 'ABCDEFGHIJKLMNOPQRSTUVWXYZ'
+
+# Shared blocks kept attached by each worker (chunks are consumed in order)
+max_attached = 4
+
+
+class PdbTemplate:
+    """
+    Pre-formatted PDB records of a topology, filled with coordinates later
+    """
+
+    def __init__(self, topology):
+        self.n_atoms = topology.n_atoms
+        self.template = self.build(topology)
+
+    @staticmethod
+    def build(topology):
+        """
+        Build the %-format template of a PDB model as mdtraj writes it
+
+        Args:
+            topology: mdtraj topology
+
+        Returns:
+            the template string with three %8.3f fields per atom
+        """
+        lines = []
+        index = 1
+        # Serials of the topology are only kept for single chains
+        own_serials = topology.n_chains < 2
+        for chain_index, chain in enumerate(topology.chains):
+            chain_name = (getattr(chain, 'chain_id', None) or
+                          chain_names[chain_index % len(chain_names)])[:1]
+            for res in chain.residues:
+                for atom in res.atoms:
+                    symbol = atom.element.symbol if atom.element else ' '
+                    if (len(atom.name) < 4 and atom.name[:1].isalpha()
+                            and len(symbol.strip()) < 2):
+                        atom_name = ' ' + atom.name
+                    else:
+                        atom_name = atom.name[:4]
+                    serial = (atom.serial if own_serials and atom.serial
+                              is not None else index)
+                    charge = getattr(atom, 'formal_charge', None)
+                    charge = (f'{abs(charge)}{"-" if charge < 0 else "+"}'
+                              if charge else '  ')
+                    segment = getattr(atom, 'segment_id', '')[:4]
+                    prefix = (f'ATOM  {serial % 100000:5d} {atom_name:<4s}'
+                              f' {res.name[:3]:>3s} {chain_name:1s}'
+                              f'{res.resSeq % 10000:4d}    ')
+                    suffix = (f'  1.00  0.00      {segment:<4s}'
+                              f'{symbol[-2:]:>2s}{charge}')
+                    lines.append(prefix.replace('%', '%%')
+                                 + '%8.3f%8.3f%8.3f'
+                                 + suffix.replace('%', '%%'))
+                    index += 1
+            # The TER record of a chain takes the serial after its last atom
+            if chain.n_residues:
+                lines.append(f'TER   {(serial + 1) % 100000:5d}      '
+                             f'{res.name[:3]:>3s} {chain_name:1s}'
+                             f'{res.resSeq % 10000:4d}')
+                index += 1
+        lines.append('END')
+        return '\n'.join(lines) + '\n'
+
+    def format(self, xyz):
+        """
+        Format the coordinates of a frame
+
+        Args:
+            xyz: (n_atoms, 3) coordinates in nm (mdtraj units)
+
+        Returns:
+            the PDB text
+        """
+        return self.template % tuple((np.asarray(xyz) * 10).ravel().tolist())
+
+    def write(self, xyz, pdb_path):
+        """
+        Write the coordinates of a frame as a PDB file
+
+        Args:
+            xyz: (n_atoms, 3) coordinates in nm (mdtraj units)
+            pdb_path: path to the output pdb
+
+        Returns:
+            pdb_path
+        """
+        with open(pdb_path, 'wt') as pdb_file:
+            pdb_file.write(self.format(xyz))
+        return pdb_path
+
+
+class SharedChunk:
+    """
+    Coordinates of a trajectory chunk placed once in shared memory
+    """
+
+    def __init__(self, xyz):
+        xyz = np.ascontiguousarray(xyz, dtype=np.float32)
+        self.shape = xyz.shape
+        self.shm = shared_memory.SharedMemory(create=True,
+                                              size=max(xyz.nbytes, 1))
+        shared = np.ndarray(self.shape, dtype=np.float32, buffer=self.shm.buf)
+        shared[:] = xyz
+        self.name = self.shm.name
+
+    def release(self):
+        """
+        Free the shared block (workers may still hold it until they detach)
+        """
+        self.shm.close()
+        self.shm.unlink()
+
+
+def attach(name):
+    """
+    Attach to an existing shared block without registering it for cleanup
+    in this process (the creator owns and unlinks it)
+
+    Args:
+        name: name of the shared block
+
+    Returns:
+        the SharedMemory object
+    """
+    if sys.version_info[:2] >= (3, 13):
+        return shared_memory.SharedMemory(name=name, track=False)
+
+    # Older pythons always register attached blocks; skip it since a forked
+    # worker shares the resource tracker of the creator
+    from multiprocessing import resource_tracker
+    register = resource_tracker.register
+    resource_tracker.register = lambda *args, **kwargs: None
+    try:
+        return shared_memory.SharedMemory(name=name)
+    finally:
+        resource_tracker.register = register
+
+
+# State of each worker process, set by init_worker
+_template = None
+_attached = OrderedDict()
+
+
+def init_worker(template):
+    """
+    Initialize a worker with the PDB template of the topology
+
+    Args:
+        template: PdbTemplate shared by all the frames
+    """
+    global _template
+    _template = template
+
+
+def write_pdb(shm_name, shape, offset, pdb_path):
+    """
+    Write the PDB of a frame stored in a shared chunk (runs in a worker)
+
+    Args:
+        shm_name: name of the shared block of the chunk
+        shape: shape of the chunk coordinates (n_frames, n_atoms, 3)
+        offset: index of the frame in the chunk
+        pdb_path: path to the output pdb
+
+    Returns:
+        the wall time spent writing the pdb
+    """
+    start = time.perf_counter()
+    shm = _attached.get(shm_name)
+    if shm is None:
+        shm = attach(shm_name)
+        _attached[shm_name] = shm
+        while len(_attached) > max_attached:
+            _attached.popitem(last=False)[1].close()
+    xyz = np.ndarray(shape, dtype=np.float32, buffer=shm.buf)[offset]
+    _template.write(xyz, pdb_path)
+    return time.perf_counter() - start
@@ -0,0 +1,328 @@
+# Created by roy.gonzalez-aleman at 19/10/2026
+"""
+Batched significance testing of the changes of every descriptor and base pair
+between systems
+
+All the descriptors of a system are stacked as the columns of a single
+(frames x columns) array and tested at once against a reference system, with
+tests accounting for the autocorrelation of the frames: Welch's t-test on the
+effective number of independent frames, or a permutation test of blocks of
+consecutive frames. p-values are corrected for multiple testing with the
+false discovery rate of Benjamini & Hochberg, and the changes are ranked.
+"""
+import os
+import warnings
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from courbes.bootstrap import get_block_size, stack_sections
+from courbes.stats import (circular_stats, effective_count, is_angular,
+                           replica_bounds, replica_starts,
+                           wrapped_difference)
+
+# Default false discovery rate of the significant changes
+fdr_level = 0.05
+
+# Default number of permutations of the permutation test
+n_permutations = 2000
+
+# Maximum number of block assignments held in memory at once
+permutations_batch_size = 2 ** 22
+
+
+def map_columns(func, values, n_jobs=None):
+    """
+    Apply a function to batches of columns in parallel threads
+
+    Args:
+        func: function of a (frames, columns) array returning (columns,) ones
+        values: (frames, columns) array
+        n_jobs: number of threads (all the cores if None)
+
+    Returns:
+        the results of func concatenated over the columns
+    """
+    n_jobs = max(min(n_jobs or os.cpu_count() or 1, values.shape[1]), 1)
+    batches = np.array_split(np.arange(values.shape[1]), n_jobs)
+    with ThreadPoolExecutor(n_jobs) as pool:
+        results = list(pool.map(lambda x: func(values[:, x]), batches))
+    return np.concatenate(results)
+
+
+def describe_columns(values, angular, n_jobs=None, starts=None):
+    """
+    Get the statistics of the columns of a system needed by the tests
+
+    Args:
+        values: (frames, columns) array
+        angular: (columns,) mask of the angles
+        n_jobs: number of threads
+        starts: first frame of each pooled replica (a single replica if None)
+
+    Returns:
+        a dict of (columns,) arrays with the mean (circular for angles), the
+        variance, the number of values and their effective number
+    """
+    values = np.asarray(values, dtype=float)
+    with warnings.catch_warnings():
+        # Columns without values are expected
+        warnings.simplefilter('ignore', RuntimeWarning)
+        mean = np.nanmean(values, axis=0)
+        if angular.any():
+            mean[angular] = circular_stats(values[:, angular])['mean']
+        deviations = values - mean
+        deviations[:, angular] = wrapped_difference(values[:, angular],
+                                                    mean[angular])
+        count = np.sum(~np.isnan(values), axis=0)
+        variance = np.nanvar(deviations, axis=0, ddof=1)
+        n_eff = map_columns(lambda x: effective_count(x, starts), deviations,
+                            n_jobs)
+    return {'mean': mean, 'variance': variance, 'count': count,
+            'n_eff': n_eff, 'deviations': deviations}
+
+
+def welch_test(target, reference, difference):
+    """
+    Welch's t-test of the differences of the means of two systems, on their
+    effective numbers of independent frames
+
+    Args:
+        target: dict returned by describe_columns for the target system
+        reference: dict returned by describe_columns for the reference system
+        difference: (columns,) target - reference differences of the means
+
+    Returns:
+        a tuple of (columns,) arrays (t statistics, two-sided p-values)
+    """
+    from scipy import special
+
+    with np.errstate(invalid='ignore', divide='ignore'):
+        var_t = target['variance'] / target['n_eff']
+        var_r = reference['variance'] / reference['n_eff']
+        se2 = var_t + var_r
+        t_stat = difference / np.sqrt(se2)
+        dof = se2 ** 2 / (var_t ** 2 / (target['n_eff'] - 1)
+                          + var_r ** 2 / (reference['n_eff'] - 1))
+        p_value = 2 * special.stdtr(dof, -np.abs(t_stat))
+    return t_stat, p_value
+
+
+def block_sums(values, block_size, starts=None):
+    """
+    Get the sums and numbers of values of consecutive blocks of frames
+
+    Args:
+        values: (frames, columns) array (NaN values are left out)
+        block_size: frames per block (trailing frames of each replica are
+                    left out)
+        starts: first frame of each pooled replica (a single replica if
+                None). Blocks do not straddle replicas
+
+    Returns:
+        a tuple of (blocks, columns) arrays (sums, counts)
+    """
+    sums, counts = [], []
+    for first, last in replica_bounds(values.shape[0], starts):
+        n_blocks = (last - first) // block_size
+        blocks = values[first:first + n_blocks * block_size].reshape(
+            n_blocks, block_size, values.shape[1])
+        valid = ~np.isnan(blocks)
+        sums.append(np.where(valid, blocks, 0).sum(axis=1))
+        counts.append(valid.sum(axis=1))
+    return np.concatenate(sums), np.concatenate(counts)
+
+
+def permutation_test(target, reference, n_permutations=n_permutations,
+                     seed=None, n_jobs=None, target_starts=None,
+                     reference_starts=None):
+    """
+    Permutation test of the differences of the means of two systems,
+    exchanging blocks of consecutive frames between them
+
+    Args:
+        target: (frames, columns) deviations of the target system
+        reference: (frames, columns) deviations of the reference system, from
+                   the same origin as those of the target
+        n_permutations: number of permutations
+        seed: seed of the permutations (int or numpy SeedSequence)
+        n_jobs: number of threads
+        target_starts: first frame of each replica pooled in the target
+                       (a single replica if None)
+        reference_starts: first frame of each replica pooled in the
+                          reference (a single replica if None)
+
+    Returns:
+        a tuple of (columns,) arrays (observed differences of the means,
+        two-sided p-values)
+    """
+    sums_t, counts_t = block_sums(
+        target, get_block_size(target, target_starts), target_starts)
+    sums_r, counts_r = block_sums(
+        reference, get_block_size(reference, reference_starts),
+        reference_starts)
+    sums = np.concatenate([sums_t, sums_r])
+    counts = np.concatenate([counts_t, counts_r])
+    n_target, n_blocks = sums_t.shape[0], sums.shape[0]
+    with np.errstate(invalid='ignore', divide='ignore'):
+        observed = (sums_t.sum(0) / counts_t.sum(0)
+                    - sums_r.sum(0) / counts_r.sum(0))
+
+    # Each batch of permutations draws which blocks go to the target
+    batch = max(permutations_batch_size // n_blocks, 1)
+    bounds = [(x, min(x + batch, n_permutations))
+              for x in range(0, n_permutations, batch)]
+    if not isinstance(seed, np.random.SeedSequence):
+        seed = np.random.SeedSequence(seed)
+    seeds = seed.spawn(len(bounds))
+
+    def exceed(position):
+        start, stop = bounds[position]
+        rng = np.random.default_rng(seeds[position])
+        keys = rng.random((stop - start, n_blocks))
+        to_target = (keys.argsort(axis=1) < n_target).astype(float)
+        to_reference = 1 - to_target
+        with np.errstate(invalid='ignore', divide='ignore'):
+            permuted = ((to_target @ sums) / (to_target @ counts)
+                        - (to_reference @ sums) / (to_reference @ counts))
+        return np.sum(np.abs(permuted) >= np.abs(observed), axis=0)
+
+    n_jobs = max(min(n_jobs or os.cpu_count() or 1, len(bounds)), 1)
+    with ThreadPoolExecutor(n_jobs) as pool:
+        exceeding = sum(pool.map(exceed, range(len(bounds))))
+    p_value = (1 + exceeding) / (1 + n_permutations)
+    return observed, np.where(np.isnan(observed), np.nan, p_value)
+
+
+def fdr_correction(p_values):
+    """
+    Get the q-values of p-values (false discovery rate of Benjamini &
+    Hochberg)
+
+    Args:
+        p_values: array of p-values (NaN values are left out)
+
+    Returns:
+        the array of q-values
+    """
+    p_values = np.asarray(p_values, dtype=float)
+    q_values = np.full(p_values.shape, np.nan)
+    valid = np.flatnonzero(~np.isnan(p_values))
+    if not valid.size:
+        return q_values
+    order = valid[np.argsort(p_values[valid])]
+    ranked = p_values[order] * valid.size / np.arange(1, valid.size + 1)
+    q_values[order] = np.minimum(
+        np.minimum.accumulate(ranked[::-1])[::-1], 1)
+    return q_values
+
+
+def compare_pair(target, reference, method='welch', n_jobs=None, seed=None,
+                 n_permutations=n_permutations):
+    """
+    Test the changes of every descriptor and base pair between two systems
+
+    Args:
+        target: CourbesDataset of the target system
+        reference: CourbesDataset of the reference system
+        method: 'welch' or 'permutation'
+        n_jobs: number of threads
+        seed: seed of the permutations
+        n_permutations: number of permutations
+
+    Returns:
+        a dataframe with one row per section, descriptor and bp found in both
+        systems (without q-values)
+    """
+    tar_values, tar_labels = stack_sections(target)
+    ref_values, ref_labels = stack_sections(reference)
+    keys = ['section', 'descriptor', 'bp']
+    table = tar_labels.reset_index().merge(
+        ref_labels.reset_index(), on=keys, suffixes=('', '_reference'))
+    tar_cols = table.pop('index').to_numpy()
+    ref_cols = table.pop('index_reference').to_numpy()
+    tar_values, ref_values = tar_values[:, tar_cols], ref_values[:, ref_cols]
+
+    angular = np.asarray([is_angular(x) for x in table['descriptor']])
+    # Frames are only correlated within each replica
+    tar_starts = replica_starts(target.replicas)
+    ref_starts = replica_starts(reference.replicas)
+    tar_stats = describe_columns(tar_values, angular, n_jobs, tar_starts)
+    ref_stats = describe_columns(ref_values, angular, n_jobs, ref_starts)
+    difference = tar_stats['mean'] - ref_stats['mean']
+    difference[angular] = wrapped_difference(difference[angular], 0)
+
+    if method == 'welch':
+        statistic, p_value = welch_test(tar_stats, ref_stats, difference)
+    elif method == 'permutation':
+        # Both systems deviate from the mean of the reference
+        deviations = tar_values - ref_stats['mean']
+        deviations[:, angular] = wrapped_difference(
+            tar_values[:, angular], ref_stats['mean'][angular])
+        statistic, p_value = permutation_test(
+            deviations, ref_stats['deviations'], n_permutations, seed, n_jobs,
+            tar_starts, ref_starts)
+    else:
+        raise ValueError(f'Unknown test {method}. Choose among welch and'
+                         f' permutation')
+
+    with np.errstate(invalid='ignore', divide='ignore'):
+        pooled_std = np.sqrt((tar_stats['variance']
+                              + ref_stats['variance']) / 2)
+        effect_size = difference / pooled_std
+    table['reference_mean'] = ref_stats['mean']
+    table['mean'] = tar_stats['mean']
+    table['difference'] = difference
+    table['effect_size'] = effect_size
+    table['n_eff'] = tar_stats['n_eff']
+    table['n_eff_reference'] = ref_stats['n_eff']
+    table['statistic'] = statistic
+    table['p_value'] = p_value
+    return table
+
+
+def compare_systems(systems, reference=None, method='welch',
+                    alpha=fdr_level, n_jobs=None, seed=None,
+                    n_permutations=n_permutations):
+    """
+    Test the changes of every descriptor and base pair of several systems
+    with respect to a reference one
+
+    Args:
+        systems: dict of system name: CourbesDataset
+        reference: name of the reference system (the first one if None)
+        method: 'welch' (on the effective number of frames) or 'permutation'
+                (of blocks of consecutive frames)
+        alpha: false discovery rate of the significant changes
+        n_jobs: number of threads (all the cores if None)
+        seed: seed of the permutations
+        n_permutations: number of permutations
+
+    Returns:
+        a dataframe of the changes of all the systems ranked by q-value (FDR
+        over all the tests) and size of the effect
+    """
+    names = list(systems)
+    reference = names[0] if reference is None else reference
+    if reference not in systems:
+        raise KeyError(f'No system named {reference}')
+    others = [x for x in names if x != reference]
+    if not others:
+        raise ValueError('At least two systems are needed to compare them')
+
+    tables = []
+    seeds = np.random.SeedSequence(seed).spawn(len(others))
+    for name, system_seed in zip(others, seeds):
+        table = compare_pair(systems[name], systems[reference], method,
+                             n_jobs, system_seed, n_permutations)
+        table.insert(0, 'system', name)
+        table.insert(1, 'reference', reference)
+        tables.append(table)
+    table = pd.concat(tables, ignore_index=True)
+
+    table['q_value'] = fdr_correction(table['p_value'])
+    table['significant'] = table['q_value'] < alpha
+    table['rank_effect'] = -table['effect_size'].abs()
+    table = table.sort_values(['q_value', 'rank_effect'], na_position='last')
+    return table.drop(columns='rank_effect').reset_index(drop=True)
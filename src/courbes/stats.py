@@ -0,0 +1,480 @@
+# Created by roy.gonzalez-aleman at 19/10/2026
+"""
+Statistics of the descriptors of courbes+ sections
+"""
+import warnings
+
+import numpy as np
+import pandas as pd
+
+# Descriptors measured in degrees, by their name in the curves+ report
+angular_descriptors = {
+    'Inclin', 'Tip', 'Ax_bend',
+    'Buckle', 'Propel', 'Opening',
+    'Tilt', 'Roll', 'Twist', 'H-Twi',
+    'Alpha', 'Beta', 'Gamma', 'Delta', 'Epsil', 'Zeta', 'Chi', 'Phase',
+}
+
+
+def is_angular(descriptor):
+    """
+    Check whether a descriptor is an angle
+
+    Args:
+        descriptor: name of the descriptor (as parsed from curves+)
+
+    Returns:
+        True if the descriptor is measured in degrees
+    """
+    return descriptor.strip() in angular_descriptors
+
+
+def is_angular_name(name):
+    """
+    Check whether a report file (e.g. Strand_1_Alpha_stats) holds an angle
+
+    Args:
+        name: name of the file without extension, possibly prefixed by the
+              sub-case of the descriptor
+
+    Returns:
+        True if the descriptor of the file is measured in degrees
+    """
+    parts = name.split('_')
+    return any(is_angular('_'.join(parts[i:])) for i in range(len(parts)))
+
+
+def wrapped_difference(a, b):
+    """
+    Get the differences between angles, wrapped to the [-180, 180[ interval
+
+    Args:
+        a, b: arrays of angles in degrees
+
+    Returns:
+        the array of a - b differences
+    """
+    return np.mod(np.asarray(a) - np.asarray(b) + 180, 360) - 180
+
+
+# The integrated autocorrelation time sums the autocorrelation function up to
+# the first lag M with M >= tau_window * tau(M) (automatic window of Sokal)
+tau_window = 5
+
+# Minimum number of blocks of the block-averaged standard error of the mean
+min_blocks = 8
+
+# Maximum number of values transformed at once by the FFT (bounds memory)
+fft_batch_size = 2 ** 22
+
+
+def replica_starts(replicas):
+    """
+    Get the first frame of each replica of pooled time series
+
+    Args:
+        replicas: name of the replica of each frame, replica after replica
+
+    Returns:
+        the array of positions where a replica starts
+    """
+    replicas = np.asarray(replicas)
+    if not replicas.size:
+        return np.zeros(1, dtype=int)
+    return np.flatnonzero(np.r_[True, replicas[1:] != replicas[:-1]])
+
+
+def replica_bounds(n_frames, starts=None):
+    """
+    Get the frames spanned by each replica of pooled time series
+
+    Args:
+        n_frames: number of pooled frames
+        starts: first frame of each replica (a single replica if None)
+
+    Returns:
+        a list of (first frame, last frame + 1) of the non-empty replicas
+    """
+    starts = [] if starts is None else starts
+    edges = np.unique(np.clip(np.concatenate([[0], starts, [n_frames]]), 0,
+                              n_frames).astype(int))
+    return list(zip(edges[:-1].tolist(), edges[1:].tolist()))
+
+
+def fft_length(n):
+    """
+    Get the smallest length of at least n whose only prime factors are 2, 3
+    and 5 (fast FFT sizes)
+    """
+    best = 2 ** int(np.ceil(np.log2(max(n, 1))))
+    power_5 = 1
+    while power_5 < best:
+        power_35 = power_5
+        while power_35 < best:
+            length = power_35 * 2 ** max(int(np.ceil(np.log2(n / power_35))),
+                                         0)
+            best = min(best, length)
+            power_35 *= 3
+        power_5 *= 5
+    return best
+
+
+def autocorrelation(values):
+    """
+    Get the normalized autocorrelation functions of time series through FFT
+
+    Args:
+        values: (frames, series) array. NaN values are left out of the sums
+
+    Returns:
+        a (lags, series) array equal to 1 at lag 0 (NaN for constant series)
+    """
+    # Transforms run along contiguous rows, one per series
+    series = np.ascontiguousarray(np.asarray(values, dtype=float).T)
+    n_frames = series.shape[-1]
+    mask = ~np.isnan(series)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        mean = np.nansum(series, axis=-1) / mask.sum(axis=-1)
+        centered = np.where(mask, series - mean[:, None], 0)
+
+        # Zero padding to at least 2n - 1 avoids the circular wrap-around
+        n_fft = fft_length(2 * n_frames - 1)
+        spectrum = np.fft.rfft(centered, n_fft, axis=-1)
+        power = spectrum.real ** 2 + spectrum.imag ** 2
+        autocov = np.fft.irfft(power, n_fft, axis=-1)[:, :n_frames]
+
+        # Number of pairs of values at each lag
+        if mask.all():
+            pairs = n_frames - np.arange(n_frames)
+        else:
+            spectrum = np.fft.rfft(mask, n_fft, axis=-1)
+            power = spectrum.real ** 2 + spectrum.imag ** 2
+            pairs = np.rint(np.fft.irfft(power, n_fft, axis=-1)[:, :n_frames])
+        autocov = np.where(pairs > 0, autocov / pairs, np.nan)
+        return (autocov / autocov[:, :1]).T
+
+
+def integrated_time(values, window=tau_window):
+    """
+    Get the integrated autocorrelation times of time series
+
+    The time is tau = 1 + 2 * sum(rho(k), k = 1..M), i.e. the statistical
+    inefficiency: n frames hold the information of n / tau independent ones.
+
+    Args:
+        values: (frames, ...) array of time series
+        window: factor of the automatic window of the sum
+
+    Returns:
+        an array of the trailing shape of values with the times in frames,
+        at least 1 (NaN for constant series or less than two frames)
+    """
+    values = np.asarray(values, dtype=float)
+    n_frames = values.shape[0]
+    series = values.reshape(n_frames, -1)
+    taus = np.full(series.shape[1], np.nan)
+    if n_frames < 2:
+        return taus.reshape(values.shape[1:])
+
+    lags = np.arange(1, n_frames)
+    batch = max(fft_batch_size // (2 * n_frames), 1)
+    for start in range(0, series.shape[1], batch):
+        rho = autocorrelation(series[:, start:start + batch]).T
+        cumulative = 1 + 2 * np.cumsum(rho[:, 1:], axis=-1)
+        # First lag closing the window, or the last one if none does
+        closed = lags >= window * cumulative
+        stop = np.where(closed.any(axis=-1), closed.argmax(axis=-1),
+                        n_frames - 2)
+        tau = cumulative[np.arange(cumulative.shape[0]), stop]
+        taus[start:start + batch] = np.maximum(tau, 1)
+    return taus.reshape(values.shape[1:])
+
+
+def block_sem(values, tau=None, min_blocks=min_blocks):
+    """
+    Get the standard error of the mean of time series from block averages
+
+    Consecutive frames are averaged in blocks of 2, 4, 8... frames (Flyvbjerg
+    & Petersen). The error is that of the means of the smallest blocks of at
+    least 2 * tau frames, which are roughly independent, as long as there are
+    min_blocks of them.
+
+    Args:
+        values: (frames, ...) array of time series
+        tau: integrated autocorrelation times (computed if None)
+        min_blocks: minimum number of blocks
+
+    Returns:
+        an array of the trailing shape of values (NaN for too short series)
+    """
+    values = np.asarray(values, dtype=float)
+    if tau is None:
+        tau = integrated_time(values)
+    sems = []
+    blocks = values
+    with warnings.catch_warnings():
+        # All-NaN blocks and series are expected
+        warnings.simplefilter('ignore', RuntimeWarning)
+        while blocks.shape[0] >= max(min_blocks, 2):
+            count = np.sum(~np.isnan(blocks), axis=0)
+            sems.append(np.nanstd(blocks, axis=0, ddof=1) / np.sqrt(count))
+            n_pairs = blocks.shape[0] // 2
+            blocks = np.nanmean(blocks[:2 * n_pairs].reshape(
+                n_pairs, 2, *blocks.shape[1:]), axis=1)
+    if not sems:
+        return np.full(values.shape[1:], np.nan)
+
+    # Blocking level of each series (block size 2 ** level)
+    sems = np.stack(sems)
+    level = np.ceil(np.log2(np.nan_to_num(2 * np.asarray(tau), nan=1)))
+    level = np.clip(level, 0, len(sems) - 1).astype(int)
+    return np.take_along_axis(sems, level[None], axis=0)[0]
+
+
+def effective_count(values, starts=None):
+    """
+    Get the effective number of independent frames of time series
+
+    Args:
+        values: (frames, ...) array of time series
+        starts: first frame of each replica (a single replica if None). The
+                frames of different replicas are independent
+
+    Returns:
+        an array of the trailing shape of values with the sum over the
+        replicas of their number of values divided by their autocorrelation
+        time (NaN if a replica with values has no time, or if there are no
+        values at all)
+    """
+    values = np.asarray(values, dtype=float)
+    n_eff = np.zeros(values.shape[1:])
+    for first, last in replica_bounds(values.shape[0], starts):
+        count = np.sum(~np.isnan(values[first:last]), axis=0)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            n_eff = n_eff + np.where(
+                count > 0, count / integrated_time(values[first:last]), 0)
+    # Without values the time, and so n_eff, is undefined
+    return np.where(np.sum(~np.isnan(values), axis=0) > 0, n_eff, np.nan)
+
+
+def correlation_stats(values, starts=None):
+    """
+    Get the statistics of time series accounting for their autocorrelation
+
+    Pooled replicas are independent runs: their times and blocks are computed
+    replica by replica. The effective numbers of frames of the replicas add
+    up, and their block SEM are combined as the error of the mean weighted by
+    their number of values.
+
+    Args:
+        values: (frames, ...) array of time series
+        starts: first frame of each replica (a single replica if None)
+
+    Returns:
+        a dict with the integrated autocorrelation time (tau, in frames), the
+        effective number of independent frames (n_eff) and the block-averaged
+        standard error of the mean (sem_block)
+    """
+    values = np.asarray(values, dtype=float)
+    count = np.sum(~np.isnan(values), axis=0)
+    bounds = replica_bounds(values.shape[0], starts)
+    if len(bounds) < 2:
+        tau = integrated_time(values)
+        return {'tau': tau, 'n_eff': count / tau,
+                'sem_block': block_sem(values, tau)}
+
+    n_eff = np.zeros(values.shape[1:])
+    variance = np.zeros(values.shape[1:])
+    for first, last in bounds:
+        replica = correlation_stats(values[first:last])
+        replica_count = np.sum(~np.isnan(values[first:last]), axis=0)
+        # Replicas without values do not contribute
+        n_eff = n_eff + np.where(replica_count > 0, replica['n_eff'], 0)
+        variance = variance + np.where(
+            replica_count > 0, (replica_count * replica['sem_block']) ** 2, 0)
+    # Without values the time, and so n_eff, is undefined
+    n_eff = np.where(count > 0, n_eff, np.nan)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return {'tau': count / n_eff, 'n_eff': n_eff,
+                'sem_block': np.sqrt(variance) / count}
+
+
+def circular_stats(values):
+    """
+    Get the circular statistics of angles
+
+    Args:
+        values: (frames, ...) array of angles in degrees (NaN values are left
+                out)
+
+    Returns:
+        a dict with the circular mean (in the [0, 360[ convention if all the
+        angles of the series are positive, else in [-180, 180[), the mean
+        resultant length R (1 for identical angles, 0 for uniform ones) and
+        the circular standard deviation sqrt(-2 ln R) in degrees
+    """
+    values = np.asarray(values, dtype=float)
+    radians = np.radians(values)
+    with warnings.catch_warnings():
+        # All-NaN series are expected (e.g. undefined end values)
+        warnings.simplefilter('ignore', RuntimeWarning)
+        cosines = np.nanmean(np.cos(radians), axis=0)
+        sines = np.nanmean(np.sin(radians), axis=0)
+        length = np.minimum(np.hypot(cosines, sines), 1)
+        mean = wrapped_difference(np.degrees(np.arctan2(sines, cosines)), 0)
+        positive = np.nanmin(values, axis=0) >= 0
+        std = np.degrees(np.sqrt(-2 * np.log(length)))
+    return {'mean': np.where(positive, np.mod(mean, 360), mean),
+            'R': length, 'std': std}
+
+
+def describe_series(values, angular=False, starts=None):
+    """
+    Get the statistics of time series completing the linear ones of a stats
+    table
+
+    Args:
+        values: (frames, bp) array of a descriptor in time order
+        angular: whether the descriptor is an angle
+        starts: first frame of each pooled replica (a single replica if None)
+
+    Returns:
+        a dict of row: (bp,) array with the statistics accounting for the
+        autocorrelation of the frames and, for angles, the circular mean,
+        std, sem and mean resultant length R replacing the linear ones
+    """
+    values = np.asarray(values, dtype=float)
+    rows = {}
+    if angular:
+        circular = circular_stats(values)
+        count = np.sum(~np.isnan(values), axis=0)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            sem = circular['std'] / np.sqrt(count)
+        rows.update({'mean': circular['mean'].round(2),
+                     'std': circular['std'].round(2), 'sem': sem,
+                     'R': circular['R']})
+        # Deviations from the circular mean do not wrap around
+        values = wrapped_difference(values, circular['mean'])
+    rows.update(correlation_stats(values, starts))
+    return rows
+
+
+class StreamingStats:
+    """
+    Mergeable count, mean, sum of squared deviations, min and max per
+    (descriptor, bp), ignoring NaN values
+
+    Partial statistics of disjoint sets of frames (e.g. shards of a
+    trajectory) are combined exactly with `merge`, without the raw values.
+    """
+
+    def __init__(self, count, mean, m2, minimum, maximum):
+        self.count = np.asarray(count, dtype=float)
+        self.mean = np.asarray(mean, dtype=float)
+        self.m2 = np.asarray(m2, dtype=float)
+        self.min = np.asarray(minimum, dtype=float)
+        self.max = np.asarray(maximum, dtype=float)
+
+    @classmethod
+    def from_values(cls, values):
+        """
+        Compute the statistics of a (descriptor x frame x bp) array
+
+        Args:
+            values: array of descriptor values
+
+        Returns:
+            a StreamingStats of shape (descriptor x bp)
+        """
+        values = np.asarray(values, dtype=float)
+        with warnings.catch_warnings():
+            # All-NaN columns are expected (e.g. undefined end values)
+            warnings.simplefilter('ignore', RuntimeWarning)
+            count = np.sum(~np.isnan(values), axis=1)
+            mean = np.nanmean(values, axis=1)
+            m2 = np.nansum((values - mean[:, None, :]) ** 2, axis=1)
+            minimum = np.nanmin(values, axis=1)
+            maximum = np.nanmax(values, axis=1)
+        return cls(count, mean, m2, minimum, maximum)
+
+    @classmethod
+    def empty(cls, shape):
+        """
+        Get the statistics of no values
+
+        Args:
+            shape: shape (descriptor x bp) of the statistics
+        """
+        nan = np.full(shape, np.nan)
+        return cls(np.zeros(shape), nan, np.zeros(shape), nan, nan)
+
+    def merge(self, other):
+        """
+        Combine with the statistics of another set of frames (Chan et al.)
+
+        Args:
+            other: StreamingStats of the same shape
+
+        Returns:
+            a new StreamingStats
+        """
+        count = self.count + other.count
+        with np.errstate(invalid='ignore', divide='ignore'):
+            delta = other.mean - self.mean
+            mean = self.mean + delta * other.count / count
+            m2 = (self.m2 + other.m2
+                  + delta ** 2 * self.count * other.count / count)
+        # Sides without values do not contribute
+        mean = np.where(self.count == 0, other.mean, mean)
+        mean = np.where(other.count == 0, self.mean, mean)
+        m2 = np.where(self.count == 0, other.m2, m2)
+        m2 = np.where(other.count == 0, self.m2, m2)
+        return StreamingStats(count, mean, m2, np.fmin(self.min, other.min),
+                              np.fmax(self.max, other.max))
+
+    @property
+    def std(self):
+        """
+        Sample standard deviation (NaN for less than two values)
+        """
+        with np.errstate(invalid='ignore', divide='ignore'):
+            return np.where(self.count > 1,
+                            np.sqrt(self.m2 / (self.count - 1)), np.nan)
+
+    @property
+    def sem(self):
+        """
+        Standard error of the mean
+        """
+        with np.errstate(invalid='ignore', divide='ignore'):
+            return self.std / np.sqrt(self.count)
+
+    def to_frame(self, index, bp_index, values=None, angular=False,
+                 starts=None):
+        """
+        Get the statistics of a descriptor as written by courbes+
+
+        Args:
+            index: position of the descriptor
+            bp_index: labels of the base pairs
+            values: (frames x bp) values of the descriptor, in time order, to
+                    add the statistics accounting for their autocorrelation
+            angular: whether the descriptor is an angle (its circular
+                     statistics need the values)
+            starts: first frame of each replica pooled in the values (a
+                    single replica if None)
+
+        Returns:
+            a dataframe with mean, std, min, max and sem rows (as returned by
+            parsing.get_dataframe_stats)
+        """
+        df_stats = pd.DataFrame(
+            [self.mean[index], self.std[index], self.min[index],
+             self.max[index]], index=['mean', 'std', 'min', 'max'],
+            columns=bp_index).round(2)
+        df_stats.loc['sem'] = self.sem[index]
+        if values is not None:
+            for row, stats in describe_series(values, angular,
+                                              starts).items():
+                df_stats.loc[row] = stats
+        return df_stats
@@ -0,0 +1,412 @@
+# Created by roy.gonzalez-aleman at 19/10/2026
+"""
+Per-stage timing and throughput instrumentation of the courbes+ pipeline
+"""
+import cProfile
+import functools
+import json
+import os
+import time
+import tracemalloc
+from collections import defaultdict
+from contextlib import contextmanager
+
+
+def cpu_times():
+    """
+    Get the CPU time consumed by this process and by its finished children
+
+    Returns:
+        a tuple (own cpu seconds, children cpu seconds)
+    """
+    times = os.times()
+    return time.process_time(), times.children_user + times.children_system
+
+
+class StageRecorder:
+    """
+    Accumulate wall time, CPU time and call counts per pipeline stage
+    """
+
+    def __init__(self, total_frames=None):
+        self.total_frames = total_frames
+        self.n_frames = 0
+        self.stages = defaultdict(
+            lambda: {'count': 0, 'wall': 0.0, 'cpu': 0.0, 'cpu_children': 0.0})
+        self.start_wall = time.perf_counter()
+        self.start_time = time.time()
+        # Open children blocks and children CPU time when the first opened
+        self.open_children = defaultdict(int)
+        self.children_0 = {}
+
+    @contextmanager
+    def stage(self, name, count=1):
+        """
+        Time the enclosed block as an occurrence of the stage `name`
+
+        Args:
+            name: name of the stage
+            count: number of items processed by the block
+        """
+        wall_0 = time.perf_counter()
+        cpu_0 = time.process_time()
+        try:
+            yield
+        finally:
+            record = self.stages[name]
+            record['count'] += count
+            record['wall'] += time.perf_counter() - wall_0
+            record['cpu'] += time.process_time() - cpu_0
+
+    @contextmanager
+    def children(self, name):
+        """
+        Charge the CPU time of the children reaped in the enclosed block to
+        the stage `name`
+
+        Children are only accounted for once reaped, so the block must await
+        its subprocess. Blocks of the same stage may overlap (concurrent
+        subprocesses): the time is sampled from the first opened to the last
+        closed, so that it is counted once.
+
+        Args:
+            name: name of the stage
+        """
+        if not self.open_children[name]:
+            self.children_0[name] = cpu_times()[1]
+        self.open_children[name] += 1
+        try:
+            yield
+        finally:
+            self.open_children[name] -= 1
+            if not self.open_children[name]:
+                self.stages[name]['cpu_children'] += (
+                    cpu_times()[1] - self.children_0.pop(name))
+
+    def add(self, name, wall=0.0, cpu=0.0, cpu_children=0.0, count=1):
+        """
+        Add an externally measured occurrence of the stage `name` (e.g. runs
+        overlapping in time, that cannot be timed as a block)
+
+        Args:
+            name: name of the stage
+            wall: wall time in seconds
+            cpu: CPU time of this process in seconds
+            cpu_children: CPU time of the children processes in seconds
+            count: number of items processed
+        """
+        record = self.stages[name]
+        record['count'] += count
+        record['wall'] += wall
+        record['cpu'] += cpu
+        record['cpu_children'] += cpu_children
+
+    def tick(self, n=1):
+        """
+        Mark n frames as fully processed
+
+        Args:
+            n: number of processed frames
+        """
+        self.n_frames += n
+
+    def elapsed(self):
+        """
+        Wall time since the recorder was created
+        """
+        return time.perf_counter() - self.start_wall
+
+    def frames_per_second(self):
+        """
+        Current frame throughput
+        """
+        elapsed = self.elapsed()
+        return self.n_frames / elapsed if elapsed > 0 else 0.0
+
+    def eta(self):
+        """
+        Estimated seconds to process the remaining frames (None if unknown)
+        """
+        fps = self.frames_per_second()
+        if self.total_frames is None or not fps:
+            return None
+        return max(self.total_frames - self.n_frames, 0) / fps
+
+    def report(self):
+        """
+        Get a JSON-serializable report of the recorded stages
+
+        Returns:
+            a dict with global throughput figures and per-stage records
+        """
+        stages = {}
+        for name, record in self.stages.items():
+            record = dict(record)
+            record['wall_per_call'] = (record['wall'] / record['count']
+                                       if record['count'] else 0.0)
+            stages[name] = record
+        return {
+            'started': time.strftime('%Y-%m-%dT%H:%M:%S',
+                                     time.localtime(self.start_time)),
+            'elapsed_wall': self.elapsed(),
+            'n_frames': self.n_frames,
+            'total_frames': self.total_frames,
+            'frames_per_second': self.frames_per_second(),
+            'eta_seconds': self.eta(),
+            'stages': stages,
+        }
+
+    def write(self, out_path):
+        """
+        Write the report as a JSON file
+
+        Args:
+            out_path: path to the output .json
+
+        Returns:
+            out_path
+        """
+        with open(out_path, 'wt') as out_file:
+            json.dump(self.report(), out_file, indent=2)
+        return out_path
+
+    def close(self):
+        """
+        Release the resources held while recording (nothing to release here)
+        """
+
+
+def get_rss_mb():
+    """
+    Get the current resident set size of this process
+
+    Returns:
+        the RSS in MB, or None if it cannot be read on this platform
+    """
+    try:
+        with open('/proc/self/statm', 'rt') as statm:
+            pages = int(statm.read().split()[1])
+        return pages * os.sysconf('SC_PAGE_SIZE') / 1024 ** 2
+    except (OSError, ValueError, IndexError, AttributeError):
+        return None
+
+
+def get_max_rss_mb():
+    """
+    Get the peak resident set size of this process and of its children
+
+    Returns:
+        a tuple (own peak RSS in MB, children peak RSS in MB)
+    """
+    try:
+        import resource
+    except ImportError:
+        return None, None
+    # ru_maxrss is reported in KB on Linux
+    own = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    children = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss / 1024
+    return own, children
+
+
+class ProfilingRecorder(StageRecorder):
+    """
+    StageRecorder that also profiles each stage with cProfile and tracks the
+    memory high-water mark (tracemalloc peak and RSS) of each stage
+    """
+
+    def __init__(self, total_frames=None):
+        super().__init__(total_frames)
+        self.profiles = {}
+        self.active = []
+        self.peak_traced_mb = 0.0
+        # Tracing slows down every allocation, so it is stopped on close
+        # unless it was already started by someone else
+        self.owns_tracing = not tracemalloc.is_tracing()
+        if self.owns_tracing:
+            tracemalloc.start()
+
+    def _fold_peak(self):
+        """
+        Credit the traced memory peak since the last reset to active stages
+        """
+        if not tracemalloc.is_tracing():
+            return
+        peak_mb = tracemalloc.get_traced_memory()[1] / 1024 ** 2
+        self.peak_traced_mb = max(self.peak_traced_mb, peak_mb)
+        for name in self.active:
+            record = self.stages[name]
+            record['peak_traced_mb'] = max(record.get('peak_traced_mb', 0.0),
+                                           peak_mb)
+        tracemalloc.reset_peak()
+
+    @contextmanager
+    def stage(self, name, count=1):
+        """
+        Time, profile and track the memory of the enclosed block
+
+        Args:
+            name: name of the stage
+            count: number of items processed by the block
+        """
+        self._fold_peak()
+        self.active.append(name)
+
+        # Only one profiler can be active: nested stages are profiled as
+        # part of the outermost one
+        profiler = None
+        if len(self.active) == 1:
+            profiler = self.profiles.setdefault(name, cProfile.Profile())
+            profiler.enable()
+        try:
+            with super().stage(name, count):
+                yield
+        finally:
+            if profiler is not None:
+                profiler.disable()
+            self._fold_peak()
+            self.active.pop()
+            rss = get_rss_mb()
+            if rss is not None:
+                record = self.stages[name]
+                record['rss_mb'] = max(record.get('rss_mb', 0.0), rss)
+
+    def report(self):
+        """
+        Get the report of StageRecorder plus the global memory figures
+        """
+        report = super().report()
+        own, children = get_max_rss_mb()
+        report['max_rss_mb'] = own
+        report['max_rss_children_mb'] = children
+        self._fold_peak()
+        report['peak_traced_mb'] = self.peak_traced_mb
+        return report
+
+    def close(self):
+        """
+        Stop tracing the memory allocations (reported peaks are kept)
+        """
+        if self.owns_tracing and tracemalloc.is_tracing():
+            self._fold_peak()
+            tracemalloc.stop()
+        self.owns_tracing = False
+
+    def write_profiles(self, out_dir):
+        """
+        Dump the cProfile statistics of every stage as <stage>.prof files
+
+        Args:
+            out_dir: directory where to dump the profiles
+
+        Returns:
+            list of written files
+        """
+        os.makedirs(out_dir, exist_ok=True)
+        written = []
+        for name, profiler in self.profiles.items():
+            out_path = os.path.join(out_dir, f'{name}.prof')
+            profiler.dump_stats(out_path)
+            written.append(out_path)
+        return written
+
+
+# Recorder receiving the timings of the current run
+recorder = StageRecorder()
+
+
+def reset(total_frames=None, profile=False):
+    """
+    Start a new recorder for a new run
+
+    Args:
+        total_frames: number of frames expected in the run (if known)
+        profile: also profile stages and track their memory high-water mark
+
+    Returns:
+        the new recorder
+    """
+    global recorder
+    recorder.close()
+    if profile:
+        recorder = ProfilingRecorder(total_frames)
+    else:
+        recorder = StageRecorder(total_frames)
+    return recorder
+
+
+@contextmanager
+def recording(local):
+    """
+    Send the timings of the enclosed block to another recorder, restoring
+    the current one afterwards
+
+    Args:
+        local: recorder receiving the timings (e.g. of a calibration)
+
+    Returns:
+        Yields the local recorder
+    """
+    global recorder
+    previous = recorder
+    recorder = local
+    try:
+        yield local
+    finally:
+        recorder = previous
+
+
+def stage(name, count=1):
+    """
+    Time a block of code on the current recorder (see StageRecorder.stage)
+    """
+    return recorder.stage(name, count)
+
+
+def children(name):
+    """
+    Charge the CPU time of the children reaped in a block of code to a stage
+    of the current recorder (see StageRecorder.children)
+    """
+    return recorder.children(name)
+
+
+def timed(name):
+    """
+    Decorator timing every call of a function as the stage `name`
+
+    Args:
+        name: name of the stage
+    """
+
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with recorder.stage(name):
+                return func(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
+
+
+def timed_iter(iterable, name):
+    """
+    Time the production of every item of an iterable as the stage `name`
+
+    Args:
+        iterable: any iterable (typically a lazy trajectory reader)
+        name: name of the stage
+
+    Returns:
+        Yields the items of the iterable
+    """
+    iterator = iter(iterable)
+    while True:
+        # Only items actually produced are counted
+        with recorder.stage(name, count=0):
+            try:
+                item = next(iterator)
+            except StopIteration:
+                return
+        recorder.stages[name]['count'] += 1
+        yield item
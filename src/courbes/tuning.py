@@ -0,0 +1,220 @@
+# Created by roy.gonzalez-aleman at 19/10/2026
+"""
+Automatic choice of the number of curves+ workers and of the chunk size
+
+A short calibration runs a few frames through the curves+ scheduler of a run
+(with its timeout) and loads a small chunk through commons.slice_traj, then
+picks the values that fit the available cores and memory.
+"""
+import json
+import os
+import statistics
+import tempfile
+import time
+
+import courbes.commons as cmn
+from courbes import timing
+
+# Name of the report of the calibration written to the work dir
+tuning_name = 'tuning.json'
+
+# Fraction of the available memory that curves+ processes may use
+workers_memory_fraction = 0.5
+
+# Fraction of the memory left by the workers that loaded chunks may use
+chunks_memory_fraction = 0.25
+
+# Bounds of the automatic chunk size
+min_chunk_size = 10
+max_chunk_size = 10000
+
+
+def get_available_cores():
+    """
+    Get the number of cores this process may run on
+
+    Returns:
+        the number of usable cores
+    """
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:
+        return os.cpu_count() or 1
+
+
+def get_available_memory_mb():
+    """
+    Get the memory available for new processes
+
+    Returns:
+        the available memory in MB, or None if it cannot be read
+    """
+    try:
+        with open('/proc/meminfo', 'rt') as meminfo:
+            for line in meminfo:
+                if line.startswith('MemAvailable:'):
+                    return int(line.split()[1]) / 1024
+    except (OSError, ValueError, IndexError):
+        pass
+    try:
+        pages = os.sysconf('SC_AVPHYS_PAGES')
+        return pages * os.sysconf('SC_PAGE_SIZE') / 1024 ** 2
+    except (ValueError, OSError, AttributeError):
+        return None
+
+
+def measure_chunk(topo, traj, selection, first=0, stride=1, n_frames=3):
+    """
+    Load a small chunk of a trajectory measuring its memory per frame
+
+    slice_traj reads the frames with all the atoms of the topology before
+    restricting them to the selection, so the memory of a frame is that of
+    the arrays of the loaded chunk scaled to all the atoms (the restricted
+    copy is accounted for by choose_settings).
+
+    Args:
+        topo: path to the topology
+        traj: path to the trajectory
+        selection: mdtraj's atom selection
+        first: first frame to load
+        stride: stride
+        n_frames: number of frames to load
+
+    Returns:
+        a tuple (loaded chunk, memory in MB per loaded frame)
+    """
+    import mdtraj as md
+
+    chunk = next(cmn.slice_traj(topo, traj, selection, init=first,
+                                stride=stride, chunk_size=n_frames))
+    n_atoms = max(md.load_topology(topo).n_atoms, chunk.n_atoms)
+    coords = chunk.xyz.nbytes / chunk.n_frames * n_atoms / chunk.n_atoms
+    # Times and unit cells do not depend on the atoms
+    others = sum(x.nbytes for x in (chunk.time, chunk.unitcell_lengths,
+                                    chunk.unitcell_angles) if x is not None)
+    return chunk, (coords + others / chunk.n_frames) / 1024 ** 2
+
+
+def time_frames(chunk, curves_man, strands, work_dir, timeout=None,
+                n_writers=0):
+    """
+    Time the frames of a chunk through the curves+ scheduler of a run
+
+    Args:
+        chunk: mdtraj chunk
+        curves_man: CurvesWrapper object
+        strands: lines of the curves+ strands block
+        work_dir: directory where the calibration files are written
+        timeout: seconds after which a curves+ run is killed (None to wait)
+        n_writers: number of processes writing PDBs (0 for the main thread)
+
+    Returns:
+        a tuple (median seconds writing a pdb, median seconds running
+        curves+, peak RSS of curves+ in MB or None), over the frames that
+        succeeded
+    """
+    from courbes import scheduler
+
+    with tempfile.TemporaryDirectory(dir=work_dir) as scratch:
+        _, durations = scheduler.sample_frames(chunk, curves_man, strands,
+                                               scratch, timeout, n_writers)
+    curves_mb = timing.get_max_rss_mb()[1]
+    return (statistics.median(x['write_s'] for x in durations),
+            statistics.median(x['curves_s'] for x in durations), curves_mb)
+
+
+def choose_settings(cores, memory_mb, write_s, curves_s, curves_mb, frame_mb,
+                    n_replicas=1, n_writers=0):
+    """
+    Choose the number of curves+ workers and the chunk size
+
+    Args:
+        cores: number of usable cores
+        memory_mb: available memory in MB (None if unknown)
+        write_s: seconds to write the pdb of a frame
+        curves_s: seconds of curves+ per frame
+        curves_mb: peak RSS of a curves+ process in MB (None if unknown)
+        frame_mb: memory of a loaded frame in MB
+        n_replicas: number of trajectories loaded at the same time
+        n_writers: number of processes writing PDBs (0 for the main thread)
+
+    Returns:
+        a tuple (n_workers, chunk_size)
+    """
+    # Curves+ is single-threaded: one process per core, as long as the PDBs
+    # are written fast enough to feed them and they fit in memory
+    n_workers = cores
+    if not n_writers and write_s > 0:
+        n_workers = min(n_workers, max(int(curves_s / write_s) + 1, 1))
+    if memory_mb and curves_mb:
+        n_workers = min(n_workers,
+                        int(workers_memory_fraction * memory_mb / curves_mb))
+    n_workers = max(n_workers, 1)
+
+    # One chunk per replica is loaded at once, and each is copied when its
+    # atoms are restricted to the selection
+    chunk_size = max_chunk_size
+    if memory_mb and frame_mb > 0:
+        left = memory_mb - n_workers * (curves_mb or 0)
+        chunk_size = int(chunks_memory_fraction * max(left, 0)
+                         / (2 * n_replicas * frame_mb))
+    chunk_size = min(max(chunk_size, n_workers, min_chunk_size),
+                     max_chunk_size)
+    return n_workers, chunk_size
+
+
+def tune(args, ranges, work_dir, n_samples=3):
+    """
+    Calibrate a configuration and set its automatic values
+
+    Only n_workers and chunk_size left to `auto` (None) are changed. The
+    measurements and the chosen values are printed and written to the work
+    dir for reproducibility.
+
+    Args:
+        args: parsed configuration (config.Config)
+        ranges: list of (trajectory, first frame, last frame) to process
+        work_dir: directory where the frames are processed
+        n_samples: number of frames timed through curves+
+
+    Returns:
+        a dict with the measurements and the chosen values
+    """
+    start = time.perf_counter()
+    traj, first, _ = ranges[0]
+    chunk, frame_mb = measure_chunk(args.topology, traj, args.selection,
+                                    first=first, stride=args.stride,
+                                    n_frames=n_samples)
+    curves_man = cmn.CurvesWrapper(args.curves_exe, args.lib_path)
+    write_s, curves_s, curves_mb = time_frames(
+        chunk, curves_man, args.strands, work_dir, args.timeout,
+        args.n_writers)
+    cores = get_available_cores()
+    memory_mb = get_available_memory_mb()
+    n_workers, chunk_size = choose_settings(
+        cores, memory_mb, write_s, curves_s, curves_mb, frame_mb,
+        n_replicas=len(ranges), n_writers=args.n_writers)
+
+    if args.n_workers is None:
+        args.n_workers = n_workers
+    if args.chunk_size is None:
+        args.chunk_size = chunk_size
+    report = {
+        'cores': cores,
+        'available_memory_mb': memory_mb,
+        'sampled_frames': chunk.n_frames,
+        'pdb_write_seconds': write_s,
+        'curves_seconds': curves_s,
+        'curves_rss_mb': curves_mb,
+        'frame_mb': frame_mb,
+        'calibration_seconds': time.perf_counter() - start,
+        'n_workers': args.n_workers,
+        'chunk_size': args.chunk_size,
+    }
+    with open(os.path.join(work_dir, tuning_name), 'wt') as tuning_file:
+        json.dump(report, tuning_file, indent=2)
+    print(f'Tuned {args.config_raw}: n_workers = {args.n_workers},'
+          f' chunk_size = {args.chunk_size} ({curves_s:.2f} s of curves+ and'
+          f' {write_s:.3f} s of pdb writing per frame, {cores} cores,'
+          f' {memory_mb or 0:.0f} MB available)')
+    return report
@@ -0,0 +1,162 @@
+# Created by roy.gonzalez-aleman at 19/10/2026
+"""
+Stand-in for the curves+ executable, for end-to-end tests without curves+
+
+It reads the same namelist as Cur+ on stdin and writes a synthetic .lis plus
+the .cda, _B.pdb and _X.pdb side files. Delays and failures can be simulated
+through options or environment variables (options take precedence):
+
+    COURBES_FAKE_DELAY      seconds to sleep before writing the outputs
+    COURBES_FAKE_FAIL_RATE  probability of crashing without any output
+    COURBES_FAKE_HANG_RATE  probability of hanging (sleeping for an hour)
+    COURBES_FAKE_SEED       seed of the random values
+"""
+import argparse
+import os
+import re
+import sys
+import time
+import zlib
+
+import numpy as np
+
+from courbes.commons import residue_letters
+from courbes.utils import synthetic
+
+
+def parse_namelist(text):
+    """
+    Parse the &inp namelist and strands block sent to curves+
+
+    Args:
+        text: standard input of curves+
+
+    Returns:
+        a dict with 'file', 'lis', 'lib' and 'ranges' (list of strand ranges)
+    """
+    parsed = {}
+    for key in ('file', 'lis', 'lib'):
+        match = re.search(rf'\b{key}=([^,\s]+)', text)
+        parsed[key] = match.group(1) if match else None
+    parsed['ranges'] = [(int(a), int(b)) for a, b in
+                        re.findall(r'^\s*(-?\d+):(-?\d+)\s*$', text,
+                                   flags=re.M)]
+    if not parsed['file'] or not parsed['lis']:
+        raise ValueError('The namelist must define file= and lis=')
+    return parsed
+
+
+def read_sequence(pdb_path):
+    """
+    Read the one-letter sequence of the nucleotides of a pdb file
+
+    Args:
+        pdb_path: path to the pdb
+
+    Returns:
+        the sequence (residues of unknown names are read as A)
+    """
+    sequence = []
+    previous = None
+    with open(pdb_path, 'rt') as pdb_file:
+        for line in pdb_file:
+            if not line.startswith(('ATOM', 'HETATM')):
+                continue
+            residue = (line[21], line[22:27])
+            if residue != previous:
+                previous = residue
+                sequence.append(residue_letters.get(line[17:20].strip(), 'A'))
+    return ''.join(sequence)
+
+
+def write_axis_pdb(out_path, n_bp, rng):
+    """
+    Write a plausible helical axis file (_X.pdb) of a gently bent duplex
+
+    Args:
+        out_path: path to the output pdb
+        n_bp: number of base pairs
+        rng: numpy random generator
+    """
+    n_points = 4 * (n_bp - 1) + 1
+    t = np.linspace(0, 1, n_points)
+    bend = rng.normal(0.3, 0.1)
+    length = 3.38 * (n_bp - 1)
+    coords = np.column_stack([length * bend * t ** 2,
+                              rng.normal(0, 0.1, n_points),
+                              length * t])
+    with open(out_path, 'wt') as axis_file:
+        for i, (x, y, z) in enumerate(coords):
+            axis_file.write(
+                f'ATOM  {i + 1:5d}  C   AXI X{i // 4 + 1:4d}    '
+                f'{x:8.3f}{y:8.3f}{z:8.3f}  1.00  0.00           C\n')
+        axis_file.write('END\n')
+
+
+def get_option(value, env_name, default, kind=float):
+    """
+    Resolve a command line option falling back on an environment variable
+    """
+    if value is not None:
+        return value
+    return kind(os.environ.get(env_name, default))
+
+
+def run(argv=None):
+    """
+    Run the fake curves+ executable
+    """
+    parser = argparse.ArgumentParser(
+        prog='fake-curves',
+        description='Stand-in for Cur+ writing synthetic .lis files')
+    parser.add_argument('--delay', type=float, default=None,
+                        help='seconds to sleep before writing the outputs')
+    parser.add_argument('--fail-rate', type=float, default=None,
+                        help='probability of crashing without any output')
+    parser.add_argument('--hang-rate', type=float, default=None,
+                        help='probability of hanging for an hour')
+    parser.add_argument('--seed', type=int, default=None,
+                        help='seed of the random values')
+    args = parser.parse_args(argv)
+
+    delay = get_option(args.delay, 'COURBES_FAKE_DELAY', 0)
+    fail_rate = get_option(args.fail_rate, 'COURBES_FAKE_FAIL_RATE', 0)
+    hang_rate = get_option(args.hang_rate, 'COURBES_FAKE_HANG_RATE', 0)
+    seed = get_option(args.seed, 'COURBES_FAKE_SEED', 0, int)
+
+    namelist = parse_namelist(sys.stdin.read())
+    lis_root = namelist['lis']
+
+    # Frames get different (but reproducible) values, while failures are
+    # transient so that retries of a frame may succeed
+    rng = np.random.default_rng([seed, zlib.crc32(lis_root.encode())])
+    fault_rng = np.random.default_rng()
+    time.sleep(delay)
+    if fault_rng.random() < hang_rate:
+        time.sleep(3600)
+    if fault_rng.random() < fail_rate:
+        print(f'  Curves+ simulated failure for {namelist["file"]}',
+              file=sys.stderr)
+        sys.exit(1)
+
+    sequence = read_sequence(namelist['file'])
+    if namelist['ranges']:
+        first, last = namelist['ranges'][0]
+        n_bp = abs(last - first) + 1
+        sequence = sequence[min(first, last) - 1:][:n_bp]
+    else:
+        n_bp = len(sequence) // 2
+        sequence = sequence[:n_bp]
+    sequence = ''.join(x if x in synthetic.complements else 'A'
+                       for x in sequence)
+    if len(sequence) < 2:
+        print(f'  Curves+ found no duplex in {namelist["file"]}',
+              file=sys.stderr)
+        sys.exit(1)
+
+    synthetic.write_lis(f'{lis_root}.lis', sequence, rng=rng)
+    with open(f'{lis_root}.cda', 'wt') as cda_file:
+        cda_file.write(f'{len(sequence)}\n')
+    with open(f'{lis_root}_B.pdb', 'wt') as b_file:
+        b_file.write('END\n')
+    write_axis_pdb(f'{lis_root}_X.pdb', len(sequence), rng)
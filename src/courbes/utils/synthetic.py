@@ -0,0 +1,277 @@
+# Created by roy.gonzalez-aleman at 19/10/2026
+"""
+Generator of synthetic curves+ *.lis files for testing and benchmarking
+"""
+import os
+
+import numpy as np
+
+from courbes.commons import puckers
+
+# Descriptors written in each section, in the column order of curves+
+section_columns = {
+    'axis': ['Xdisp', 'Ydisp', 'Inclin', 'Tip', 'Ax_bend'],
+    'intra': ['Shear', 'Stretch', 'Stagger', 'Buckle', 'Propel', 'Opening'],
+    'inter': ['Shift', 'Slide', 'Rise', 'Tilt', 'Roll', 'Twist', 'H-Ris',
+              'H-Twi'],
+    'backbone': ['Alpha', 'Beta', 'Gamma', 'Delta', 'Epsil', 'Zeta', 'Chi',
+                 'Phase', 'Ampli'],
+    'groove': ['W12', 'D12', 'W21', 'D21'],
+}
+
+# (mean, std) of each descriptor in a canonical B-DNA
+b_dna = {
+    'axis': [(0.27, 1.0), (0.11, 0.5), (-0.1, 5.0), (-1.0, 5.0), (2.0, 1.5)],
+    'intra': [(-0.04, 0.3), (-0.17, 0.1), (0.21, 0.4), (0.3, 8.0),
+              (-13.7, 7.0), (1.0, 4.0)],
+    'inter': [(-0.02, 0.7), (0.14, 0.7), (3.36, 0.3), (-0.2, 4.0),
+              (-0.3, 6.0), (35.8, 5.0), (3.35, 0.3), (36.0, 5.0)],
+    'backbone': [(-73.3, 15.0), (179.7, 15.0), (66.0, 10.0), (121.1, 15.0),
+                 (173.7, 20.0), (-88.5, 20.0), (-122.2, 15.0),
+                 (127.3, 25.0), (40.0, 5.0)],
+    'groove': [(5.8, 1.0), (4.8, 0.8), (11.7, 1.5), (8.5, 1.0)],
+}
+
+# Columns holding angles (wrapped to ]-180, 180])
+angular = {
+    'axis': [2, 3],
+    'intra': [3, 4, 5],
+    'inter': [3, 4, 5, 7],
+    'backbone': [0, 1, 2, 3, 4, 5, 6],
+}
+
+complements = {'A': 'T', 'T': 'A', 'G': 'C', 'C': 'G', 'U': 'A'}
+
+
+def wrap_angles(values):
+    """
+    Wrap angles in degrees to the ]-180, 180] interval
+
+    Args:
+        values: array of angles
+
+    Returns:
+        the wrapped angles
+    """
+    return 180 - np.mod(180 - values, 360)
+
+
+def get_pucker(phase):
+    """
+    Get the sugar pucker name of a pseudorotation phase
+
+    Args:
+        phase: phase angle in degrees
+
+    Returns:
+        the pucker name (or '----' if the phase is undefined)
+    """
+    if np.isnan(phase):
+        return '----'
+    return puckers[int(np.mod(phase, 360) // 36)]
+
+
+def get_levels(n_bp):
+    """
+    Get the groove levels reported by curves+ for a duplex of n_bp
+
+    Args:
+        n_bp: number of base pairs
+
+    Returns:
+        array of levels from 1 to n_bp by half steps
+    """
+    return np.arange(1, n_bp + 0.5, 0.5)
+
+
+def random_values(n_bp, rng=None, n_strands=2, p_missing=0.0):
+    """
+    Draw random B-DNA-like descriptor values of every section
+
+    Args:
+        n_bp: number of base pairs
+        rng: numpy random generator (or seed)
+        n_strands: number of strands listed in the backbone section
+        p_missing: probability of a value being missing ('---' / '----')
+
+    Returns:
+        a dict of section: array of values, with shapes (n_bp, 5) for axis,
+        (n_bp, 6) for intra, (n_bp - 1, 8) for inter, (n_strands, n_bp, 9)
+        for backbone and (n_levels, 4) for groove
+    """
+    rng = np.random.default_rng(rng)
+    shapes = {'axis': (n_bp,), 'intra': (n_bp,), 'inter': (n_bp - 1,),
+              'backbone': (n_strands, n_bp),
+              'groove': (get_levels(n_bp).size,)}
+
+    values = {}
+    for section, stats in b_dna.items():
+        means, stds = np.asarray(stats).T
+        drawn = rng.normal(means, stds, shapes[section] + (len(means),))
+        cols = angular.get(section, [])
+        drawn[..., cols] = wrap_angles(drawn[..., cols])
+        if section != 'groove':
+            drawn[rng.random(drawn.shape) < p_missing] = np.nan
+        values[section] = drawn
+
+    # Curves+ cannot compute some values at the ends of the strands
+    values['axis'][[0, -1], 4] = np.nan
+    values['backbone'][:, 0, :2] = np.nan
+    values['backbone'][:, -1, 4:6] = np.nan
+    values['groove'][:4] = np.nan
+    values['groove'][-4:] = np.nan
+    major = rng.random(values['groove'].shape[0]) < p_missing
+    values['groove'][major, 2:] = np.nan
+    return values
+
+
+def format_values(values, missing):
+    """
+    Format a row of values as curves+ does
+
+    Args:
+        values: row of values
+        missing: token used for missing values
+
+    Returns:
+        the formatted string
+    """
+    return ' '.join(f'{missing:>8}' if np.isnan(x) else f'{x:8.2f}'
+                    for x in values)
+
+
+def format_lis(sequence, values):
+    """
+    Format the text of a curves+ .lis file of a duplex
+
+    Args:
+        sequence: sequence of the first strand (e.g. 'CGCGAATTCGCG')
+        values: dict of section values as returned by random_values
+
+    Returns:
+        the text of the .lis file
+    """
+    seq = list(sequence.upper())
+    comp = [complements[x] for x in seq]
+    n_bp = len(seq)
+    n_all = 2 * n_bp
+    bp_labels = [f'{b} {i + 1:3d}-{c} {n_all - i:3d}'
+                 for i, (b, c) in enumerate(zip(seq, comp))]
+
+    def average(section_values):
+        with np.errstate(all='ignore'):
+            means = np.nanmean(section_values, axis=0)
+        return f'        Average:          {format_values(means, "---")}'
+
+    lines = ['  ' + '*' * 60, '  Curves+ version 2.6 (synthetic)', '',
+             f'  Strand 1 has {n_bp} bases (5\'-3\'): {"".join(seq)}',
+             f'  Strand 2 has {n_bp} bases (3\'-5\'): {"".join(comp)}', '']
+
+    # Section A
+    lines += [' (A) BP-Axis        Xdisp   Ydisp   Inclin    Tip  Ax-bend', '']
+    lines += [f'  {i + 1:3d}) {label}  {format_values(row, "---")}'
+              for i, (label, row) in enumerate(zip(bp_labels,
+                                                   values['axis']))]
+    lines += ['', average(values['axis']), '']
+
+    # Section B
+    lines += [' (B) Intra-BP parameters', '',
+              ' Strands 1-2     Shear  Stretch  Stagger  Buckle  Propel'
+              ' Opening', '']
+    lines += [f'  {i + 1:3d}) {label}  {format_values(row, "---")}'
+              for i, (label, row) in enumerate(zip(bp_labels,
+                                                   values['intra']))]
+    lines += ['', average(values['intra']), '']
+
+    # Section C
+    lines += [' (C) Inter-BP       Shift   Slide     Rise    Tilt    Roll'
+              '   Twist   H-Ris   H-Twi', '']
+    lines += [f'  {i + 2:3d}) {seq[i + 1]} {i + 2:3d}/{comp[i + 1]}'
+              f' {n_all - i - 1:3d}  {format_values(row, "---")}'
+              for i, row in enumerate(values['inter'])]
+    lines += ['', average(values['inter']), '']
+
+    # Section D
+    lines += [' (D) Backbone Parameters', '']
+    strand_seqs = [seq, comp]
+    for strand, strand_values in enumerate(values['backbone']):
+        strand_seq = strand_seqs[strand % 2]
+        lines += [f' Strand {strand + 1}     Alpha  Beta   Gamma  Delta  Epsil'
+                  '  Zeta   Chi    Phase  Ampli  Puckr', '']
+        for i, (base, row) in enumerate(zip(strand_seq, strand_values)):
+            number = i + 1 + strand * n_bp
+            lines.append(f'  {i + 1:3d}) {base} {number:3d}'
+                         f'  {format_values(row, "----")}'
+                         f'  {get_pucker(row[7])}')
+        lines += ['']
+
+    # Section E (missing groove values are left blank by curves+)
+    lines += [' (E) Groove parameters', '',
+              ' Level           W12     D12     W21     D21', '']
+    for level, row in zip(get_levels(n_bp), values['groove']):
+        available = row[:np.argmax(np.isnan(np.append(row, np.nan)))]
+        groove_values = format_values(available, '')
+        if level.is_integer():
+            index = int(level) - 1
+            lines.append(f'  {level:5.1f} {seq[index]} {index + 1:3d}'
+                         f'  {groove_values}'.rstrip())
+        else:
+            lines.append(f'  {level:5.1f}       {groove_values}'.rstrip())
+    return '\n'.join(lines) + '\n'
+
+
+def write_lis(lis_path, sequence=None, n_bp=None, values=None, rng=None,
+              n_strands=2, p_missing=0.0):
+    """
+    Write a synthetic curves+ .lis file
+
+    Args:
+        lis_path: path to the output .lis
+        sequence: sequence of the first strand (random if None)
+        n_bp: number of base pairs (only used if sequence is None)
+        values: dict of section values (random B-DNA-like if None)
+        rng: numpy random generator (or seed)
+        n_strands: number of strands listed in the backbone section
+        p_missing: probability of a value being missing
+
+    Returns:
+        lis_path
+    """
+    rng = np.random.default_rng(rng)
+    if sequence is None:
+        if n_bp is None:
+            raise ValueError('Either sequence or n_bp must be specified')
+        sequence = ''.join(rng.choice(list('ACGT'), n_bp))
+    if values is None:
+        values = random_values(len(sequence), rng, n_strands, p_missing)
+    with open(lis_path, 'wt') as lis_file:
+        lis_file.write(format_lis(sequence, values))
+    return lis_path
+
+
+def write_lis_set(out_dir, n_frames, sequence=None, n_bp=None, rng=None,
+                  n_strands=2, p_missing=0.0):
+    """
+    Write a set of tmp_<i>.lis files as left by curves+ during a courbes+ run
+
+    Args:
+        out_dir: output directory
+        n_frames: number of .lis files (frames)
+        sequence: sequence of the first strand (random if None)
+        n_bp: number of base pairs (only used if sequence is None)
+        rng: numpy random generator (or seed)
+        n_strands: number of strands listed in the backbone section
+        p_missing: probability of a value being missing
+
+    Returns:
+        the paths of the written files, sorted by frame
+    """
+    rng = np.random.default_rng(rng)
+    if sequence is None:
+        if n_bp is None:
+            raise ValueError('Either sequence or n_bp must be specified')
+        sequence = ''.join(rng.choice(list('ACGT'), n_bp))
+    os.makedirs(out_dir, exist_ok=True)
+    return [write_lis(os.path.join(out_dir, f'tmp_{i + 1}.lis'), sequence,
+                      rng=rng, n_strands=n_strands, p_missing=p_missing)
+            for i in range(n_frames)]
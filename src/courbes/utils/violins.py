@@ -2,10 +2,6 @@
 import sys
 from os.path import basename
 
-import matplotlib.pyplot as plt
-import numpy as np
-import pandas as pd
-
 from courbes import commons as cmn
 
 
@@ -31,6 +27,11 @@ def plot_violins():
         print('Usage: violins path-to-courbes-directory [init] [last]')
         sys.exit()
 
+    # Plotting libraries are only imported once arguments are valid
+    import matplotlib.pyplot as plt
+    import numpy as np
+    import pandas as pd
+
     init_0 = init - 1
     last_0 = last
     # Get all the txt files in the courbes directory
@@ -0,0 +1,199 @@
+# Created by roy.gonzalez-aleman at 19/10/2026
+"""
+Validation of the native engines against the output of curves+
+
+The same frames go through curves+ and through the native engines, and the
+deviations of every descriptor and base pair are reported (as wrapped
+differences for angles) together with whether they are within tolerance.
+"""
+import time
+import warnings
+
+import numpy as np
+import pandas as pd
+
+from courbes import analysis, native
+from courbes.stats import is_angular, wrapped_difference
+
+# Default maximum absolute deviations, in degrees for angles and in Angstroms
+# for the other descriptors
+angle_tolerance = 5.0
+distance_tolerance = 0.5
+
+# Descriptors measured in degrees that are not circular (compared without
+# wrapping, but with the tolerance of angles)
+degree_descriptors = {'Ampli', 'Bend', 'TBend'}
+
+# Default fraction of frames whose labels (e.g. puckers) may disagree
+label_tolerance = 0.05
+
+
+def get_tolerance(descriptor, tolerances=None, categorical=False):
+    """
+    Get the tolerance of a descriptor
+
+    Args:
+        descriptor: name of the descriptor
+        tolerances: dict of descriptor (case-insensitive): tolerance
+                    overriding the defaults
+        categorical: whether the descriptor holds labels
+
+    Returns:
+        the tolerance
+    """
+    tolerances = {x.lower(): y for x, y in (tolerances or {}).items()}
+    name = descriptor.strip()
+    if name.lower() in tolerances:
+        return tolerances[name.lower()]
+    if categorical:
+        return label_tolerance
+    if is_angular(name) or name in degree_descriptors:
+        return angle_tolerance
+    return distance_tolerance
+
+
+def compare_values(reference, candidate, angular):
+    """
+    Get the deviations of a descriptor per bp
+
+    Args:
+        reference: (frames, bp) reference values
+        candidate: (frames, bp) candidate values
+        angular: compare as angles
+
+    Returns:
+        a dict of statistic: (bp,) array
+    """
+    if angular:
+        diff = wrapped_difference(candidate, reference)
+    else:
+        diff = candidate - reference
+    with warnings.catch_warnings():
+        # Base pairs without any value on both sides are expected
+        warnings.simplefilter('ignore', RuntimeWarning)
+        return {
+            'n_frames': np.sum(~np.isnan(diff), axis=0),
+            'mismatched': np.sum(np.isnan(candidate) != np.isnan(reference),
+                                 axis=0),
+            'mean_deviation': np.nanmean(diff, axis=0),
+            'mae': np.nanmean(np.abs(diff), axis=0),
+            'rmsd': np.sqrt(np.nanmean(diff ** 2, axis=0)),
+            'max_abs': np.nanmax(np.abs(diff), axis=0),
+        }
+
+
+def compare_datasets(reference, candidate, tolerances=None):
+    """
+    Compare the descriptors of two datasets of the same frames
+
+    Args:
+        reference: CourbesDataset (e.g. from curves+)
+        candidate: CourbesDataset (e.g. from the native engines)
+        tolerances: dict of descriptor: tolerance overriding the defaults
+
+    Returns:
+        a dataframe with one row per section, descriptor and bp
+    """
+    if not np.array_equal(reference.frames, candidate.frames):
+        raise ValueError('The datasets to compare have different frames')
+    tables = []
+    for name, section in candidate.sections.items():
+        ref_section = reference.sections.get(name)
+        if ref_section is None:
+            continue
+        bp_index, ref_cols, cols = np.intersect1d(
+            ref_section.bp_index, section.bp_index, return_indices=True)
+
+        for i, descriptor in enumerate(section.descriptors):
+            if descriptor not in ref_section.descriptors:
+                continue
+            table = compare_values(ref_section[descriptor][:, ref_cols],
+                                   section.values[i][:, cols],
+                                   is_angular(descriptor))
+            tolerance = get_tolerance(descriptor, tolerances)
+            table['tolerance'] = tolerance
+            # Values undefined on both sides have nothing to disagree on, but
+            # values undefined on a single side do
+            table['passed'] = (((table['max_abs'] <= tolerance)
+                                | (table['n_frames'] == 0))
+                               & (table['mismatched'] == 0))
+            tables.append(pd.DataFrame(dict(section=name,
+                                            descriptor=descriptor.strip(),
+                                            bp=bp_index, **table)))
+
+        for descriptor, labels in section.categorical.items():
+            ref_labels = ref_section.categorical.get(descriptor)
+            if ref_labels is None:
+                continue
+            agreement = np.mean(ref_labels[:, ref_cols] == labels[:, cols],
+                                axis=0)
+            tolerance = get_tolerance(descriptor, tolerances, True)
+            tables.append(pd.DataFrame(dict(
+                section=name, descriptor=descriptor.strip(), bp=bp_index,
+                n_frames=labels.shape[0], agreement=agreement,
+                tolerance=tolerance, passed=1 - agreement <= tolerance)))
+    if not tables:
+        raise ValueError('The datasets have no descriptor in common')
+    return pd.concat(tables, ignore_index=True)
+
+
+def summarize(report):
+    """
+    Summarize a validation report per descriptor
+
+    Args:
+        report: dataframe returned by compare_datasets
+
+    Returns:
+        a dataframe with one row per section and descriptor
+    """
+    grouped = report.groupby(['section', 'descriptor'], sort=False)
+    summary = pd.DataFrame({
+        'n_bp': grouped.size(),
+        'failed_bp': grouped['passed'].agg(lambda x: int((~x).sum())),
+        'tolerance': grouped['tolerance'].first()})
+    for column, how in (('mae', 'mean'), ('rmsd', 'mean'),
+                        ('max_abs', 'max'), ('agreement', 'min'),
+                        ('mismatched', 'sum')):
+        if column in report:
+            summary[column] = grouped[column].agg(how)
+    summary['passed'] = summary['failed_bp'] == 0
+    return summary.reset_index()
+
+
+def validate(topology, trajectories, selection, strands, curves_exe, lib_path,
+             sections=None, tolerances=None, **kwargs):
+    """
+    Run the same frames through curves+ and through the native engines and
+    compare them
+
+    Args:
+        topology: path to the topology
+        trajectories: path (or list of paths) to the trajectories
+        selection: mdtraj's atom selection of the nucleic acid
+        strands: lines of the curves+ strands block
+        curves_exe: path to the curves+ executable
+        lib_path: path to the curves+ standard library
+        sections: sections to validate (all the native ones if None)
+        tolerances: dict of descriptor: tolerance overriding the defaults
+        **kwargs: other arguments of analysis.analyze (frames, n_workers...)
+
+    Returns:
+        a tuple (per-bp report, per-descriptor summary, dict of the wall
+        times in seconds of both paths)
+    """
+    sections = list(native.engines) if sections is None else list(sections)
+    args = (topology, trajectories, selection, strands, curves_exe, lib_path)
+
+    start = time.perf_counter()
+    reference = analysis.analyze(*args, sections=sections, **kwargs)
+    curves_s = time.perf_counter() - start
+    candidate = analysis.analyze(*args, sections=sections, native=sections,
+                                 **kwargs)
+    native_s = time.perf_counter() - start - curves_s
+
+    report = compare_datasets(reference, candidate, tolerances)
+    walls = {'curves_s': curves_s, 'native_s': native_s,
+             'n_frames': int(reference.frames.size),
+             'failed_frames': len(reference.failed)}
+    return report, summarize(report), walls
@@ -0,0 +1,28 @@
+# Created by roy.gonzalez-aleman at 19/10/2026
+"""
+Running convergence of the descriptors of a written report
+"""
+import os
+
+import numpy as np
+import pandas as pd
+
+from courbes import convergence, parsing
+
+
+def test_report_angles_wrap(tmp_path):
+    # Twists around 180 degrees average to 0 unless they are taken as angles
+    rng = np.random.default_rng(0)
+    values = np.mod(rng.normal(180, 5, (200, 3)) + 180, 360) - 180
+    os.makedirs(tmp_path / 'inter')
+    for name in ('Twist', ' H-Twi', 'Rise'):
+        parsing.write_dataframe(str(tmp_path / 'inter' / f'{name}.txt'),
+                                pd.DataFrame(values, columns=[2, 3, 4]))
+
+    results = convergence.report_convergence(str(tmp_path))
+    for name in ('inter/Twist', 'inter/ H-Twi'):
+        final = results[name]['mean'][-1]
+        assert np.all(np.abs(np.abs(final) - 180) < 2)
+        assert np.all(results[name]['sem'][-1] < 2)
+    # Distances are averaged linearly
+    assert np.all(np.abs(results['inter/Rise']['mean'][-1]) < 60)
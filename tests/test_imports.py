@@ -0,0 +1,30 @@
+# Created by roy.gonzalez-aleman at 19/10/2026
+"""
+Import-time budget of the command line entry points
+"""
+import subprocess
+import sys
+import time
+
+import pytest
+
+# Wall time allowed to start a fresh interpreter and import an entry point
+import_budget_s = 1.0
+
+# Modules that must only be imported on the code paths that need them
+heavy_modules = ['numpy', 'pandas', 'mdtraj', 'matplotlib', 'prody']
+
+
+@pytest.mark.parametrize('module', ['courbes', 'courbes.runner',
+                                    'courbes.utils.violins'])
+def test_import_is_light(module):
+    code = (f'import sys, {module}\n'
+            f'print(",".join(x for x in {heavy_modules!r}'
+            f' if x in sys.modules))')
+    start = time.perf_counter()
+    result = subprocess.run([sys.executable, '-c', code], check=True,
+                            capture_output=True, text=True)
+    elapsed = time.perf_counter() - start
+
+    assert result.stdout.strip() == ''
+    assert elapsed < import_budget_s
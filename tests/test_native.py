@@ -0,0 +1,206 @@
+# Created by roy.gonzalez-aleman at 19/10/2026
+"""
+Native base-pair, step, backbone and groove parameters of an ideal B-DNA built
+from the standard reference bases
+"""
+import mdtraj as md
+import numpy as np
+import pytest
+
+from courbes import native
+
+sequence = 'ACGTTGCA'
+complements = {'A': 'T', 'T': 'A', 'G': 'C', 'C': 'G'}
+
+# Helical rise (A) and twist (degrees) of the ideal B-DNA
+rise, twist = 3.38, 36.0
+
+# Sugar-phosphate atoms of every nucleotide in its base frame (A), the
+# phosphate sitting on the 5' side of the base
+backbone = {
+    'P': (-2.5, 8.9, -1.2), "O5'": (-3.9, 9.0, -1.9),
+    "C5'": (-4.7, 7.9, -2.0), "C4'": (-4.5, 7.1, -0.7),
+    "O4'": (-3.2, 6.5, -0.8), "C3'": (-4.6, 7.9, 0.6),
+    "C2'": (-3.5, 7.2, 1.3), "C1'": (-2.5, 5.9, 0.3),
+    "O3'": (-5.5, 7.4, 1.5),
+}
+
+
+def rotation_z(angle):
+    """
+    Get the matrix of a right-handed rotation about z (degrees)
+    """
+    theta = np.radians(angle)
+    return np.array([[np.cos(theta), -np.sin(theta), 0],
+                     [np.sin(theta), np.cos(theta), 0],
+                     [0, 0, 1]])
+
+
+@pytest.fixture(scope='module')
+def duplex():
+    """
+    Topology, strands block and (2 frames, atoms, 3) coordinates (nm) of an
+    ideal B-DNA of one chain per strand, the second frame being the first one
+    rigidly moved
+    """
+    n_bp = len(sequence)
+    # Strand II pairs with strand I in reverse numbering
+    letters = {i + 1: x for i, x in enumerate(sequence)}
+    letters.update({2 * n_bp - i: complements[x]
+                    for i, x in enumerate(sequence)})
+    # Bases of strand II are those of strand I rotated about x
+    flip = np.diag([1.0, -1.0, -1.0])
+    frames = {}
+    for i in range(n_bp):
+        axes = rotation_z(twist * i)
+        origin = np.array([0, 0, rise * i])
+        frames[i + 1] = (axes, origin)
+        frames[2 * n_bp - i] = (axes @ flip, origin)
+
+    topology = md.Topology()
+    chains = [topology.add_chain(), topology.add_chain()]
+    coords = []
+    for number in range(1, 2 * n_bp + 1):
+        residue = topology.add_residue(f'D{letters[number]}',
+                                       chains[number > n_bp], resSeq=number)
+        axes, origin = frames[number]
+        atoms = {**native.standard_bases[letters[number]], **backbone}
+        for name, xyz in atoms.items():
+            topology.add_atom(name, md.element.get_by_symbol(name[0]),
+                              residue)
+            coords.append(axes @ np.asarray(xyz) + origin)
+    coords = np.asarray(coords)
+
+    moved = coords @ native.rotations(np.array([0.6, 0.0, 0.8]),
+                                      np.array(50.0)).T + [1.0, -2.0, 5.0]
+    strands = f'2 1 -1 0 0\n1:{n_bp}\n{2 * n_bp}:{n_bp + 1}'
+    return topology, strands, np.stack([coords, moved]) / 10
+
+
+def test_intra(duplex):
+    engine = native.IntraEngine(*duplex[:2])
+    values = engine.compute(duplex[2])['Strands_1-2']
+    assert engine.ids == [f'{x}|{complements[x]}' for x in sequence]
+    for name in native.IntraEngine.descriptors:
+        assert values[name].shape == (2, len(sequence))
+        np.testing.assert_allclose(values[name], 0, atol=1e-4)
+
+
+def test_inter(duplex):
+    engine = native.InterEngine(*duplex[:2])
+    values = engine.compute(duplex[2])[None]
+    expected = {'Rise': rise, 'Twist': twist, 'H-Ris': rise, 'H-Twi': twist}
+    assert len(values) == len(native.InterEngine.descriptors) + 2
+    for name, value in values.items():
+        assert value.shape == (2, len(sequence) - 1)
+        np.testing.assert_allclose(value, expected.get(name.strip(), 0),
+                                   atol=1e-4)
+
+
+def test_backbone(duplex):
+    topology, strands, xyz = duplex
+    n_bp = len(sequence)
+    engine = native.BackboneEngine(topology, strands)
+    values = engine.compute(xyz)
+    assert engine.sub_cases == ['Strand_1', 'Strand_2']
+    assert engine.ids == list(sequence)
+
+    # Torsions of mdtraj over the atoms of each nucleotide and of its chain
+    # neighbours (strand II runs 5'-3' from residue n_bp + 1)
+    traj = md.Trajectory(xyz, topology)
+    index = {(x.residue.resSeq, x.name): x.index for x in topology.atoms}
+    for sub_case, numbers in (('Strand_1', range(1, n_bp + 1)),
+                              ('Strand_2', range(2 * n_bp, n_bp, -1))):
+        chain = range(min(numbers), max(numbers) + 1)
+        for name in list(native.BackboneEngine.torsions) + ['Chi']:
+            expected = np.full((2, len(numbers)), np.nan)
+            for i, number in enumerate(numbers):
+                if name == 'Chi':
+                    purine = (number, 'N9') in index
+                    atoms = [(0, x) for x in (
+                        native.BackboneEngine.chi_purine if purine
+                        else native.BackboneEngine.chi_pyrimidine)]
+                else:
+                    atoms = native.BackboneEngine.torsions[name]
+                if all(number + x in chain for x, _ in atoms):
+                    quartet = [[index[number + x, y] for x, y in atoms]]
+                    expected[:, i] = np.degrees(
+                        md.compute_dihedrals(traj, quartet)[:, 0])
+            np.testing.assert_allclose(values[sub_case][name], expected,
+                                       atol=1e-3)
+            # The ideal helix repeats the backbone of every nucleotide
+            if name != 'Chi':
+                np.testing.assert_allclose(
+                    values[sub_case][name][:, 1:-1],
+                    values['Strand_1'][name][0, 1], atol=1e-3)
+
+        # Chain ends miss the neighbours of alpha (5') and epsilon/zeta (3')
+        five, three = (0, -1) if sub_case == 'Strand_1' else (-1, 0)
+        assert np.isnan(values[sub_case]['Alpha'][:, five]).all()
+        for name in ('Epsil', 'Zeta'):
+            assert np.isnan(values[sub_case][name][:, three]).all()
+        for name in ('Phase', 'Ampli'):
+            np.testing.assert_allclose(values[sub_case][name],
+                                       values['Strand_1'][name][0, 0],
+                                       atol=1e-3)
+        np.testing.assert_array_equal(
+            values[sub_case]['Puckr'],
+            native.get_puckers(values[sub_case]['Phase']))
+
+
+def test_pseudorotation():
+    # Endocyclic torsions of the Altona-Sundaralingam model
+    # nu_j = amplitude * cos(phase + 144 * (j - 2))
+    phase = np.array([18.0, 162.0, 200.0, 350.0])
+    amplitude = np.array([38.0, 35.0, 40.0, 30.0])
+    nu = amplitude * np.cos(np.radians(
+        phase + 144 * (np.arange(5)[:, None] - 2)))
+    computed = native.BackboneEngine.get_pseudorotation(nu)
+    np.testing.assert_allclose(computed[0], phase, atol=1e-6)
+    np.testing.assert_allclose(computed[1], amplitude, atol=1e-6)
+    np.testing.assert_array_equal(
+        native.get_puckers(np.append(phase, np.nan)),
+        ["C3'endo", "C2'endo", "C3'exo", "C2'exo", '----'])
+
+
+def test_groove(duplex):
+    topology, strands, xyz = duplex
+    n_bp = len(sequence)
+    engine = native.GrooveEngine(topology, strands)
+    values = engine.compute(xyz)[None]
+    np.testing.assert_array_equal(engine.levels,
+                                  np.arange(1, n_bp + 0.5, 0.5))
+
+    # Phosphate traces against their level: those of strand I precede their
+    # nucleotide, those of strand II (pairing in reverse) follow it
+    phosphates = {x.residue.resSeq: x.index for x in topology.atoms
+                  if x.name == 'P'}
+    trace_1 = xyz[0, [phosphates[x] for x in range(1, n_bp + 1)]] * 10
+    trace_2 = xyz[0, [phosphates[2 * n_bp + 1 - x]
+                      for x in range(1, n_bp + 1)]] * 10
+    numbers = np.arange(1, n_bp + 1)
+
+    def interpolate(trace, positions, level):
+        if not positions[0] <= level <= positions[-1]:
+            return np.full(3, np.nan)
+        return np.array([np.interp(level, positions, trace[:, x])
+                         for x in range(3)])
+
+    for name, (low, high) in native.GrooveEngine.windows.items():
+        offsets = np.arange(low, high + 0.125, 0.25)
+        expected = []
+        for level in engine.levels:
+            distances = [np.linalg.norm(
+                interpolate(trace_1, numbers - 0.5, level - x / 2)
+                - interpolate(trace_2, numbers + 0.5, level + x / 2))
+                for x in offsets]
+            expected.append(np.min(distances) - 5.8)
+        for frame in values[name]:
+            np.testing.assert_allclose(frame, expected, atol=1e-4)
+        defined = np.isfinite(values[name][0])
+        assert defined.any() and not defined.all()
+        # The ideal helix repeats every level
+        middle = values[name][0][defined]
+        np.testing.assert_allclose(middle[2:], middle[:-2], atol=1e-4)
+    # The minor groove faces the 5' side of the first strand
+    assert np.nanmax(values['W12']) < np.nanmin(values['W21'])
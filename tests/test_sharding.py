@@ -0,0 +1,91 @@
+# Created by roy.gonzalez-aleman at 19/10/2026
+"""
+Merging shards gives the report of a single unsharded run
+"""
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import courbes.commons as cmn
+from courbes import analysis, parsing, sharding
+from courbes.stats import StreamingStats, is_angular, replica_starts
+
+descriptors = ['Rise', 'Twist']
+n_frames, n_bp, n_shards = 60, 5, 3
+
+
+@pytest.fixture(scope='module')
+def dataset():
+    rng = np.random.default_rng(0)
+    values = np.stack([rng.normal(3.4, 0.3, (n_frames, n_bp)),
+                       rng.normal(175, 10, (n_frames, n_bp))])
+    values[1] = np.mod(values[1] + 180, 360) - 180
+    values[rng.random(values.shape) < 0.1] = np.nan
+    values[:, :, 0] = np.nan
+    section = analysis.Section('inter', descriptors, values,
+                               np.arange(n_frames), np.arange(2, n_bp + 2),
+                               ['A|T'] * n_bp)
+    # The second replica starts in the middle of the second shard
+    replicas = ['MD1'] * 30 + ['MD2'] * 30
+    return analysis.CourbesDataset({'inter': section}, np.arange(n_frames),
+                                   replicas=replicas)
+
+
+@pytest.fixture(scope='module')
+def merged(dataset, tmp_path_factory):
+    output_dir = str(tmp_path_factory.mktemp('sharded'))
+    for index, positions in enumerate(
+            np.array_split(np.arange(n_frames), n_shards)):
+        shard_dir = sharding.get_shard_dir(output_dir, (index + 1, n_shards))
+        os.makedirs(shard_dir)
+        shard = analysis.CourbesDataset(
+            {x: y.select(positions) for x, y in dataset.sections.items()},
+            dataset.frames[positions], replicas=dataset.replicas[positions])
+        sharding.write_shard(os.path.join(shard_dir, sharding.shard_name),
+                             shard)
+    return output_dir, sharding.merge_shards(output_dir, 'replicas',
+                                             'failed_frames.json')
+
+
+def test_merged_values(dataset, merged):
+    _, merged_dataset = merged
+    np.testing.assert_array_equal(merged_dataset.frames, dataset.frames)
+    np.testing.assert_array_equal(merged_dataset.replicas, dataset.replicas)
+    np.testing.assert_array_equal(merged_dataset['inter'].values,
+                                  dataset['inter'].values)
+
+
+def test_merged_streaming_stats(dataset, merged):
+    output_dir, _ = merged
+    read = [sharding.read_shard(x)
+            for x in sharding.find_shards(output_dir)]
+    by_replica, pooled = sharding.merge_stats([x[1] for x in read])
+
+    expected = StreamingStats.from_values(dataset['inter'].values)
+    for field in ('count', 'mean', 'm2', 'min', 'max'):
+        np.testing.assert_allclose(getattr(pooled['inter'], field),
+                                   getattr(expected, field), rtol=1e-10)
+    for replica in dataset.replica_names:
+        values = dataset.replica(replica)['inter'].values
+        np.testing.assert_allclose(by_replica[replica]['inter'].m2,
+                                   StreamingStats.from_values(values).m2,
+                                   rtol=1e-10)
+
+
+@pytest.mark.parametrize('descriptor', descriptors)
+def test_merged_report(dataset, merged, descriptor):
+    output_dir, _ = merged
+    section = dataset['inter']
+    df = pd.DataFrame(section[descriptor], columns=section.bp_index)
+    # Pooled as an unsharded run, replica after replica
+    expected = parsing.get_dataframe_stats(df, is_angular(descriptor),
+                                           replica_starts(dataset.replicas))
+
+    written = cmn.load_raw_df(
+        os.path.join(output_dir, 'inter', f'{descriptor}_stats.txt'))
+    assert written.index.tolist() == expected.index.tolist()
+    np.testing.assert_allclose(written.to_numpy(float),
+                               expected.to_numpy(float), atol=1e-3,
+                               equal_nan=True)
@@ -0,0 +1,65 @@
+# Created by roy.gonzalez-aleman at 19/10/2026
+"""
+PDB templates of the shared-memory writers against the PDBs of mdtraj
+"""
+import mdtraj as md
+import numpy as np
+import pytest
+
+from courbes import sharing
+
+# Records of mdtraj that the template does not write
+header_records = ('REMARK', 'CRYST1', 'MODEL', 'ENDMDL')
+
+
+def read_records(pdb_path):
+    """
+    Get the lines of a PDB file but those of its header and model
+    """
+    with open(pdb_path, 'rt') as pdb_file:
+        return [x for x in pdb_file.read().splitlines()
+                if not x.startswith(header_records)]
+
+
+@pytest.fixture(scope='module')
+def traj():
+    """
+    Two chains of nucleotides and waters
+    """
+    topology = md.Topology()
+    for number, letter in enumerate('AT'):
+        chain = topology.add_chain()
+        for offset in range(3):
+            residue = topology.add_residue(f'D{letter}', chain,
+                                           resSeq=3 * number + offset + 1)
+            for name in ('P', "O5'", "C1'", 'N9'):
+                topology.add_atom(name, md.element.get_by_symbol(name[0]),
+                                  residue)
+        water = topology.add_residue('HOH', chain, resSeq=100 + number)
+        topology.add_atom('O', md.element.oxygen, water)
+    xyz = np.random.default_rng(0).normal(0, 3, (1, topology.n_atoms, 3))
+    return md.Trajectory(xyz.astype(np.float32), topology,
+                         unitcell_lengths=np.full((1, 3), 10.0),
+                         unitcell_angles=np.full((1, 3), 90.0))
+
+
+def test_format_two_chains(traj, tmp_path):
+    traj.save_pdb(str(tmp_path / 'mdtraj.pdb'))
+    template = sharing.PdbTemplate(traj.topology)
+    template.write(traj.xyz[0], str(tmp_path / 'template.pdb'))
+    expected = read_records(str(tmp_path / 'mdtraj.pdb'))
+    assert read_records(str(tmp_path / 'template.pdb')) == expected
+    assert sum(x.startswith('TER') for x in expected) == 2
+
+
+def test_format_single_chain_serials(traj, tmp_path):
+    # mdtraj writes back the serials of the atoms of a single chain
+    chain = traj.atom_slice(traj.topology.select('chainid 1'))
+    for atom in chain.topology.atoms:
+        atom.serial = 10 + 2 * atom.index
+    chain.save_pdb(str(tmp_path / 'mdtraj.pdb'))
+    template = sharing.PdbTemplate(chain.topology)
+    template.write(chain.xyz[0], str(tmp_path / 'template.pdb'))
+    expected = read_records(str(tmp_path / 'mdtraj.pdb'))
+    assert read_records(str(tmp_path / 'template.pdb')) == expected
+    assert expected[0].startswith('ATOM     10')
@@ -0,0 +1,206 @@
+# Created by roy.gonzalez-aleman at 19/10/2026
+"""
+Autocorrelation-aware and circular statistics against analytic values, and
+changes between systems flagged by the significance tests and bootstrap
+"""
+import numpy as np
+import pytest
+
+from courbes import analysis, bootstrap, significance, stats
+
+# Autoregressive coefficient of the AR(1) series, and their analytic
+# integrated autocorrelation time (1 + phi) / (1 - phi)
+phi = 0.9
+ar1_tau = (1 + phi) / (1 - phi)
+
+
+def ar1(n_frames, n_series, seed=0):
+    """
+    Get AR(1) series of unit innovations, starting from their stationary
+    distribution
+    """
+    rng = np.random.default_rng(seed)
+    noise = rng.normal(size=(n_frames, n_series))
+    values = np.empty_like(noise)
+    values[0] = noise[0] / np.sqrt(1 - phi ** 2)
+    for i in range(1, n_frames):
+        values[i] = phi * values[i - 1] + noise[i]
+    return values
+
+
+@pytest.fixture(scope='module')
+def series():
+    return ar1(20000, 16)
+
+
+# Base pairs of the compared systems, of which the first ones are shifted in
+# the target, and the shifts of their rises (A) and twists (degrees)
+n_bp, n_shifted = 8, 3
+shifts = {'Rise': 0.3, 'Twist': 6.0}
+
+
+def make_dataset(seed, shift=False):
+    """
+    Get a dataset of two replicas of autocorrelated rises and of twists
+    around 178 degrees (wrapping across 180), optionally shifted
+    """
+    noise = ar1(2000, 2 * n_bp, seed)
+    rise = 3.4 + 0.1 * noise[:, :n_bp]
+    twist = 178 + 2 * noise[:, n_bp:]
+    if shift:
+        rise[:, :n_shifted] += shifts['Rise']
+        twist[:, :n_shifted] += shifts['Twist']
+    twist = np.mod(twist + 180, 360) - 180
+    n_frames = noise.shape[0]
+    section = analysis.Section('inter', list(shifts), np.stack([rise, twist]),
+                               np.arange(n_frames), np.arange(2, n_bp + 2),
+                               ['A|T'] * n_bp)
+    replicas = ['MD1'] * 1200 + ['MD2'] * (n_frames - 1200)
+    return analysis.CourbesDataset({'inter': section}, np.arange(n_frames),
+                                   replicas=replicas)
+
+
+@pytest.fixture(scope='module')
+def systems():
+    return {'reference': make_dataset(4), 'target': make_dataset(5, True)}
+
+
+def test_integrated_time(series):
+    tau = stats.integrated_time(series)
+    assert tau.shape == (series.shape[1],)
+    assert np.mean(tau) == pytest.approx(ar1_tau, rel=0.1)
+
+
+def test_integrated_time_white_noise():
+    values = np.random.default_rng(1).normal(size=(20000, 4))
+    np.testing.assert_allclose(stats.integrated_time(values), 1, atol=0.1)
+
+
+def test_block_sem(series):
+    # Variance of the AR(1) process times its statistical inefficiency
+    analytic = np.sqrt(ar1_tau / (1 - phi ** 2) / series.shape[0])
+    sem = stats.block_sem(series)
+    assert np.median(sem) == pytest.approx(analytic, rel=0.15)
+    # The naive SEM underestimates it by sqrt(tau)
+    naive = series.std(axis=0, ddof=1) / np.sqrt(series.shape[0])
+    assert np.all(sem > 2 * naive)
+
+
+def test_correlation_stats_replicas():
+    # Two replicas around different means: the step between them is not an
+    # autocorrelation of the frames
+    first, second = ar1(10000, 8, seed=2), ar1(5000, 8, seed=3) + 20
+    values = np.concatenate([first, second])
+    pooled = stats.correlation_stats(values, starts=[0, len(first)])
+    replicas = [stats.correlation_stats(x) for x in (first, second)]
+
+    np.testing.assert_allclose(pooled['n_eff'],
+                               replicas[0]['n_eff'] + replicas[1]['n_eff'])
+    np.testing.assert_allclose(pooled['tau'], len(values) / pooled['n_eff'])
+    assert np.mean(pooled['tau']) == pytest.approx(ar1_tau, rel=0.1)
+    expected_sem = np.hypot(len(first) * replicas[0]['sem_block'],
+                            len(second) * replicas[1]['sem_block'])
+    np.testing.assert_allclose(pooled['sem_block'],
+                               expected_sem / len(values))
+    # Ignoring the replicas mistakes the step for a slow decorrelation
+    assert np.all(stats.correlation_stats(values)['tau'] > 5 * ar1_tau)
+
+
+def test_correlation_stats_without_values():
+    values = ar1(200, 3)
+    values[:, 1] = np.nan
+    for starts in (None, [0, 120]):
+        correlation = stats.correlation_stats(values, starts)
+        for row in ('tau', 'n_eff', 'sem_block'):
+            assert np.isnan(correlation[row][1])
+            assert np.all(np.isfinite(correlation[row][[0, 2]]))
+        assert np.isnan(stats.effective_count(values, starts)[1])
+
+
+def test_replica_starts():
+    np.testing.assert_array_equal(
+        stats.replica_starts(['MD1'] * 3 + ['MD2'] * 2 + ['MD3']), [0, 3, 5])
+    assert stats.replica_bounds(6, [0, 3, 5]) == [(0, 3), (3, 5), (5, 6)]
+    assert stats.replica_bounds(6) == [(0, 6)]
+
+
+def test_circular_stats_around_180():
+    values = np.array([[179.0], [-179.0], [178.0], [-178.0]])
+    circular = stats.circular_stats(values)
+    assert abs(stats.wrapped_difference(circular['mean'][0], 180)) < 1e-9
+    assert circular['R'][0] == pytest.approx(
+        np.mean(np.cos(np.radians([1, 1, 2, 2]))))
+    assert circular['std'][0] < 2
+
+
+def test_circular_stats_wrap_350_10():
+    circular = stats.circular_stats(np.array([[350.0], [10.0]]))
+    # All the angles are positive, so the mean is in [0, 360[
+    assert 0 <= circular['mean'][0] < 360
+    assert abs(stats.wrapped_difference(circular['mean'][0], 0)) < 1e-9
+    assert circular['R'][0] == pytest.approx(np.cos(np.radians(10)))
+    assert circular['std'][0] == pytest.approx(
+        np.degrees(np.sqrt(-2 * np.log(np.cos(np.radians(10))))))
+
+
+@pytest.mark.parametrize('method', ['welch', 'permutation'])
+def test_compare_systems_shift(systems, method):
+    table = significance.compare_systems(systems, 'reference', method,
+                                         seed=0)
+    assert len(table) == 2 * n_bp
+    table = table.set_index(['descriptor', 'bp'])
+    for descriptor, shift in shifts.items():
+        rows = table.loc[descriptor].sort_index()
+        expected = rows.index < n_shifted + 2
+        np.testing.assert_array_equal(rows['significant'], expected)
+        # Twists are compared across 180 degrees
+        np.testing.assert_allclose(rows['difference'], shift * expected,
+                                   atol=shift / 3)
+
+
+def test_difference_intervals_shift(systems):
+    table = bootstrap.difference_intervals(
+        systems['target'], systems['reference'], n_resamples=500, seed=0)
+    for descriptor, shift in shifts.items():
+        rows = table[table['descriptor'] == descriptor].sort_values('bp')
+        expected = rows['bp'].to_numpy() < n_shifted + 2
+        np.testing.assert_array_equal(rows['significant'], expected)
+        np.testing.assert_allclose(rows['difference'], shift * expected,
+                                   atol=shift / 3)
+        assert np.all((rows['low'] <= rows['difference'])
+                      & (rows['difference'] <= rows['high']))
+    # Twists of the target wrapped to the other side of 180 degrees
+    twists = table[table['descriptor'] == 'Twist']
+    assert np.all(np.abs(twists['difference']) < 180 / 2)
+    assert (twists['target'] < 0).any() and (twists['reference'] > 0).any()
+
+
+def test_wrapped_difference_across_180():
+    np.testing.assert_allclose(
+        stats.wrapped_difference(np.array([-176.0, 179.0, 10.0]),
+                                 np.array([178.0, -179.0, 350.0])),
+        [6.0, -2.0, 20.0])
+
+
+def test_fdr_correction():
+    p_values = np.array([0.01, 0.04, np.nan, 0.03, 0.2])
+    # Ranks 1-4 of the valid p-values: 0.01 * 4, 0.03 * 4 / 2, 0.04 * 4 / 3
+    # (kept by the larger one of rank 2), 0.2 * 4 / 4
+    q_values = significance.fdr_correction(p_values)
+    np.testing.assert_allclose(q_values, [0.04, 0.16 / 3, np.nan, 0.16 / 3,
+                                          0.2])
+    assert np.isnan(significance.fdr_correction([np.nan, np.nan])).all()
+
+
+def test_blocks_within_replicas():
+    starts = [0, 30, 55]
+    bounds = stats.replica_bounds(100, starts)
+    sampler = bootstrap.Bootstrap(100, 50, block_size=7, seed=0,
+                                  starts=starts)
+    for first in sampler.block_starts:
+        assert any(x <= first and first + 7 <= y for x, y in bounds)
+    # Blocks of the frames of each replica hold a single replica
+    labels = np.repeat(np.arange(3.0), np.diff(starts + [100]))[:, None]
+    sums, counts = significance.block_sums(labels, 7, starts)
+    np.testing.assert_array_equal(sums / counts,
+                                  np.repeat([0, 1, 2], [4, 3, 6])[:, None])
@@ -0,0 +1,68 @@
+# Created by roy.gonzalez-aleman at 19/10/2026
+"""
+Round trip of the synthetic curves+ .lis files through the parser
+"""
+import numpy as np
+import pytest
+
+from courbes import analysis
+from courbes.utils import synthetic
+
+sequence = 'CGCGAATTCG'
+n_frames = 4
+
+
+@pytest.fixture(scope='module')
+def round_trip(tmp_path_factory):
+    out_dir = tmp_path_factory.mktemp('lis')
+    rng = np.random.default_rng(0)
+    values = [synthetic.random_values(len(sequence), rng, p_missing=0.2)
+              for _ in range(n_frames)]
+    lis_paths = [synthetic.write_lis(str(out_dir / f'tmp_{i + 1}.lis'),
+                                     sequence, values=x)
+                 for i, x in enumerate(values)]
+    lis_parsed = analysis.parse_lis(lis_paths)
+    return analysis.CourbesDataset.from_parser(lis_parsed), values
+
+
+@pytest.mark.parametrize('name, section, strand', [
+    ('axis', 'axis', None),
+    ('intra/Strands_1-2', 'intra', None),
+    ('inter', 'inter', None),
+    ('backbone/Strand_1', 'backbone', 0),
+    ('backbone/Strand_2', 'backbone', 1),
+    ('groove', 'groove', None),
+])
+def test_parsed_values(round_trip, name, section, strand):
+    dataset, values = round_trip
+    written = np.stack([x[section] if strand is None else x[section][strand]
+                        for x in values])
+    # (frames, bp, descriptors) as written, (descriptors, frames, bp) parsed
+    expected = written.transpose(2, 0, 1)
+    parsed = dataset[name]
+
+    assert ([x.strip() for x in parsed.descriptors]
+            == synthetic.section_columns[section])
+    assert parsed.values.shape == expected.shape
+    np.testing.assert_array_equal(np.isnan(parsed.values), np.isnan(expected))
+    np.testing.assert_allclose(parsed.values, expected.round(2), atol=1e-6,
+                               equal_nan=True)
+
+
+def test_parsed_labels(round_trip):
+    dataset, values = round_trip
+    n_bp = len(sequence)
+
+    assert dataset.frames.size == n_frames
+    assert dataset['axis'].bp_index.tolist() == list(range(1, n_bp + 1))
+    assert dataset['inter'].bp_index.tolist() == list(range(2, n_bp + 1))
+    np.testing.assert_array_equal(dataset['groove'].bp_index,
+                                  synthetic.get_levels(n_bp))
+    assert dataset['axis'].bp_ids[:3] == ['C|G', 'G|C', 'C|G']
+
+    # Puckers are kept as labels, derived from the written phases
+    puckers = dataset['backbone/Strand_1'].categorical['Puckr']
+    phases = np.stack([x['backbone'][0][:, 7] for x in values])
+    expected = [[synthetic.get_pucker(x) for x in row]
+                for row in phases.round(2)]
+    assert puckers.tolist() == expected
@@ -0,0 +1,57 @@
+# Created by roy.gonzalez-aleman at 19/10/2026
+"""
+Memory measures of the automatic choice of the chunk size
+"""
+import mdtraj as md
+import numpy as np
+import pytest
+
+from courbes import tuning
+
+n_frames = 20
+
+
+@pytest.fixture(scope='module')
+def system(tmp_path_factory):
+    """
+    Paths to the topology and trajectory of a nucleotide in water
+    """
+    topology = md.Topology()
+    chain = topology.add_chain()
+    residue = topology.add_residue('DA', chain, resSeq=1)
+    for name in ('P', "C1'", 'N9', 'C8', 'N7'):
+        topology.add_atom(name, md.element.get_by_symbol(name[0]), residue)
+    for number in range(2, 32):
+        water = topology.add_residue('HOH', chain, resSeq=number)
+        topology.add_atom('O', md.element.oxygen, water)
+    xyz = np.random.default_rng(0).random((n_frames, topology.n_atoms, 3))
+    traj = md.Trajectory(xyz.astype(np.float32), topology,
+                         unitcell_lengths=np.ones((n_frames, 3)),
+                         unitcell_angles=np.full((n_frames, 3), 90.0))
+    out_dir = tmp_path_factory.mktemp('tuning')
+    traj[0].save_pdb(str(out_dir / 'top.pdb'))
+    traj.save_dcd(str(out_dir / 'traj.dcd'))
+    return str(out_dir / 'top.pdb'), str(out_dir / 'traj.dcd'), topology
+
+
+@pytest.mark.parametrize('frames', [3, 20])
+def test_frame_mb(system, frames):
+    topo, traj, topology = system
+    chunk, frame_mb = tuning.measure_chunk(topo, traj, 'resname DA',
+                                           n_frames=frames)
+    assert chunk.n_frames == frames
+    assert chunk.n_atoms == 5
+    # Frames are read with all the atoms before the selection is applied
+    coords_mb = topology.n_atoms * 3 * 4 / 1024 ** 2
+    assert frame_mb > 0
+    assert frame_mb == pytest.approx(coords_mb, rel=0.2)
+
+
+def test_chunk_size_memory_bound():
+    frame_mb = 50.0
+    _, chunk_size = tuning.choose_settings(4, 16000, 0.01, 1.0, 100,
+                                           frame_mb)
+    assert chunk_size < tuning.max_chunk_size
+    # Loaded chunks (and their restricted copies) stay within their share
+    left = 16000 - 4 * 100
+    assert 2 * chunk_size * frame_mb <= tuning.chunks_memory_fraction * left